@@ -101,6 +101,8 @@ class BlockDesc {
 
   size_t OpSize() const { return ops_.size(); }
 
+  size_t VarSize() const { return vars_.size(); }
+
   OpDesc *Op(int idx) const { return ops_.at(idx).get(); }
 
   void Flush();
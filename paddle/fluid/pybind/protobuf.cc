@@ -137,6 +137,7 @@ void BindBlockDesc(pybind11::module *m) {
       .def("all_vars", &pd::BlockDesc::AllVars,
            pybind11::return_value_policy::reference)
       .def("op_size", &pd::BlockDesc::OpSize)
+      .def("var_size", &pd::BlockDesc::VarSize)
       .def("op", &pd::BlockDesc::Op, pybind11::return_value_policy::reference)
       .def("serialize_to_string", SerializeMessage<pd::BlockDesc>);
 }
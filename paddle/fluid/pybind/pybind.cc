@@ -980,6 +980,8 @@ All parameter, weight, gradient are variables in Paddle.
            R"DOC(
            Delete all sub-scopes of the current scope.
            )DOC")
+      .def("_delete_kid",
+           [](Scope &self, Scope *kid) { self.DeleteScope(kid); })
       .def("_kids", &Scope::kids);
 
   m.def("Scope",
@@ -18,13 +18,25 @@ import requests
 import hashlib
 import os
 import errno
-import shutil
+import json
 import six
 import sys
 import importlib
+import mmap
+import struct
+import zlib
+import numpy as np
 import paddle.dataset
 import six.moves.cPickle as pickle
 import glob
+from multiprocessing.pool import ThreadPool
+from six.moves.urllib.parse import urlparse
+from six.moves.urllib.request import url2pathname
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 __all__ = [
     'DATA_HOME',
@@ -32,6 +44,11 @@ __all__ = [
     'md5file',
     'split',
     'cluster_files_reader',
+    'RecordWriter',
+    'RecordReader',
+    'split_records',
+    'cluster_records_reader',
+    'convert_pickle_shards',
 ]
 
 DATA_HOME = os.path.expanduser('~/.cache/paddle/dataset')
@@ -54,72 +71,224 @@ def must_mkdirs(path):
 must_mkdirs(DATA_HOME)
 
 
+# Read files in large chunks when hashing them, it is much faster than
+# small reads for the dataset archives of hundreds of MB.
+_MD5_CHUNK_SIZE = 1 << 20
+_DOWNLOAD_CHUNK_SIZE = 1 << 16
+
+
 def md5file(fname):
     hash_md5 = hashlib.md5()
-    f = open(fname, "rb")
-    for chunk in iter(lambda: f.read(4096), b""):
-        hash_md5.update(chunk)
-    f.close()
+    with open(fname, "rb") as f:
+        for chunk in iter(lambda: f.read(_MD5_CHUNK_SIZE), b""):
+            hash_md5.update(chunk)
     return hash_md5.hexdigest()
 
 
+def _manifest_path(filename):
+    return filename + '.md5.json'
+
+
+def _file_stat(filename):
+    st = os.stat(filename)
+    return st.st_size, st.st_mtime
+
+
+def _write_manifest(filename, md5sum):
+    size, mtime = _file_stat(filename)
+    tmp = _manifest_path(filename) + '.%d.tmp' % os.getpid()
+    with open(tmp, 'w') as f:
+        json.dump({'md5': md5sum, 'size': size, 'mtime': mtime}, f)
+    os.rename(tmp, _manifest_path(filename))
+
+
+def _read_manifest(filename):
+    """
+    Return the md5 recorded in the manifest of filename, or None if there is
+    no manifest or the file changed since it was recorded.
+    """
+    try:
+        with open(_manifest_path(filename)) as f:
+            manifest = json.load(f)
+        size, mtime = _file_stat(filename)
+    except (IOError, OSError, ValueError):
+        return None
+    if manifest.get('size') != size or manifest.get('mtime') != mtime:
+        return None
+    return manifest.get('md5')
+
+
+def _is_verified(filename, md5sum):
+    """
+    Check the md5 of filename. The file is only hashed if its manifest is
+    missing or stale, and the manifest is updated after a successful check.
+    """
+    if not os.path.exists(filename):
+        return False
+    if _read_manifest(filename) == md5sum:
+        return True
+    if md5file(filename) == md5sum:
+        _write_manifest(filename, md5sum)
+        return True
+    return False
+
+
+class _FileLock(object):
+    """
+    An exclusive lock held across processes by flock on a lock file. It does
+    nothing on the platforms without fcntl.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.fd.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args):
+        if fcntl is not None:
+            fcntl.flock(self.fd.fileno(), fcntl.LOCK_UN)
+        self.fd.close()
+        self.fd = None
+
+
+def _open_url(url, offset):
+    """
+    Open url for reading from byte offset. Returns the chunk iterator, the
+    total length of the file (None if unknown), and whether the read starts
+    from offset rather than from the beginning.
+    """
+    if url.startswith('file://'):
+        path = url2pathname(urlparse(url).path)
+        f = open(path, 'rb')
+        total_length = os.path.getsize(path)
+        offset = min(offset, total_length)
+        f.seek(offset)
+
+        def chunks():
+            try:
+                for chunk in iter(lambda: f.read(_DOWNLOAD_CHUNK_SIZE), b""):
+                    yield chunk
+            finally:
+                f.close()
+
+        return chunks(), total_length, True
+
+    headers = {'Range': 'bytes=%d-' % offset} if offset > 0 else {}
+    r = requests.get(url, stream=True, headers=headers)
+    if r.status_code == 416:
+        # the partial file is already complete
+        return iter([]), offset, True
+    r.raise_for_status()
+    resumed = offset > 0 and r.status_code == 206
+    total_length = r.headers.get('content-length')
+    if total_length is not None:
+        total_length = int(total_length) + (offset if resumed else 0)
+    return r.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE), total_length, \
+        resumed
+
+
+def _download_to(url, partname):
+    """
+    Download url into partname, resuming from the bytes already in it.
+    """
+    offset = os.path.getsize(partname) if os.path.exists(partname) else 0
+    chunks, total_length, resumed = _open_url(url, offset)
+    if not resumed:
+        offset = 0
+    with open(partname, 'ab' if resumed else 'wb') as f:
+        dl = offset
+        for data in chunks:
+            if six.PY2:
+                data = six.b(data)
+            dl += len(data)
+            f.write(data)
+            if total_length:
+                done = int(50 * dl / total_length)
+                sys.stderr.write("\r[%s%s]" % ('=' * done, ' ' * (50 - done)))
+                sys.stdout.flush()
+
+
 def download(url, module_name, md5sum, save_name=None):
+    """
+    Download url into DATA_HOME/module_name and check its md5sum.
+
+    A file downloaded and checked before is returned right away, its md5 is
+    recorded in a manifest next to it, so it is not hashed again unless it
+    changes. The download goes into a .part file first and is resumed from
+    there after an interruption. Concurrent downloads of the same file from
+    several processes are serialized by a file lock. Both http(s):// and
+    file:// urls are supported.
+    """
     dirname = os.path.join(DATA_HOME, module_name)
     if not os.path.exists(dirname):
-        os.makedirs(dirname)
+        try:
+            os.makedirs(dirname)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
 
     filename = os.path.join(dirname,
                             url.split('/')[-1]
                             if save_name is None else save_name)
 
-    if os.path.exists(filename) and md5file(filename) == md5sum:
+    if _is_verified(filename, md5sum):
         return filename
 
-    retry = 0
-    retry_limit = 3
-    while not (os.path.exists(filename) and md5file(filename) == md5sum):
-        if os.path.exists(filename):
-            sys.stderr.write("file %s  md5 %s" % (md5file(filename), md5sum))
-        if retry < retry_limit:
-            retry += 1
-        else:
-            raise RuntimeError("Cannot download {0} within retry limit {1}".
-                               format(url, retry_limit))
-        sys.stderr.write("Cache file %s not found, downloading %s" %
-                         (filename, url))
-        r = requests.get(url, stream=True)
-        total_length = r.headers.get('content-length')
-
-        if total_length is None:
-            with open(filename, 'wb') as f:
-                shutil.copyfileobj(r.raw, f)
-        else:
-            with open(filename, 'wb') as f:
-                dl = 0
-                total_length = int(total_length)
-                for data in r.iter_content(chunk_size=4096):
-                    if six.PY2:
-                        data = six.b(data)
-                    dl += len(data)
-                    f.write(data)
-                    done = int(50 * dl / total_length)
-                    sys.stderr.write("\r[%s%s]" % ('=' * done,
-                                                   ' ' * (50 - done)))
-                    sys.stdout.flush()
+    partname = filename + '.part'
+    with _FileLock(filename + '.lock'):
+        retry = 0
+        retry_limit = 3
+        # another process may have finished the download while waiting
+        while not _is_verified(filename, md5sum):
+            if os.path.exists(filename):
+                sys.stderr.write("file %s  md5 %s" %
+                                 (md5file(filename), md5sum))
+            if retry < retry_limit:
+                retry += 1
+            else:
+                raise RuntimeError("Cannot download {0} within retry limit {1}".
+                                   format(url, retry_limit))
+            sys.stderr.write("Cache file %s not found, downloading %s" %
+                             (filename, url))
+            _download_to(url, partname)
+            part_md5 = md5file(partname)
+            if part_md5 == md5sum:
+                os.rename(partname, filename)
+                _write_manifest(filename, md5sum)
+            else:
+                # the partial file is corrupted, download from scratch
+                os.remove(partname)
     sys.stderr.write("\n")
     sys.stdout.flush()
     return filename
 
 
-def fetch_all():
+def fetch_all(num_workers=4):
+    """
+    Download the data files of all the datasets which have a fetch function,
+    with num_workers datasets fetched concurrently.
+    """
+    fetches = []
     for module_name in [
             x for x in dir(paddle.dataset) if not x.startswith("__")
     ]:
-        if "fetch" in dir(
-                importlib.import_module("paddle.dataset.%s" % module_name)):
-            getattr(
-                importlib.import_module("paddle.dataset.%s" % module_name),
-                "fetch")()
+        module = importlib.import_module("paddle.dataset.%s" % module_name)
+        if "fetch" in dir(module):
+            fetches.append(getattr(module, "fetch"))
+
+    pool = ThreadPool(max(1, min(num_workers, len(fetches))))
+    try:
+        results = [pool.apply_async(fetch) for fetch in fetches]
+        for result in results:
+            result.get()
+    finally:
+        pool.close()
+        pool.join()
 
 
 def split(reader, line_count, suffix="%05d.pickle", dumper=pickle.dump):
@@ -151,12 +320,12 @@ def split(reader, line_count, suffix="%05d.pickle", dumper=pickle.dump):
     for i, d in enumerate(reader()):
         lines.append(d)
         if i >= line_count and i % line_count == 0:
-            with open(suffix % indx_f, "w") as f:
+            with open(suffix % indx_f, "wb") as f:
                 dumper(lines, f)
                 lines = []
                 indx_f += 1
     if lines:
-        with open(suffix % indx_f, "w") as f:
+        with open(suffix % indx_f, "wb") as f:
             dumper(lines, f)
 
 
@@ -187,9 +356,302 @@ def cluster_files_reader(files_pattern,
                 print("append file: %s" % fn)
                 my_file_list.append(fn)
         for fn in my_file_list:
-            with open(fn, "r") as f:
+            with open(fn, "rb") as f:
                 lines = loader(f)
                 for line in lines:
                     yield line
 
     return reader
+
+
+# The record file format:
+#
+#   magic
+#   record 0, record 1, ...
+#   index: the number of records N (uint64) and the N offsets (uint64)
+#   footer: the offset of the index (uint64) and magic
+#
+# A record is a header of the length (uint32), the crc32 (uint32) and the
+# flags (uint8) of the payload, followed by the payload, which is zlib
+# compressed if flagged. The payload holds the slots of a sample, each slot
+# is a numpy array. The payload starts with the layout of the slots, which
+# is the dtype, ndim and shape of each slot, followed by the raw data of
+# the slots. Records and all the fields of them are 8-byte aligned, so an
+# uncompressed record can be decoded as zero-copy views of the memory mapped
+# file.
+_RECORD_MAGIC = b'PDREC\x00\x01\x00'
+_RECORD_HEADER = struct.Struct('<IIB7x')
+_RECORD_COUNT = struct.Struct('<Q')
+_RECORD_FOOTER = struct.Struct('<Q8s')
+_PAYLOAD_HEADER = struct.Struct('<II')
+_SLOT_HEADER = struct.Struct('<8sI4x')
+_FLAG_COMPRESSED = 1
+_FLAG_SINGLE_SLOT = 1
+
+# The samples of a dataset usually share a few layouts, so the parsed
+# layouts are cached to decode a record with a lookup.
+_LAYOUT_CACHE_SIZE = 4096
+_layouts = {}
+
+
+def _align8(n):
+    return (n + 7) & ~7
+
+
+def _encode_payload(sample):
+    single = not isinstance(sample, (tuple, list))
+    slots = [sample] if single else sample
+    layout = []
+    data = []
+    for slot in slots:
+        arr = np.asarray(slot)
+        dtype = arr.dtype.str.encode('ascii')
+        if arr.dtype.hasobject or len(dtype) > 8:
+            raise TypeError("The slots of a record should be numpy arrays "
+                            "of numbers, but got %s" % type(slot))
+        layout.append(_SLOT_HEADER.pack(dtype, arr.ndim))
+        layout.append(struct.pack('<%dQ' % arr.ndim, *arr.shape))
+        raw = arr.tobytes()
+        data.append(raw + b'\0' * (_align8(len(raw)) - len(raw)))
+    layout = b''.join(layout)
+    return b''.join([
+        _PAYLOAD_HEADER.pack(
+            len(layout), _FLAG_SINGLE_SLOT if single else 0), layout
+    ] + data)
+
+
+def _parse_layout(layout):
+    """
+    Parse the layout of a payload into a list of (dtype, count, shape,
+    offset of the data from the end of the layout) for each slot. The shape
+    is None for 1-D slots, which need no reshape.
+    """
+    slots = []
+    pos = 0
+    data_offset = 0
+    while pos < len(layout):
+        dtype, ndim = _SLOT_HEADER.unpack_from(layout, pos)
+        pos += _SLOT_HEADER.size
+        dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+        shape = struct.unpack_from('<%dQ' % ndim, layout, pos)
+        pos += 8 * ndim
+        count = int(np.prod(shape, dtype=np.int64))
+        slots.append((dtype, count, None if ndim == 1 else shape,
+                      data_offset))
+        data_offset += _align8(count * dtype.itemsize)
+    return slots
+
+
+def _decode_payload(buf, offset):
+    layout_len, flags = _PAYLOAD_HEADER.unpack_from(buf, offset)
+    offset += _PAYLOAD_HEADER.size
+    layout = bytes(buf[offset:offset + layout_len])
+    slots = _layouts.get(layout)
+    if slots is None:
+        if len(_layouts) >= _LAYOUT_CACHE_SIZE:
+            _layouts.clear()
+        slots = _layouts[layout] = _parse_layout(layout)
+    offset += layout_len
+    sample = []
+    for dtype, count, shape, data_offset in slots:
+        arr = np.frombuffer(
+            buf, dtype=dtype, count=count, offset=offset + data_offset)
+        if shape is not None:
+            # a scalar slot is decoded as a numpy scalar
+            arr = arr.reshape(shape) if shape else arr[0]
+        sample.append(arr)
+    if flags & _FLAG_SINGLE_SLOT:
+        return sample[0]
+    return tuple(sample)
+
+
+class RecordWriter(object):
+    """
+    Write samples into a record file, which can be read by
+    :code:`RecordReader`. Each sample is a tuple of slots (or a single
+    slot), each slot is converted into a numpy array.
+
+    :param path: the path of the record file.
+    :param compress: whether to compress the records with zlib.
+    """
+
+    def __init__(self, path, compress=False):
+        self.path = path
+        self.compress = compress
+        self.offsets = []
+        self.f = open(path, 'wb')
+        self.f.write(_RECORD_MAGIC)
+        self.pos = len(_RECORD_MAGIC)
+
+    def write(self, sample):
+        payload = _encode_payload(sample)
+        flags = 0
+        if self.compress:
+            payload = zlib.compress(payload)
+            flags |= _FLAG_COMPRESSED
+        crc = zlib.crc32(payload) & 0xffffffff
+        self.offsets.append(self.pos)
+        self.f.write(_RECORD_HEADER.pack(len(payload), crc, flags))
+        padding = _align8(len(payload)) - len(payload)
+        self.f.write(payload + b'\0' * padding)
+        self.pos += _RECORD_HEADER.size + len(payload) + padding
+
+    def close(self):
+        if self.f is None:
+            return
+        index_offset = self.pos
+        self.f.write(_RECORD_COUNT.pack(len(self.offsets)))
+        self.f.write(np.array(self.offsets, dtype='<u8').tobytes())
+        self.f.write(_RECORD_FOOTER.pack(index_offset, _RECORD_MAGIC))
+        self.f.close()
+        self.f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RecordReader(object):
+    """
+    Read a record file written by :code:`RecordWriter`. The records can be
+    iterated or randomly accessed by index. The file is memory mapped, and
+    the slots of the uncompressed records are returned as read-only views of
+    it without copying.
+
+    :param path: the path of the record file.
+    :param verify: whether to check the crc32 of each record read. The
+                check reads the whole record, set it to False to skip it
+                for the trusted files and keep the reads zero-copy.
+    """
+
+    def __init__(self, path, verify=True):
+        self.path = path
+        self.verify = verify
+        with open(path, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self.buf)
+        if size < len(_RECORD_MAGIC) + _RECORD_FOOTER.size or \
+                self.buf[:len(_RECORD_MAGIC)] != _RECORD_MAGIC:
+            raise ValueError("%s is not a record file" % path)
+        index_offset, magic = _RECORD_FOOTER.unpack_from(
+            self.buf, size - _RECORD_FOOTER.size)
+        if magic != _RECORD_MAGIC:
+            raise ValueError("The record file %s is truncated" % path)
+        count, = _RECORD_COUNT.unpack_from(self.buf, index_offset)
+        self.offsets = np.frombuffer(
+            self.buf,
+            dtype='<u8',
+            count=count,
+            offset=index_offset + _RECORD_COUNT.size)
+        self.view = memoryview(self.buf)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, idx):
+        return self._read(idx, int(self.offsets[idx]))
+
+    def __iter__(self):
+        for idx, offset in enumerate(self.offsets.tolist()):
+            yield self._read(idx, offset)
+
+    def _read(self, idx, offset):
+        length, crc, flags = _RECORD_HEADER.unpack_from(self.buf, offset)
+        start = offset + _RECORD_HEADER.size
+        payload = self.view[start:start + length]
+        if self.verify and zlib.crc32(payload) & 0xffffffff != crc:
+            raise ValueError("The record %d of %s is corrupted" %
+                             (idx, self.path))
+        if flags & _FLAG_COMPRESSED:
+            return _decode_payload(zlib.decompress(payload), 0)
+        return _decode_payload(self.buf, start)
+
+
+def split_records(reader, line_count, suffix="%05d.rec", compress=False):
+    """
+    Like :code:`split`, but write the samples into record files, which are
+    much faster to read than pickle files.
+
+    :param reader: is a reader creator
+    :param line_count: line count for each file
+    :param suffix: the suffix for the output files, should contain "%d"
+                means the id for each file. Default is "%05d.rec"
+    :param compress: whether to compress the records with zlib.
+    """
+    writer = None
+    indx_f = 0
+    for i, d in enumerate(reader()):
+        if i % line_count == 0:
+            if writer is not None:
+                writer.close()
+            writer = RecordWriter(suffix % indx_f, compress=compress)
+            indx_f += 1
+        writer.write(d)
+    if writer is not None:
+        writer.close()
+
+
+def cluster_records_reader(files_pattern,
+                           trainer_count,
+                           trainer_id,
+                           shard_records=False,
+                           verify=True):
+    """
+    Create a reader that yield element from the given record files, like
+    :code:`cluster_files_reader`.
+
+    :param files_pattern: the files which generating by split_records(...)
+    :param trainer_count: total trainer count
+    :param trainer_id: the trainer rank id
+    :param shard_records: if False, each trainer reads the files whose index
+                modulo trainer_count is trainer_id. If True, each trainer
+                reads such records of all the files instead, which balances
+                the trainers when there are few files.
+    :param verify: whether to check the crc32 of each record read.
+    """
+
+    def reader():
+        file_list = glob.glob(files_pattern)
+        file_list.sort()
+        if shard_records:
+            count = 0
+            for fn in file_list:
+                records = RecordReader(fn, verify=verify)
+                start = (trainer_id - count) % trainer_count
+                for idx in six.moves.range(start, len(records), trainer_count):
+                    yield records[idx]
+                count += len(records)
+        else:
+            for idx, fn in enumerate(file_list):
+                if idx % trainer_count == trainer_id:
+                    for record in RecordReader(fn, verify=verify):
+                        yield record
+
+    return reader
+
+
+def convert_pickle_shards(files_pattern, compress=False, loader=pickle.load):
+    """
+    Convert the pickle files generated by :code:`split` into record files.
+    Each file is converted into a file of the same name with the extension
+    replaced by ".rec".
+
+    :param files_pattern: the files which generating by split(...)
+    :param compress: whether to compress the records with zlib.
+    :param loader: is a callable function that load object from file, this
+                function will be called as loader(f) and f is a file object.
+                Default is cPickle.load
+    :return: the list of the converted record files.
+    """
+    converted = []
+    for fn in sorted(glob.glob(files_pattern)):
+        record_fn = os.path.splitext(fn)[0] + '.rec'
+        with open(fn, 'rb') as f:
+            lines = loader(f)
+        with RecordWriter(record_fn, compress=compress) as writer:
+            for line in lines:
+                writer.write(line)
+        converted.append(record_fn)
+    return converted
@@ -0,0 +1,93 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import paddle.dataset.common as common
+
+# Compare the samples/sec of reading the pickle shards of split and the
+# record shards of split_records on image-like samples.
+
+SAMPLE_NUM = 5000
+LINE_COUNT = 1000
+
+
+def image_reader(shape):
+    image = np.random.randint(0, 255, size=shape).astype('uint8')
+
+    def reader():
+        for i in range(SAMPLE_NUM):
+            # distinct arrays, so that pickle can not memoize them
+            yield image + np.uint8(i % 255), i
+
+    return reader
+
+
+class BenchmarkRecord(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def read(self, reader):
+        start = time.time()
+        count = 0
+        for image, label in reader():
+            count += 1
+        self.assertEqual(count, SAMPLE_NUM)
+        return count / (time.time() - start)
+
+    def load(self, f):
+        return common.pickle.load(f)
+
+    def run_benchmark(self, shape):
+        reader = image_reader(shape)
+        common.split(reader, LINE_COUNT, suffix='%05d.pickle')
+        common.split_records(reader, LINE_COUNT, suffix='%05d.rec')
+        common.split_records(reader, LINE_COUNT, suffix='%05d.zrec',
+                             compress=True)
+        pickle_speed = self.read(
+            common.cluster_files_reader(
+                '*.pickle', 1, 0, loader=self.load))
+        record_speed = self.read(common.cluster_records_reader('*.rec', 1, 0))
+        unverified_speed = self.read(
+            common.cluster_records_reader(
+                '*.rec', 1, 0, verify=False))
+        zrecord_speed = self.read(
+            common.cluster_records_reader('*.zrec', 1, 0))
+        print("image %s: pickle %.1f samples/sec, record %.1f samples/sec "
+              "(%.2fx), unverified record %.1f samples/sec (%.2fx), "
+              "compressed record %.1f samples/sec (%.2fx)" %
+              (shape, pickle_speed, record_speed, record_speed / pickle_speed,
+               unverified_speed, unverified_speed / pickle_speed,
+               zrecord_speed, zrecord_speed / pickle_speed))
+
+    def test_small_image(self):
+        self.run_benchmark((3, 32, 32))
+
+    def test_large_image(self):
+        self.run_benchmark((3, 224, 224))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import six.moves.cPickle as pickle
+
+import paddle.dataset.common as common
+
+
+class TestDownload(unittest.TestCase):
+    def setUp(self):
+        self.data_home = tempfile.mkdtemp()
+        self.mirror = tempfile.mkdtemp()
+        self.origin_data_home = common.DATA_HOME
+        common.DATA_HOME = self.data_home
+        self.content = os.urandom(300000)
+        self.md5 = hashlib.md5(self.content).hexdigest()
+        self.path = os.path.join(self.mirror, 'data.bin')
+        with open(self.path, 'wb') as f:
+            f.write(self.content)
+        self.url = 'file://' + self.path
+        self.origin_md5file = common.md5file
+        self.md5_calls = 0
+
+        def counted_md5file(fname):
+            self.md5_calls += 1
+            return self.origin_md5file(fname)
+
+        common.md5file = counted_md5file
+
+    def tearDown(self):
+        common.md5file = self.origin_md5file
+        common.DATA_HOME = self.origin_data_home
+        shutil.rmtree(self.data_home)
+        shutil.rmtree(self.mirror)
+
+    def read(self, filename):
+        with open(filename, 'rb') as f:
+            return f.read()
+
+    def test_download_and_cache(self):
+        filename = common.download(self.url, 'test', self.md5)
+        self.assertEqual(self.read(filename), self.content)
+        self.assertTrue(os.path.exists(filename + '.md5.json'))
+        self.assertFalse(os.path.exists(filename + '.part'))
+
+        # the checksum in the manifest is trusted for an unchanged file
+        self.md5_calls = 0
+        self.assertEqual(common.download(self.url, 'test', self.md5), filename)
+        self.assertEqual(self.md5_calls, 0)
+
+        # a changed file is hashed and downloaded again
+        with open(filename, 'wb') as f:
+            f.write(b'broken')
+        self.assertEqual(common.download(self.url, 'test', self.md5), filename)
+        self.assertEqual(self.read(filename), self.content)
+
+    def test_resume(self):
+        dirname = os.path.join(self.data_home, 'test')
+        os.makedirs(dirname)
+        partname = os.path.join(dirname, 'data.bin.part')
+        with open(partname, 'wb') as f:
+            f.write(self.content[:100000])
+        filename = common.download(self.url, 'test', self.md5)
+        self.assertEqual(self.read(filename), self.content)
+
+    def test_corrupted_part(self):
+        dirname = os.path.join(self.data_home, 'test')
+        os.makedirs(dirname)
+        partname = os.path.join(dirname, 'data.bin.part')
+        with open(partname, 'wb') as f:
+            f.write(b'x' * 100000)
+        filename = common.download(self.url, 'test', self.md5)
+        self.assertEqual(self.read(filename), self.content)
+
+    def test_wrong_md5(self):
+        with self.assertRaises(RuntimeError):
+            common.download(self.url, 'test', '0' * 32)
+
+    def test_concurrent_download(self):
+        results = []
+
+        def worker():
+            results.append(common.download(self.url, 'test', self.md5))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(results), 4)
+        self.assertEqual(self.read(results[0]), self.content)
+
+
+class TestRecord(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        self.samples = [(rng.rand(3, 4).astype('float32'),
+                         list(range(i % 5)), i) for i in range(20)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def reader(self):
+        for sample in self.samples:
+            yield sample
+
+    def assertSampleEqual(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for a, e in zip(actual, expected):
+            np.testing.assert_array_equal(a, np.array(e))
+
+    def write(self, compress=False):
+        path = os.path.join(self.dir, 'data.rec')
+        with common.RecordWriter(path, compress=compress) as writer:
+            for sample in self.samples:
+                writer.write(sample)
+        return path
+
+    def test_read_write(self):
+        for compress in [False, True]:
+            records = common.RecordReader(self.write(compress))
+            self.assertEqual(len(records), len(self.samples))
+            for actual, expected in zip(records, self.samples):
+                self.assertSampleEqual(actual, expected)
+            self.assertSampleEqual(records[7], self.samples[7])
+            self.assertSampleEqual(records[-1], self.samples[-1])
+            self.assertEqual(records[5][2].shape, ())
+
+    def test_zero_copy(self):
+        image = common.RecordReader(self.write())[3][0]
+        self.assertFalse(image.flags.owndata)
+        self.assertFalse(image.flags.writeable)
+        self.assertEqual(image.ctypes.data % 8, 0)
+
+    def test_single_slot(self):
+        path = os.path.join(self.dir, 'single.rec')
+        with common.RecordWriter(path) as writer:
+            writer.write(np.arange(5))
+        np.testing.assert_array_equal(
+            common.RecordReader(path)[0], np.arange(5))
+
+    def test_corrupted(self):
+        path = self.write()
+        records = common.RecordReader(path)
+        offset = int(records.offsets[2]) + 20
+        del records
+        with open(path, 'r+b') as f:
+            f.seek(offset)
+            byte = f.read(1)
+            f.seek(offset)
+            f.write(bytes(bytearray([ord(byte) ^ 0xff])))
+        records = common.RecordReader(path)
+        self.assertSampleEqual(records[1], self.samples[1])
+        with self.assertRaises(ValueError):
+            records[2]
+
+    def test_cluster_records_reader(self):
+        cwd = os.getcwd()
+        os.chdir(self.dir)
+        try:
+            common.split_records(self.reader, 6, suffix='part-%05d.rec')
+            for shard_records in [False, True]:
+                read = []
+                for trainer_id in range(3):
+                    reader = common.cluster_records_reader(
+                        'part-*.rec', 3, trainer_id, shard_records)
+                    read.extend(sample[2] for sample in reader())
+                self.assertEqual(sorted(read), list(range(20)))
+        finally:
+            os.chdir(cwd)
+
+    def test_convert_pickle_shards(self):
+        path = os.path.join(self.dir, 'part-00000.pickle')
+        with open(path, 'wb') as f:
+            pickle.dump(self.samples, f)
+        converted = common.convert_pickle_shards(
+            os.path.join(self.dir, '*.pickle'))
+        self.assertEqual(converted, [os.path.join(self.dir, 'part-00000.rec')])
+        for actual, expected in zip(
+                common.RecordReader(converted[0]), self.samples):
+            self.assertSampleEqual(actual, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
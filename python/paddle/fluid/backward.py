@@ -18,6 +18,7 @@ from paddle.fluid import framework as framework
 from . import core
 import collections
 import copy
+import heapq
 import six
 import logging
 from .. import compat as cpt
@@ -327,19 +328,35 @@ def _addup_repetitive_outputs_(op_descs):
     And one op may yield its multiple outputs to the same variable.
     In these cases, the variable should be the accumulation of all the outputs.
     `sum_op`s are added to implement the accumulate.
+
+    The ops are visited in one pass. When a variable is renamed, only the
+    ops which still refer to its original name since its first appearance
+    are renamed, and the `sum_op`s are inserted in one sweep at the end.
     """
     pending_sum_ops = []
     var_rename_count = collections.defaultdict(int)
     renamed_vars = collections.defaultdict(list)
-    renamed_var_start_idx = collections.defaultdict(list)
+    # var_name -> the ops which refer to var_name since its first appearance
+    # and have not been renamed yet
+    unrenamed_ops = dict()
+
+    def _rename_unrenamed_ops(var_name, new_name):
+        for op_desc in unrenamed_ops[var_name]:
+            op_desc._rename_input(var_name, new_name)
+            op_desc._rename_output(var_name, new_name)
+        unrenamed_ops[var_name] = []
+
     for idx, op_desc in enumerate(op_descs):
-        for var_name in op_desc.input_arg_names():
+        input_arg_names = op_desc.input_arg_names()
+        for var_name in input_arg_names:
             if "@GRAD" not in var_name:
                 continue
             if len(renamed_vars[var_name]) > 1:
-                pending_sum_ops.append((_create_op_desc_(
+                sum_op_desc = _create_op_desc_(
                     "sum", {"X": renamed_vars[var_name]}, {"Out": [var_name]},
-                    {"use_mkldnn": False}), idx))
+                    {"use_mkldnn": False})
+                pending_sum_ops.append((sum_op_desc, idx))
+                unrenamed_ops[var_name].append(sum_op_desc)
                 renamed_vars[var_name] = [var_name]
         for param_idx, param_name in enumerate(op_desc.output_names()):
             arg_names = op_desc.output(param_name)
@@ -349,13 +366,13 @@ def _addup_repetitive_outputs_(op_descs):
                 #if "@RENAME@" in var_name:
                 #    continue
                 if var_name == core.empty_var_name(
-                ) or var_name in op_desc.input_arg_names():
+                ) or var_name in input_arg_names:
                     # empty variable or inplace op
                     continue
                 if len(renamed_vars[var_name]) == 0:
                     # it's the first time we get the variable
                     renamed_vars[var_name] = [var_name]
-                    renamed_var_start_idx[var_name] = idx
+                    unrenamed_ops[var_name] = []
                 else:
                     if len(renamed_vars[var_name]) == 1:
                         new_name = var_name + "@RENAME@" + \
@@ -363,13 +380,9 @@ def _addup_repetitive_outputs_(op_descs):
                         var_rename_count[var_name] += 1
                         # rename original var_name
                         renamed_vars[var_name][0] = new_name
-                        # before change: _rename_arg_(op_descs, var_name,
-                        #                             new_name, 0, idx)
-                        # rename arg from idx of the first appearance
-                        # in backward, not always from 0
-                        _rename_arg_(op_descs, var_name, new_name,
-                                     renamed_var_start_idx[var_name], idx)
-                        _rename_arg_(pending_sum_ops, var_name, new_name)
+                        # rename the ops from the first appearance in
+                        # backward, which still refer to var_name
+                        _rename_unrenamed_ops(var_name, new_name)
 
                         for p in op_desc.output_names()[:param_idx]:
                             p_arg_names = op_desc.output(p)
@@ -391,14 +404,29 @@ def _addup_repetitive_outputs_(op_descs):
                     op_desc.set_output(param_name, arg_names)
                     renamed_vars[var_name].append(new_name)
 
+        # record the op if it refers to the variables appeared before
+        for var_name in set(op_desc.input_arg_names() +
+                            op_desc.output_arg_names()):
+            if var_name in unrenamed_ops:
+                unrenamed_ops[var_name].append(op_desc)
+
     for var_name, inputs in six.iteritems(renamed_vars):
         if len(inputs) > 1:
             pending_sum_ops.append(
                 (_create_op_desc_("sum", {"X": inputs}, {"Out": [var_name]},
                                   {"use_mkldnn": False}), len(op_descs)))
     # sum_op descs are sorted according to their insert position
-    for p in reversed(pending_sum_ops):
-        op_descs.insert(p[1], p[0])
+    if pending_sum_ops:
+        result = []
+        sum_idx = 0
+        for idx in range(len(op_descs) + 1):
+            while sum_idx < len(pending_sum_ops) and \
+                    pending_sum_ops[sum_idx][1] == idx:
+                result.append(pending_sum_ops[sum_idx][0])
+                sum_idx += 1
+            if idx < len(op_descs):
+                result.append(op_descs[idx])
+        op_descs[:] = result
 
     return op_descs
 
@@ -1156,6 +1184,52 @@ def _find_no_grad_vars(block, op_path, targets, no_grad_set):
     return set(no_grad_var)
 
 
+def _reachable_ops_(block, names, no_grad_set, forward):
+    """
+    Find the positions of the ops in block reached from the vars in names,
+    following the data flow forward, or backward from the vars to the ops
+    producing them. The names of the reached vars, except the ones in
+    no_grad_set, are added to names.
+
+    An op only reads the vars produced by the ops before it, so the ops are
+    visited in the order of the block like a sweep over the block, but only
+    the ops using the reached vars are visited through the index of var name
+    --> ops of the block, which is kept until the block is modified.
+    """
+    # forward: positions are pushed as they are, the smallest is popped
+    # first; backward: positions are pushed negated, the largest first.
+    sign = 1 if forward else -1
+    heap = []
+
+    def visit(name, position):
+        if forward:
+            ops = block._var_consumers(name)
+        else:
+            ops = block._var_producers(name)
+        for op in ops:
+            index = block._op_position(op)
+            if sign * index > sign * position:
+                heapq.heappush(heap, sign * index)
+
+    start = -1 if forward else len(block.ops)
+    for name in list(names):
+        visit(name, start)
+
+    reached = set()
+    while heap:
+        index = sign * heapq.heappop(heap)
+        if index in reached:
+            continue
+        reached.add(index)
+        op_desc = block.ops[index].desc
+        for name in (op_desc.output_arg_names()
+                     if forward else op_desc.input_arg_names()):
+            if name not in no_grad_set and name not in names:
+                names.add(name)
+                visit(name, index)
+    return reached
+
+
 def _find_op_path_(block, outputs, inputs, no_grad_set):
     """
     no_grad_set will also be changed
@@ -1163,34 +1237,21 @@ def _find_op_path_(block, outputs, inputs, no_grad_set):
     input_names = set([inp.name for inp in inputs])
     output_names = set([out.name for out in outputs])
 
-    relevant_op_flags = [True] * len(block.ops)
-
+    relevant_ops = _reachable_ops_(
+        block, output_names, no_grad_set, forward=False)
     # All the inputs of the block are used if inputs is empty,
     if inputs:
-        for i, op in enumerate(block.ops):
-            if _some_in_set_(op.desc.input_arg_names(), input_names):
-                for name in op.desc.output_arg_names():
-                    if name not in no_grad_set:
-                        input_names.add(name)
-            else:
-                relevant_op_flags[i] = False
+        relevant_ops &= _reachable_ops_(
+            block, input_names, no_grad_set, forward=True)
 
-    for i, op in reversed(list(enumerate(block.ops))):
-        if _some_in_set_(op.desc.output_arg_names(), output_names):
-            for name in op.desc.input_arg_names():
-                if name not in no_grad_set:
-                    output_names.add(name)
-        else:
-            relevant_op_flags[i] = False
-
-    op_path = [
-        block.ops[i] for i in range(len(block.ops)) if relevant_op_flags[i]
-    ]
+    op_path = [block.ops[i] for i in sorted(relevant_ops)]
 
     if inputs:
         for op in op_path:
             for name in op.desc.input_arg_names():
-                if name not in input_names and block.vars[name].stop_gradient:
+                # the vars of the parent blocks are used in the sub-blocks
+                if name not in input_names and \
+                        block._var_recursive(name).stop_gradient:
                     no_grad_set.add(name)
 
     return op_path
@@ -21,6 +21,7 @@ import functools
 from . import layers
 from . import framework
 from . import core
+from .layer_helper import LayerHelper
 
 __all__ = [
     'set_gradient_clip',
@@ -113,6 +114,47 @@ def error_clip_callback(block, context):
             error_clip._append_clip_op(block, grad_n)
 
 
+def _squared_l2_norm(grad):
+    """
+    The sum of squares of a gradient by one op. The SelectedRows gradient is
+    merged by rows, and only its value tensor is reduced.
+    """
+    if grad.type == core.VarDesc.VarType.SELECTED_ROWS:
+        grad = layers.merge_selected_rows(grad)
+        grad = layers.get_tensor_from_selected_rows(grad)
+    helper = LayerHelper("squared_l2_norm", **locals())
+    out = helper.create_variable_for_type_inference(grad.dtype)
+    helper.append_op(
+        type="squared_l2_norm", inputs={"X": grad}, outputs={"Out": out})
+    return out
+
+
+def _scale_in_place(grad, scale):
+    """
+    Multiply a LoDTensor or SelectedRows gradient by the scalar tensor scale,
+    writing the result to the gradient itself.
+    """
+    helper = LayerHelper("elementwise_mul", **locals())
+    helper.append_op(
+        type="elementwise_mul",
+        inputs={"X": grad,
+                "Y": scale},
+        outputs={"Out": grad},
+        attrs={"axis": -1})
+    return grad
+
+
+def _global_norm_clip_scale(squared_norms, clip_var):
+    """
+    The scale clip_norm / max(global_norm, clip_norm) of the gradients, from
+    the sums of squares of all the gradients reduced by one sum op.
+    """
+    global_norm = layers.sqrt(x=layers.sums(input=squared_norms))
+    return layers.elementwise_div(
+        x=clip_var, y=layers.elementwise_max(
+            x=clip_var, y=global_norm))
+
+
 class BaseGradientClipAttr(object):
     def __str__(self):
         raise NotImplementedError()
@@ -299,6 +341,10 @@ class GradientClipByGlobalNorm(BaseGradientClipAttr):
     If :math:`clip\_norm > global\_norm` then the entries in t_list remain as they are,
     otherwise they're all shrunk by the global ratio.
 
+    The sum of squares of every gradient is computed by one op, and the gradients
+    are rescaled in place, so the clipped gradients keep their variables. The
+    SelectedRows gradients are reduced and rescaled without being densified.
+
     Args:
         clip_norm (float): The maximum norm value
         group_name (str, optional): The group name for this clip.
@@ -382,34 +428,22 @@ class GradientClipByGlobalNorm(BaseGradientClipAttr):
                     "All parameters' 'clip_norm' of a same group should be the same"
                 )
 
-        merge_grad = grad
-        if grad.type == core.VarDesc.VarType.SELECTED_ROWS:
-            merge_grad = layers.merge_selected_rows(grad)
-            merge_grad = layers.get_tensor_from_selected_rows(merge_grad)
-
-        square = layers.square(merge_grad)
-        local_norm_var = layers.reduce_sum(input=square)
-        context[self.group_name].append(local_norm_var)
+        context[self.group_name].append(_squared_l2_norm(grad))
 
         self.context = context
 
     def _create_operators(self, param, grad):
         group_scale_name = self.group_name + "_scale"
         if group_scale_name not in self.context:
-            group_norm_var = layers.sums(input=self.context[self.group_name])
-            group_norm_var = layers.sqrt(x=group_norm_var)
-            clip_var = self.context[self.group_name + "_clip"]
-            group_scale_var = layers.elementwise_div(
-                x=clip_var,
-                y=layers.elementwise_max(
-                    x=clip_var, y=group_norm_var))
+            group_scale_var = _global_norm_clip_scale(
+                self.context[self.group_name],
+                self.context[self.group_name + "_clip"])
             assert group_scale_var.shape == (1, )
             self.context[group_scale_name] = group_scale_var
 
-        new_grad = layers.elementwise_mul(
-            x=grad, y=self.context[group_scale_name])
-
-        return param, new_grad
+        # all the squared norms of the group are computed before, so the
+        # gradient can be rescaled in place
+        return param, _scale_in_place(grad, self.context[group_scale_name])
 
 
 @framework.dygraph_not_support
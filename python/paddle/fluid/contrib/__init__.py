@@ -32,6 +32,8 @@ from . import extend_optimizer
 from .extend_optimizer import *
 from . import model_stat
 from .model_stat import *
+from . import cost_model
+from .cost_model import *
 from . import mixed_precision
 from .mixed_precision import *
 from . import layers
@@ -40,6 +42,7 @@ from .layers import *
 __all__ = []
 __all__ += decoder.__all__
 __all__ += memory_usage_calc.__all__
+__all__ += cost_model.__all__
 __all__ += op_frequence.__all__
 __all__ += quantize.__all__
 __all__ += reader.__all__
@@ -0,0 +1,562 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+This module provides a static cost model of the operators, which estimates
+the FLOPs, the bytes read and written, and the parameter bytes of every
+operator of a program without running it, and reports them per operator,
+per block, and along the critical path of the program.
+
+The FLOPs of an operator type are computed by the function registered with
+register_op_cost, the operators without a registered function count 0
+FLOPs, and the ones using variables of unknown shapes are unestimated. The
+bytes are the sizes of the LoDTensor inputs and outputs.
+
+This API is still under active development and may change drastically.
+"""
+
+from __future__ import print_function
+
+import collections
+
+import six
+
+from .. import core
+from ..framework import Program, Parameter
+from .memory_usage_calc import dtype_to_size, _sub_blocks
+
+__all__ = ['OpCost', 'register_op_cost', 'op_cost', 'ProgramCost']
+
+OpCost = collections.namedtuple(
+    'OpCost', ['flops', 'bytes_read', 'bytes_written', 'param_bytes'])
+
+# op type --> function(op, shape) returning the FLOPs of the op
+_op_flops_fns = dict()
+
+
+def register_op_cost(*op_types):
+    """
+    Register the function computing the FLOPs of the operators of op_types.
+    The function is called with the operator and a function shape(name),
+    which returns the shape of the variable name with the batch size in
+    place of the dims of -1, or None if the variable is not found. The FLOPs
+    of an operator are unestimated if shape returns None for it, the other
+    exceptions of the function are raised.
+
+    Examples:
+
+        >>> import numpy as np
+        >>> from paddle.fluid.contrib.cost_model import register_op_cost
+        >>> @register_op_cost('my_op')
+        >>> def my_op_flops(op, shape):
+        >>>     return 3 * int(np.prod(shape(op.output('Out')[0])))
+    """
+
+    def __impl__(fn):
+        for op_type in op_types:
+            _op_flops_fns[op_type] = fn
+        return fn
+
+    return __impl__
+
+
+def _numel(shape):
+    if shape is None:
+        return 0
+    numel = 1
+    for dim in shape:
+        numel *= dim
+    return numel
+
+
+def _args(op, slot, is_output=False):
+    # the dispensable slots could be missing in the op
+    if is_output:
+        return op.output(slot) if slot in op.output_names else []
+    return op.input(slot) if slot in op.input_names else []
+
+
+def _slot_shape(op, shape, slot, is_output=False):
+    names = _args(op, slot, is_output)
+    return shape(names[0]) if names else None
+
+
+def _input_numel(op, shape, slot='X'):
+    return _numel(_slot_shape(op, shape, slot))
+
+
+def _output_numel(op, shape, slot='Out'):
+    return _numel(_slot_shape(op, shape, slot, is_output=True))
+
+
+def _elementwise_flops(factor, slot='Out'):
+    def __impl__(op, shape):
+        return factor * _output_numel(op, shape, slot)
+
+    return __impl__
+
+
+def _zero_flops(op, shape):
+    return 0
+
+
+# layers/nn.py
+
+register_op_cost('elementwise_add', 'elementwise_sub', 'elementwise_mul',
+                 'elementwise_div', 'elementwise_max', 'elementwise_min',
+                 'elementwise_pow', 'elementwise_mod', 'elementwise_floordiv',
+                 'scale', 'relu', 'relu6', 'leaky_relu', 'brelu', 'abs',
+                 'ceil', 'floor', 'round', 'square', 'reciprocal', 'sign',
+                 'clip', 'dropout', 'hard_shrink', 'softshrink',
+                 'thresholded_relu', 'cast', 'increment',
+                 'clip_by_norm')(_elementwise_flops(1))
+
+# the transcendental functions take several FLOPs
+register_op_cost('sigmoid', 'logsigmoid', 'tanh', 'tanh_shrink', 'exp',
+                 'log', 'sqrt', 'rsqrt', 'sin', 'cos', 'atan', 'acos', 'asin',
+                 'softplus', 'softsign', 'elu', 'gelu', 'selu', 'swish',
+                 'hard_sigmoid', 'hard_swish', 'stanh', 'pow',
+                 'prelu')(_elementwise_flops(4))
+
+register_op_cost('softmax')(_elementwise_flops(5))
+register_op_cost('layer_norm')(_elementwise_flops(8, 'Y'))
+register_op_cost('group_norm', 'instance_norm', 'data_norm')(
+    _elementwise_flops(8, 'Y'))
+register_op_cost('lrn')(_elementwise_flops(10))
+
+register_op_cost('lookup_table', 'concat', 'split', 'reshape', 'reshape2',
+                 'transpose', 'transpose2', 'squeeze', 'squeeze2', 'unsqueeze',
+                 'unsqueeze2', 'flatten', 'flatten2', 'gather', 'scatter',
+                 'slice', 'stack', 'unstack', 'expand', 'pad', 'pad2d',
+                 'crop', 'one_hot', 'shape', 'fill_constant', 'assign',
+                 'fill_zeros_like', 'feed', 'fetch',
+                 'uniform_random', 'gaussian_random')(_zero_flops)
+
+
+@register_op_cost('conv2d', 'depthwise_conv2d', 'conv3d')
+def _conv_flops(op, shape):
+    # a multiply and an add for every element of the filter of every output
+    filter_shape = _slot_shape(op, shape, 'Filter')
+    flops = 2 * _output_numel(op, shape, 'Output') * \
+        _numel(filter_shape) // filter_shape[0]
+    if _args(op, 'Bias'):
+        flops += _output_numel(op, shape, 'Output')
+    return flops
+
+
+@register_op_cost('conv2d_transpose', 'depthwise_conv2d_transpose',
+                  'conv3d_transpose')
+def _conv_transpose_flops(op, shape):
+    # every input element is scattered through the filter of its channel
+    filter_shape = _slot_shape(op, shape, 'Filter')
+    return 2 * _input_numel(op, shape, 'Input') * \
+        _numel(filter_shape) // filter_shape[0]
+
+
+@register_op_cost('pool2d', 'pool3d')
+def _pool_flops(op, shape):
+    if op.attr('global_pooling'):
+        return _input_numel(op, shape)
+    return _output_numel(op, shape) * _numel(op.attr('ksize'))
+
+
+@register_op_cost('mul')
+def _mul_flops(op, shape):
+    y_shape = _slot_shape(op, shape, 'Y')
+    y_num_col_dims = op.attr('y_num_col_dims')
+    return 2 * _input_numel(op, shape) * _numel(y_shape[y_num_col_dims:])
+
+
+@register_op_cost('matmul')
+def _matmul_flops(op, shape):
+    x_shape = _slot_shape(op, shape, 'X')
+    k = x_shape[-2] if op.attr('transpose_X') and len(x_shape) > 1 \
+        else x_shape[-1]
+    return 2 * _output_numel(op, shape) * k
+
+
+@register_op_cost('batch_norm')
+def _batch_norm_flops(op, shape):
+    # scale and shift only in inference, computing the statistics as well
+    # in training
+    return (2 if op.attr('is_test') else 8) * _output_numel(op, shape, 'Y')
+
+
+@register_op_cost('sum')
+def _sum_flops(op, shape):
+    return _output_numel(op, shape) * max(len(_args(op, 'X')) - 1, 0)
+
+
+@register_op_cost('mean', 'reduce_sum', 'reduce_mean', 'reduce_max',
+                  'reduce_min', 'reduce_prod', 'sequence_pool', 'top_k',
+                  'argmax', 'argmin', 'accuracy', 'log_loss', 'smooth_l1_loss',
+                  'huber_loss')
+def _reduce_flops(op, shape):
+    return _input_numel(op, shape, op.input_names[0])
+
+
+@register_op_cost('cross_entropy', 'cross_entropy2')
+def _cross_entropy_flops(op, shape):
+    # log of the probability of the label, or of all the soft labels
+    if op.has_attr('soft_label') and op.attr('soft_label'):
+        return 2 * _input_numel(op, shape)
+    return 2 * _input_numel(op, shape, 'Label')
+
+
+@register_op_cost('softmax_with_cross_entropy')
+def _softmax_with_cross_entropy_flops(op, shape):
+    return 6 * _input_numel(op, shape, 'Logits')
+
+
+@register_op_cost('sequence_conv')
+def _sequence_conv_flops(op, shape):
+    # Filter is [context_length * input size, output size]
+    return 2 * _input_numel(op, shape) // _slot_shape(op, shape, 'X')[-1] * \
+        _input_numel(op, shape, 'Filter')
+
+
+@register_op_cost('lstm', 'lstmp', 'gru')
+def _rnn_flops(op, shape):
+    # Input is the projected input of the gates [T, gates * hidden], and the
+    # hidden state is multiplied by Weight [hidden, gates * hidden] per step
+    steps = _slot_shape(op, shape, 'Input')[0]
+    weight_numel = _input_numel(op, shape, 'Weight')
+    gates_numel = _slot_shape(op, shape, 'Input')[-1]
+    return steps * (2 * weight_numel + 4 * gates_numel)
+
+
+# layers/detection.py
+
+register_op_cost('prior_box', 'density_prior_box',
+                 'anchor_generator')(_elementwise_flops(2, 'Boxes'))
+register_op_cost('box_coder')(_elementwise_flops(5, 'OutputBox'))
+register_op_cost('box_clip')(_elementwise_flops(2, 'Output'))
+register_op_cost('iou_similarity')(_elementwise_flops(10))
+register_op_cost('polygon_box_transform')(_elementwise_flops(2, 'Output'))
+register_op_cost('target_assign')(_zero_flops)
+
+
+@register_op_cost('bipartite_match')
+def _bipartite_match_flops(op, shape):
+    # a pass over the distance matrix for every matched column
+    dist_shape = _slot_shape(op, shape, 'DistMat')
+    return _numel(dist_shape) * min(dist_shape)
+
+
+def _nms_flops(boxes, top_k):
+    # the IoU of every pair of the top_k boxes
+    top_k = boxes if top_k < 0 else min(boxes, top_k)
+    return 10 * top_k * top_k
+
+
+@register_op_cost('multiclass_nms', 'multiclass_nms2')
+def _multiclass_nms_flops(op, shape):
+    # Scores is [N, C, M] or [M, C] in LoD
+    scores_shape = _slot_shape(op, shape, 'Scores')
+    boxes = scores_shape[-1] if len(scores_shape) == 3 else scores_shape[0]
+    return _numel(scores_shape) // boxes * \
+        _nms_flops(boxes, op.attr('nms_top_k'))
+
+
+@register_op_cost('generate_proposals')
+def _generate_proposals_flops(op, shape):
+    # decode the anchors, then NMS of the top pre_nms_topN of every image
+    scores_shape = _slot_shape(op, shape, 'Scores')
+    boxes = _numel(scores_shape[1:])
+    return 5 * _input_numel(op, shape, 'BboxDeltas') + scores_shape[0] * \
+        _nms_flops(boxes, op.attr('pre_nms_topN'))
+
+
+@register_op_cost('roi_align')
+def _roi_align_flops(op, shape):
+    # a bilinear interpolation of 4 points for every sample of every bin
+    sampling_ratio = op.attr('sampling_ratio')
+    samples = sampling_ratio * sampling_ratio if sampling_ratio > 0 else 4
+    return _output_numel(op, shape) * samples * 4
+
+
+@register_op_cost('roi_pool', 'roi_perspective_transform', 'psroi_pool')
+def _roi_pool_flops(op, shape):
+    return 4 * _output_numel(op, shape)
+
+
+@register_op_cost('yolo_box')
+def _yolo_box_flops(op, shape):
+    return 4 * _input_numel(op, shape)
+
+
+@register_op_cost('yolov3_loss', 'sigmoid_focal_loss',
+                  'sigmoid_cross_entropy_with_logits')
+def _detection_loss_flops(op, shape):
+    return 10 * _input_numel(op, shape)
+
+
+def _var_bytes(var, batch_size):
+    if var is None or var.type != core.VarDesc.VarType.LOD_TENSOR or \
+            var.dtype not in dtype_to_size:
+        return 0
+    return _numel([batch_size if dim < 0 else dim
+                   for dim in var.shape]) * dtype_to_size[var.dtype]
+
+
+def op_cost(op, batch_size=1):
+    """
+    Estimate the cost of an operator.
+
+    Args:
+        op(Operator): The operator.
+        batch_size(int): The batch size in place of the dims of -1.
+
+    Returns:
+        OpCost: the FLOPs, the bytes of the inputs read, the bytes of the
+        outputs written, and the bytes of the parameters in the inputs. The
+        FLOPs are None if the shapes of the variables of the op are unknown.
+    """
+    block = op.block
+    unknown_shapes = []
+
+    def shape(name):
+        var = block._find_var_recursive(name)
+        if var is None:
+            unknown_shapes.append(name)
+            return None
+        return [batch_size if dim < 0 else dim for dim in var.shape]
+
+    fn = _op_flops_fns.get(op.type)
+    flops = 0
+    if fn is not None:
+        try:
+            flops = int(fn(op, shape))
+        except Exception:
+            # the functions fail on the unknown shapes
+            if not unknown_shapes:
+                raise
+        if unknown_shapes:
+            flops = None
+
+    bytes_read = 0
+    param_bytes = 0
+    for name in set(op.input_arg_names):
+        var = block._find_var_recursive(name)
+        size = _var_bytes(var, batch_size)
+        bytes_read += size
+        if isinstance(var, Parameter):
+            param_bytes += size
+    bytes_written = sum(
+        _var_bytes(block._find_var_recursive(name), batch_size)
+        for name in set(op.output_arg_names))
+    return OpCost(flops, bytes_read, bytes_written, param_bytes)
+
+
+_OpCostRecord = collections.namedtuple(
+    '_OpCostRecord', ['block_idx', 'op_idx', 'type', 'cost', 'time'])
+
+
+class ProgramCost(object):
+    """
+    The costs of the operators of a program, estimated by op_cost.
+
+    The time of an operator is estimated by the roofline model, i.e. the
+    maximum of its FLOPs divided by peak_flops and its bytes divided by
+    bandwidth. The critical path is the longest chain of operators of the
+    global block depending on the outputs of the former ones, an operator
+    with sub-blocks takes the time of all the operators in them, which is
+    the time of one iteration for While. The operators whose FLOPs are
+    unestimated, see op_cost, count 0 FLOPs in the totals and are listed in
+    unestimated_records and the report.
+
+    Args:
+        program(Program): The program.
+        batch_size(int): The batch size in place of the dims of -1.
+        peak_flops(float): The FLOPs per second of the device.
+        bandwidth(float): The bytes per second of the device memory.
+            The defaults are about the ones of a recent GPU, only the ratio
+            of the times matters when comparing the models.
+
+    Examples:
+
+        >>> import paddle.fluid as fluid
+        >>> cost = fluid.contrib.ProgramCost(fluid.default_main_program(),
+        >>>                                  batch_size=32)
+        >>> print(cost.report(top_n=10))
+        >>> totals = cost.totals()
+        >>> print(totals['flops'], totals['arithmetic_intensity'])
+    """
+
+    def __init__(self, program, batch_size=1, peak_flops=1e13,
+                 bandwidth=5e11):
+        if not isinstance(program, Program):
+            raise TypeError("ProgramCost requires Program as its Parameter."
+                            "But you passed in %s" % (type(program)))
+        if batch_size <= 0:
+            raise ValueError("The batch size need to be positive.")
+        self.program = program
+        self.batch_size = batch_size
+        self.peak_flops = float(peak_flops)
+        self.bandwidth = float(bandwidth)
+        self.records = []
+        # block idx --> records of the ops in the block
+        self._block_records = dict()
+        # block idx --> OpCost of the ops in the block
+        self.block_costs = dict()
+        # block idx --> time of the ops in the block, including sub-blocks
+        self._block_times = dict()
+        for block in program.blocks:
+            records = []
+            for op_idx, op in enumerate(block.ops):
+                cost = op_cost(op, batch_size)
+                records.append(
+                    _OpCostRecord(block.idx, op_idx, op.type, cost,
+                                  self._time(cost)))
+            self.records.extend(records)
+            self._block_records[block.idx] = records
+            self.block_costs[block.idx] = OpCost(*[
+                sum(value or 0 for value in field)
+                for field in zip(*[r.cost for r in records])
+            ]) if records else OpCost(0, 0, 0, 0)
+        self.unestimated_records = [
+            r for r in self.records if r.cost.flops is None
+        ]
+        self.critical_path, self.critical_path_time = self._critical_path(
+            program.global_block())
+
+    def _time(self, cost):
+        return max((cost.flops or 0) / self.peak_flops,
+                   (cost.bytes_read + cost.bytes_written) / self.bandwidth)
+
+    def _op_time(self, op, record):
+        time = record.time
+        for sub_block in _sub_blocks(op):
+            time += self._block_time(sub_block)
+        return time
+
+    def _block_time(self, block):
+        if block.idx not in self._block_times:
+            records = self._block_records[block.idx]
+            self._block_times[block.idx] = sum(
+                self._op_time(op, record)
+                for op, record in zip(block.ops, records))
+        return self._block_times[block.idx]
+
+    def _critical_path(self, block):
+        """
+        Returns:
+            tuple: (the records of the ops on the critical path, its time).
+        """
+        records = self._block_records[block.idx]
+        # var name --> index of the last op writing it
+        last_writer = dict()
+        finish = []
+        prev = []
+        for i, (op, record) in enumerate(zip(block.ops, records)):
+            start, prev_op = 0.0, None
+            for name in op.input_arg_names:
+                j = last_writer.get(name)
+                if j is not None and finish[j] > start:
+                    start, prev_op = finish[j], j
+            finish.append(start + self._op_time(op, record))
+            prev.append(prev_op)
+            for name in op.output_arg_names:
+                last_writer[name] = i
+        if not finish:
+            return [], 0.0
+        i = max(range(len(finish)), key=lambda i: finish[i])
+        path_time = finish[i]
+        path = []
+        while i is not None:
+            path.append(records[i])
+            i = prev[i]
+        return list(reversed(path)), path_time
+
+    def totals(self):
+        """
+        Get the total costs of the program, for the checks of regressions.
+
+        Returns:
+            dict: flops, bytes_read, bytes_written, param_bytes,
+            arithmetic_intensity (FLOPs per byte read or written),
+            serial_time (the time of all the ops of the global block and
+            their sub-blocks), critical_path_time, parallelism
+            (serial_time / critical_path_time), and unestimated_ops (the
+            number of the ops whose FLOPs are unestimated).
+        """
+        totals = dict(
+            (field, sum(getattr(cost, field)
+                        for cost in six.itervalues(self.block_costs)))
+            for field in OpCost._fields)
+        traffic = totals['bytes_read'] + totals['bytes_written']
+        totals['arithmetic_intensity'] = \
+            float(totals['flops']) / traffic if traffic else 0.0
+        totals['serial_time'] = self._block_time(self.program.global_block())
+        totals['critical_path_time'] = self.critical_path_time
+        totals['parallelism'] = totals['serial_time'] / \
+            self.critical_path_time if self.critical_path_time else 1.0
+        totals['unestimated_ops'] = len(self.unestimated_records)
+        return totals
+
+    def report(self, top_n=None):
+        """
+        Format the costs per op, sorted by the estimated time, per block,
+        and of the critical path.
+
+        Args:
+            top_n(int|None): The number of the ops reported, all if None.
+
+        Returns:
+            str: the report.
+        """
+        lines = []
+        row = "%6s %6s %-28s %14s %12s %12s %12s %10s"
+        lines.append(row % ("block", "op", "type", "FLOPs", "read", "written",
+                            "params", "time(us)"))
+
+        def format_record(r):
+            flops = "-" if r.cost.flops is None else r.cost.flops
+            return row % (r.block_idx, r.op_idx, r.type, flops,
+                          r.cost.bytes_read, r.cost.bytes_written,
+                          r.cost.param_bytes, "%.2f" % (r.time * 1e6))
+
+        records = sorted(self.records, key=lambda r: r.time, reverse=True)
+        for r in records[:top_n]:
+            lines.append(format_record(r))
+
+        lines.append("")
+        lines.append("%6s %14s %12s %12s %12s" %
+                     ("block", "FLOPs", "read", "written", "params"))
+        for idx in sorted(self.block_costs):
+            lines.append("%6s %14s %12s %12s %12s" % (
+                (idx, ) + tuple(self.block_costs[idx])))
+
+        totals = self.totals()
+        lines.append("")
+        lines.append("Total FLOPs: %d(%.2fG), memory traffic: %d(%.2fMB), "
+                     "params: %d(%.2fMB), arithmetic intensity: %.2f" %
+                     (totals['flops'], totals['flops'] / 1e9,
+                      totals['bytes_read'] + totals['bytes_written'],
+                      (totals['bytes_read'] + totals['bytes_written']) /
+                      float(1 << 20), totals['param_bytes'],
+                      totals['param_bytes'] / float(1 << 20),
+                      totals['arithmetic_intensity']))
+        lines.append("Critical path: %d ops, %.2fus of %.2fus serial "
+                     "(parallelism %.2f): %s" %
+                     (len(self.critical_path),
+                      totals['critical_path_time'] * 1e6,
+                      totals['serial_time'] * 1e6, totals['parallelism'],
+                      " -> ".join(r.type for r in self.critical_path)))
+        if self.unestimated_records:
+            lines.append("Unestimated FLOPs of %d ops of unknown shapes: %s" %
+                         (len(self.unestimated_records), ", ".join(
+                             "%s(block %d, op %d)" % (r.type, r.block_idx,
+                                                      r.op_idx)
+                             for r in self.unestimated_records)))
+        return "\n".join(lines)
@@ -12,11 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """
-This module privides a memory usage calculate function for user.
+This module provides a memory usage calculate function for user.
 The purpose of this API is to allow users to estimate memory usage of
 a program under a special batch size, then user can set appropriate
 batch size to fully utilize a GPU.
 
+It also provides MemoryPlan, which computes the live intervals of the
+variables from the order of the operators, to report the peak memory usage
+of a program, the largest batch size that fits in a memory budget, and to
+let the temporary variables not alive at the same time share buffers.
+
 This API is still under active development and may change drastically.
 """
 
@@ -25,9 +30,9 @@ from __future__ import print_function
 import six
 
 from .. import core
-from ..framework import Program, Variable
+from ..framework import Program, Variable, GRAD_VAR_SUFFIX
 
-__all__ = ['memory_usage']
+__all__ = ['memory_usage', 'MemoryPlan']
 
 dtype_to_size = {
     core.VarDesc.VarType.FP16: 2,
@@ -38,11 +43,40 @@ dtype_to_size = {
     core.VarDesc.VarType.INT64: 8,
     core.VarDesc.VarType.BOOL: 1,
     core.VarDesc.VarType.UINT8: 1,
+    core.VarDesc.VarType.INT8: 1,
 }
 
 DEBUG = False
 
 
+def _data_count(var, seq_len=None):
+    """
+    Get the number of the elements of var, which is
+    (data_count + batch_data_count * batch_size). The negative dims after
+    the first one are taken as seq_len.
+
+    Returns:
+        tuple: (data_count, batch_data_count), one of them is 0.
+    """
+    data_count = 1
+    neg_dim_count = 0
+    for x in var.shape:
+        if x < 0:
+            if neg_dim_count >= 1:
+                if seq_len is None:
+                    raise ValueError("Var %s has more than one negtive dim." %
+                                     (var.name))
+                data_count *= seq_len
+            else:
+                data_count *= -x
+            neg_dim_count += 1
+        else:
+            data_count *= x
+    if neg_dim_count:
+        return 0, data_count
+    return data_count, 0
+
+
 def memory_usage(program, batch_size):
     """
     Get the estimate memory usage of program with input batch size.
@@ -86,18 +120,9 @@ def memory_usage(program, batch_size):
             if var.desc.type() != core.VarDesc.VarType.LOD_TENSOR:
                 continue
 
-            data_count = 1
-            neg_dim_count = 0
-            for x in var.shape:
-                if x < 0:
-                    if neg_dim_count >= 1:
-                        raise ValueError("Var %s has more than one negtive dim."
-                                         % (var_name))
-                    neg_dim_count += 1
-                    data_count *= batch_size * (-x)
-                else:
-                    data_count *= x
-            var_memory = data_count * dtype_to_size[var.dtype]
+            data_count, batch_data_count = _data_count(var)
+            var_memory = (data_count + batch_data_count * batch_size
+                          ) * dtype_to_size[var.dtype]
             if DEBUG:
                 print("%s memory usage: %d" % (var.name, var_memory))
             total_memory += var_memory
@@ -118,3 +143,286 @@ def memory_usage(program, batch_size):
     max_total_memory = total_memory * 1.1
 
     return min_total_memory, max_total_memory, unit_str
+
+
+def _sub_blocks(op):
+    blocks = []
+    for name in op.attr_names:
+        attr_type = op.desc.attr_type(name)
+        if attr_type == core.AttrType.BLOCK:
+            blocks.append(op._block_attr(name))
+        elif attr_type == core.AttrType.BLOCKS:
+            blocks.extend(op._blocks_attr(name))
+    return blocks
+
+
+class MemoryPlan(object):
+    """
+    The memory plan of a program, built from the live interval of every
+    LoDTensor variable, i.e. the positions of the first and the last
+    operators using it in the global block. The variables used in the
+    sub-blocks of an operator, like the ones of While and IfElse, are alive
+    at the position of that operator. The data variables are alive from the
+    beginning, and the variables in skip_opt_set, e.g. the fetched ones, are
+    alive until the end. The gradients of the parameters and the variables
+    in the op_role_var of the operators, which are read by the optimizers
+    and the distributed transpilers by their names, never share buffers.
+
+    The memory sizes are in bytes, the first dim of -1 of a variable is
+    taken as the batch size, and the other dims of -1, e.g. the sequence
+    length of the inputs of shape [None, None, d] and the variables computed
+    from them, are taken as seq_len. If seq_len is None, the variables with
+    more than one dim of -1 are unsized, their memory is not counted and
+    their names are in unsized_vars.
+
+    Args:
+        program(Program): The program to plan.
+        skip_opt_set(set[str]): The names of the variables used after the
+            program runs, which are never shared with other variables.
+        seq_len(int): The size of the dims of -1 other than the batch size.
+            Default None.
+
+    Examples:
+
+        >>> import paddle.fluid as fluid
+        >>> plan = fluid.contrib.MemoryPlan(fluid.default_main_program())
+        >>> peak, op_index = plan.peak_memory(batch_size=32)
+        >>> batch_size = plan.max_batch_size(memory_limit=2 << 30)
+        >>> # share the buffers of the temporary variables
+        >>> plan.apply()
+    """
+
+    def __init__(self, program, skip_opt_set=None, seq_len=None):
+        if not isinstance(program, Program):
+            raise TypeError("MemoryPlan requires Program as its Parameter."
+                            "But you passed in %s" % (type(program)))
+        if seq_len is not None and seq_len <= 0:
+            raise ValueError("The seq_len need to be positive.")
+        self.program = program
+        self.skip_opt_set = set(skip_opt_set or [])
+        self.seq_len = seq_len
+        self._analyze()
+
+    def _use(self, var, position, in_sub_block):
+        if var is None or var.type != core.VarDesc.VarType.LOD_TENSOR or \
+                var.dtype not in dtype_to_size:
+            return
+        name = var.name
+        if name not in self.var_shapes:
+            try:
+                data_count, batch_data_count = _data_count(var, self.seq_len)
+            except ValueError:
+                data_count, batch_data_count = 0, 0
+                self.unsized_vars.add(name)
+            self.var_shapes[name] = (data_count, batch_data_count, var.dtype)
+            self.var_dims[name] = tuple(var.shape)
+            self.var_lod_levels[name] = var.lod_level
+            if var.persistable:
+                self.persistable_vars.add(name)
+            if var.is_data or var.persistable or \
+                    name.endswith(GRAD_VAR_SUFFIX):
+                self.pinned_vars.add(name)
+        if in_sub_block:
+            self.pinned_vars.add(name)
+        interval = self.intervals.get(name)
+        if interval is None:
+            self.intervals[name] = [position, position]
+        else:
+            interval[0] = min(interval[0], position)
+            interval[1] = max(interval[1], position)
+
+    def _use_block(self, block, position):
+        for op in block.ops:
+            for name in op.input_arg_names + op.output_arg_names:
+                self._use(block._find_var_recursive(name), position, True)
+            for sub_block in _sub_blocks(op):
+                self._use_block(sub_block, position)
+
+    def _analyze(self):
+        block = self.program.global_block()
+        self.op_num = len(block.ops)
+        # var name --> [first op position, last op position]
+        self.intervals = dict()
+        # var name --> (data count, batch data count, dtype)
+        self.var_shapes = dict()
+        self.var_dims = dict()
+        self.var_lod_levels = dict()
+        self.persistable_vars = set()
+        # the vars whose memory is unknown without seq_len
+        self.unsized_vars = set()
+        # the vars can not share buffers with other vars
+        self.pinned_vars = set(self.skip_opt_set)
+        role_var_name = core.op_proto_and_checker_maker.kOpRoleVarAttrName()
+        for position, op in enumerate(block.ops):
+            if op.has_attr(role_var_name):
+                self.pinned_vars.update(op.attr(role_var_name))
+            for name in op.input_arg_names + op.output_arg_names:
+                self._use(block._find_var_recursive(name), position, False)
+            for sub_block in _sub_blocks(op):
+                self._use_block(sub_block, position)
+
+        last = max(self.op_num - 1, 0)
+        for name, interval in six.iteritems(self.intervals):
+            if name in self.persistable_vars:
+                interval[0], interval[1] = 0, last
+            elif name in self.skip_opt_set:
+                interval[1] = last
+            elif block.has_var(name) and block.var(name).is_data:
+                interval[0] = 0
+
+    def var_size(self, name, batch_size):
+        """
+        Get the memory size of the variable with the batch size.
+        """
+        data_count, batch_data_count, dtype = self.var_shapes[name]
+        return (data_count + batch_data_count * batch_size
+                ) * dtype_to_size[dtype]
+
+    def _live_coefficients(self):
+        """
+        Get the memory alive at every op position, as the list of
+        (size, batch size) coefficients, i.e. the memory is
+        (size + batch size * batch_size) at the position.
+        """
+        deltas = [[0, 0] for _ in range(self.op_num + 1)]
+        for name, (start, end) in six.iteritems(self.intervals):
+            data_count, batch_data_count, dtype = self.var_shapes[name]
+            size = dtype_to_size[dtype]
+            for position, sign in [(start, 1), (end + 1, -1)]:
+                deltas[position][0] += sign * data_count * size
+                deltas[position][1] += sign * batch_data_count * size
+        live = []
+        size, batch_size = 0, 0
+        for delta in deltas[:self.op_num]:
+            size += delta[0]
+            batch_size += delta[1]
+            live.append((size, batch_size))
+        return live
+
+    def persistable_memory(self, batch_size=1):
+        """
+        Get the memory of the persistable variables, e.g. the parameters.
+        """
+        return sum(
+            self.var_size(name, batch_size) for name in self.persistable_vars)
+
+    def peak_memory(self, batch_size):
+        """
+        Get the peak memory of the variables alive at the same time,
+        including the persistable variables.
+
+        Args:
+            batch_size(int): The input data batch size.
+
+        Returns:
+            tuple: (peak memory, position of the operator at the peak).
+        """
+        if batch_size <= 0:
+            raise ValueError("The batch size need to be positive.")
+        peak, peak_position = 0, 0
+        for position, (size, batch_size_coeff) in enumerate(
+                self._live_coefficients()):
+            memory = size + batch_size_coeff * batch_size
+            if memory > peak:
+                peak, peak_position = memory, position
+        return peak, peak_position
+
+    def max_batch_size(self, memory_limit):
+        """
+        Get the largest batch size whose peak memory is not more than
+        memory_limit.
+
+        Args:
+            memory_limit(int): The memory budget in bytes.
+
+        Returns:
+            int: the batch size, 0 if even the memory without the batch
+            dependent variables exceeds the limit, None if no memory depends
+            on the batch size.
+        """
+        max_batch_size = None
+        for size, batch_size_coeff in self._live_coefficients():
+            if size > memory_limit:
+                return 0
+            if batch_size_coeff > 0:
+                fit = (memory_limit - size) // batch_size_coeff
+                if max_batch_size is None or fit < max_batch_size:
+                    max_batch_size = fit
+        return max_batch_size
+
+    def reuse_plan(self):
+        """
+        Assign the temporary variables to buffers. The variables sharing a
+        buffer are never alive at the same time, and have the same dtype,
+        shape and lod level, since they share one variable after apply. A
+        variable reuses the free buffer released the earliest.
+
+        Returns:
+            dict: var name --> name of the var whose buffer it reuses. The
+            vars not in it keep their own buffers.
+        """
+        candidates = sorted(
+            (interval[0], interval[1], name)
+            for name, interval in six.iteritems(self.intervals)
+            if name not in self.pinned_vars)
+        # buffer name --> (key, last position it is used)
+        buffers = dict()
+        reuse = dict()
+        for start, end, name in candidates:
+            dtype = self.var_shapes[name][2]
+            key = (dtype, self.var_dims[name], self.var_lod_levels[name])
+            free = [(buffer_end, buffer)
+                    for buffer, (buffer_key, buffer_end) in
+                    six.iteritems(buffers)
+                    if buffer_key == key and buffer_end < start]
+            buffer = min(free)[1] if free else name
+            if buffer != name:
+                reuse[name] = buffer
+            buffers[buffer] = (key, end)
+        return reuse
+
+    def reused_memory(self, batch_size):
+        """
+        Get the memory of the temporary variables without and with the
+        buffers shared by reuse_plan.
+
+        Args:
+            batch_size(int): The input data batch size.
+
+        Returns:
+            tuple: (memory without sharing, memory with sharing).
+        """
+        reuse = self.reuse_plan()
+        buffer_sizes = dict()
+        total = 0
+        for name in self.intervals:
+            if name in self.pinned_vars:
+                continue
+            size = self.var_size(name, batch_size)
+            total += size
+            buffer = reuse.get(name, name)
+            buffer_sizes[buffer] = max(buffer_sizes.get(buffer, 0), size)
+        return total, sum(six.itervalues(buffer_sizes))
+
+    def apply(self):
+        """
+        Rewrite the program to let the temporary variables share the buffers
+        by reuse_plan, by renaming them to the variables owning the buffers.
+
+        Returns:
+            dict: var name --> name of the var whose buffer it reuses.
+        """
+        reuse = self.reuse_plan()
+        block = self.program.global_block()
+        for op in block.ops:
+            for name in op.input_arg_names:
+                if name in reuse:
+                    op._rename_input(name, reuse[name])
+            for name in op.output_arg_names:
+                if name in reuse:
+                    op._rename_output(name, reuse[name])
+        for name in reuse:
+            block._remove_var(name)
+        # the plan was for the program before it is rewritten
+        self._analyze()
+        return reuse
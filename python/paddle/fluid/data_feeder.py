@@ -19,7 +19,9 @@ import numpy
 import os
 import six
 from six.moves import zip, range, xrange
+import itertools
 import multiprocessing
+import threading
 
 from .framework import Variable, default_main_program, _current_expected_place
 from .framework import _cpu_num, _cuda_ids
@@ -57,6 +59,25 @@ def convert_dtype(dtype):
         "int32, int64, uint8]")
 
 
+def _flatten_sequences(seqs, lod_level, dtype=None):
+    """
+    Flatten the nested sequences of :code:`lod_level` levels into one
+    contiguous array and the length-based LoD of it. Only the sequences are
+    visited in Python, the tokens of each innermost sequence are converted
+    and concatenated by numpy, so the innermost sequences can be lists or
+    numpy arrays.
+    """
+    lod = []
+    for _ in six.moves.range(lod_level - 1):
+        lod.append([len(seq) for seq in seqs])
+        seqs = list(itertools.chain.from_iterable(seqs))
+    lod.append([len(seq) for seq in seqs])
+    arrays = [numpy.asarray(seq, dtype=dtype) for seq in seqs if len(seq) > 0]
+    if len(arrays) == 0:
+        return numpy.array([], dtype=dtype), lod
+    return numpy.concatenate(arrays), lod
+
+
 class DataToLoDTensorConverter(object):
     def __init__(self, place, lod_level, shape, dtype):
         self.place = place
@@ -70,22 +91,50 @@ class DataToLoDTensorConverter(object):
                 self.shape = None
                 break
         self.dtype = convert_dtype(dtype)
+        # For the slot without LoD whose shape is fully known except the
+        # batch size, samples are written into a reusable contiguous buffer
+        # directly instead of being collected into a list first.
+        self._sample_shape = None
+        if self.lod_level == 0 and self.shape and self.shape[0] < 0 and all(
+                s > 0 for s in self.shape[1:]):
+            self._sample_shape = tuple(self.shape[1:])
+            self._sample_numel = int(numpy.prod(self._sample_shape))
+        self._buffer = None
+        self._size = 0
         self._reset()
 
     def _reset(self):
         self.data = []
         self.lod = [[] for _ in six.moves.range(self.lod_level)]
+        self._size = 0
+
+    def _reserve(self, capacity):
+        if self._sample_shape is None:
+            return
+        if self._buffer is not None and self._buffer.shape[0] >= capacity:
+            return
+        buf = numpy.empty((capacity, ) + self._sample_shape, dtype=self.dtype)
+        if self._size > 0:
+            buf[:self._size] = self._buffer[:self._size]
+        self._buffer = buf
 
     def feed(self, data):
-        self._feed_impl_(data, self.lod, self.lod_level)
-
-    def _feed_impl_(self, data, lod, lod_level):
-        if lod_level == 0:
-            self.data.append(data)
+        if self._sample_shape is not None:
+            self._feed_fixed_shape_(data)
         else:
-            lod[0].append(len(data))
-            for each_data in data:
-                self._feed_impl_(each_data, lod[1:], lod_level - 1)
+            # sequences are flattened all at once in done()
+            self.data.append(data)
+
+    def _feed_fixed_shape_(self, data):
+        arr = numpy.asarray(data, dtype=self.dtype)
+        if arr.size != self._sample_numel:
+            raise ValueError(
+                "Shape not match. What is defined in data layer is {}, but receive {}".
+                format(self.shape, arr.shape))
+        if self._buffer is None or self._size == self._buffer.shape[0]:
+            self._reserve(max(2 * self._size, 16))
+        self._buffer[self._size] = arr.reshape(self._sample_shape)
+        self._size += 1
 
     def _check_shape(self, shape):
         for s1, s2 in zip(self.shape, shape):
@@ -95,7 +144,21 @@ class DataToLoDTensorConverter(object):
                     format(self.shape, shape))
 
     def done(self):
-        arr = numpy.array(self.data, dtype=self.dtype)
+        if self._sample_shape is not None:
+            self._reserve(self._size)
+            # LoDTensor.set copies the data, so the buffer can be reused
+            # by the next batch.
+            arr = self._buffer[:self._size]
+            t = core.LoDTensor()
+            t.set(arr, self.place)
+            self._reset()
+            return t
+
+        if self.lod_level > 0:
+            arr, self.lod = _flatten_sequences(self.data, self.lod_level,
+                                               self.dtype)
+        else:
+            arr = numpy.array(self.data, dtype=self.dtype)
         if self.shape:
             if len(arr.shape) != len(self.shape):
                 try:
@@ -128,6 +191,7 @@ class BatchedTensorProvider(object):
                     lod_level=0,
                     shape=var.shape,
                     dtype=var.dtype))
+            self.converters[-1]._reserve(batch_size)
 
     def _done(self):
         return [c.done() for c in self.converters]
@@ -137,7 +201,7 @@ class BatchedTensorProvider(object):
         for each_sample in self.generator():
             for each_slot, each_converter in six.moves.zip(each_sample,
                                                            self.converters):
-                each_converter.data.append(each_slot)
+                each_converter.feed(each_slot)
 
             idx += 1
             if idx == self.batch_size:
@@ -227,6 +291,27 @@ class DataFeeder(object):
             self.feed_shapes.append(each_var.shape)
 
         self.place = place
+        # converters are reused across feed calls to reuse their buffers,
+        # one group per thread since they are stateful.
+        self._local = threading.local()
+
+    def _get_converters(self):
+        converters = getattr(self._local, 'converters', None)
+        if converters is None:
+            converters = []
+            for lod_level, shape, dtype in six.moves.zip(
+                    self.feed_lod_level, self.feed_shapes, self.feed_dtypes):
+                converters.append(
+                    DataToLoDTensorConverter(
+                        place=self.place,
+                        lod_level=lod_level,
+                        shape=shape,
+                        dtype=dtype))
+            self._local.converters = converters
+        for each_converter in converters:
+            each_converter.place = self.place
+            each_converter._reset()
+        return converters
 
     def feed(self, iterable):
         """
@@ -266,15 +351,7 @@ class DataFeeder(object):
                 print(result['data_3'])
 
         """
-        converter = []
-        for lod_level, shape, dtype in six.moves.zip(
-                self.feed_lod_level, self.feed_shapes, self.feed_dtypes):
-            converter.append(
-                DataToLoDTensorConverter(
-                    place=self.place,
-                    lod_level=lod_level,
-                    shape=shape,
-                    dtype=dtype))
+        converter = self._get_converters()
 
         for each_sample in iterable:
             assert len(each_sample) == len(converter), (
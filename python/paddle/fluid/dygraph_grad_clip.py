@@ -22,6 +22,7 @@ import functools
 from . import layers
 from . import framework
 from . import core
+from .clip import _squared_l2_norm, _scale_in_place, _global_norm_clip_scale
 from .dygraph import base as imperative_base
 
 __all__ = [
@@ -263,25 +264,14 @@ class GradClipByGlobalNorm(GradClipBase):
         for p, g in para_and_grad:
             if g is None:
                 continue
-            power = layers.square(g)
-            sum_t = layers.reduce_sum(power)
-            norm_arr.append(sum_t)
+            norm_arr.append(_squared_l2_norm(g))
 
-        norm_global = layers.concat(norm_arr)
-        norm_global = layers.reduce_sum(norm_global)
-        norm_global = layers.sqrt(norm_global)
-
-        clip_scale = layers.elementwise_div(
-            x=self.max_global_norm,
-            y=layers.elementwise_max(
-                x=norm_global, y=self.max_global_norm))
+        clip_scale = _global_norm_clip_scale(norm_arr, self.max_global_norm)
 
         for p, g in para_and_grad:
             if g is None:
                 out.append((p, g))
                 continue
-            new_grad = g * clip_scale
-
-            out.append((p, new_grad))
+            out.append((p, _scale_in_place(g, clip_scale)))
 
         return out
@@ -14,14 +14,18 @@
 
 from __future__ import print_function
 
+import collections
 import logging
 import os
 import multiprocessing
 import sys
+import threading
+import time
 import warnings
 import numpy as np
 from .wrapped_decorator import signature_safe_contextmanager
 import six
+from six.moves import queue
 from .data_feeder import convert_dtype
 from .framework import Program, default_main_program, Variable, convert_np_dtype_to_dtype_
 from . import core
@@ -352,8 +356,20 @@ def _to_name_str(var):
         raise TypeError(str(var) + " should be Variable or str")
 
 
+def _get_program_fingerprint(program):
+    """
+    Return a structural fingerprint of :code:`program`, i.e. the md5 digest
+    of its serialized desc. Two structurally identical programs share the
+    same fingerprint even if they are different Python objects. The
+    fingerprint is reused until the program is modified through the python
+    APIs.
+    """
+    return program._fingerprint(cached=True)
+
+
 def _get_strong_program_cache_key(program, feed, fetch_list):
-    return str(id(program)) + _get_program_cache_key(feed, fetch_list)
+    return _get_program_fingerprint(program) + _get_program_cache_key(
+        feed, fetch_list)
 
 
 def _get_program_cache_key(feed, fetch_list):
@@ -394,6 +410,191 @@ def _as_lodtensor(data, place):
     return tensor
 
 
+_ProgramCacheEntry = collections.namedtuple(
+    '_ProgramCacheEntry', ['program', 'ctx', 'scope', 'var', 'parent_scope'])
+
+
+class _ProgramCache(object):
+    """
+    A bounded LRU cache of the prepared programs used by
+    :code:`Executor.run(use_program_cache=True)`.
+
+    Each entry holds the program with feed/fetch ops, its prepared context,
+    the sub-scope it runs in and the created variables. When the cache is
+    full, the least recently used entry is evicted and its sub-scope is
+    deleted from its parent scope.
+
+    Args:
+        capacity(int|None): the max number of entries to keep. None means
+            the cache is unbounded.
+    """
+
+    def __init__(self, capacity=None):
+        if capacity is not None and capacity <= 0:
+            raise ValueError("The capacity of program cache should be "
+                             "positive or None, but received %s" % capacity)
+        self.capacity = capacity
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        entry = self._entries.get(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # move the entry to the most recently used end
+        del self._entries[key]
+        self._entries[key] = entry
+        return entry
+
+    def put(self, key, entry):
+        if key in self._entries:
+            del self._entries[key]
+        self._entries[key] = entry
+        if self.capacity is not None:
+            while len(self._entries) > self.capacity:
+                self._evict()
+
+    def _evict(self):
+        _, entry = self._entries.popitem(last=False)
+        self.evictions += 1
+        self._release(entry)
+
+    def _release(self, entry):
+        if entry.parent_scope is not None and entry.scope is not None:
+            entry.parent_scope._delete_kid(entry.scope)
+
+    def set_capacity(self, capacity):
+        if capacity is not None and capacity <= 0:
+            raise ValueError("The capacity of program cache should be "
+                             "positive or None, but received %s" % capacity)
+        self.capacity = capacity
+        if capacity is not None:
+            while len(self._entries) > capacity:
+                self._evict()
+
+    def clear(self):
+        while self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._release(entry)
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'capacity': self.capacity
+        }
+
+
+class _AsyncFeedRunner(six.Iterator):
+    """
+    The iterator returned by :code:`Executor.run_feed_generator`. A
+    background thread converts the feed dicts from the generator into
+    LoDTensors, so the conversion of the next batches overlaps with the
+    execution of the current one.
+    """
+
+    def __init__(self, executor, program, feed_generator, fetch_list,
+                 feed_var_name, fetch_var_name, scope, return_numpy,
+                 prefetch_size):
+        self._executor = executor
+        self._program = program
+        self._fetch_list = fetch_list
+        self._feed_var_name = feed_var_name
+        self._fetch_var_name = fetch_var_name
+        self._scope = scope
+        self._return_numpy = return_numpy
+        self._queue = queue.Queue(maxsize=prefetch_size)
+        self._stop = threading.Event()
+        self._finished = False
+        self.timings = []
+        self._thread = threading.Thread(
+            target=self._convert_worker, args=(feed_generator, ))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _convert_worker(self, feed_generator):
+        place = self._executor.place
+        try:
+            for feed in feed_generator:
+                if not isinstance(feed, dict):
+                    raise TypeError(
+                        "feed_generator should yield dict, but yielded %s" %
+                        type(feed))
+                start = time.time()
+                tensors = dict()
+                for name, value in six.iteritems(feed):
+                    if not isinstance(value, core.LoDTensor):
+                        value = _as_lodtensor(value, place)
+                    tensors[name] = value
+                if not self._put(('feed', tensors, time.time() - start)):
+                    return
+            self._put(('end', ))
+        except Exception:
+            self._put(('error', sys.exc_info()))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        start = time.time()
+        item = self._queue.get()
+        wait_time = time.time() - start
+        if item[0] == 'end':
+            self._finished = True
+            raise StopIteration
+        elif item[0] == 'error':
+            self._finished = True
+            six.reraise(*item[1])
+        _, feed, feed_time = item
+
+        start = time.time()
+        outs = self._executor._run_program(
+            self._program,
+            feed=feed,
+            fetch_list=self._fetch_list,
+            feed_var_name=self._feed_var_name,
+            fetch_var_name=self._fetch_var_name,
+            scope=self._scope,
+            return_numpy=self._return_numpy,
+            use_program_cache=True)
+        self.timings.append({
+            'feed': feed_time,
+            'wait': wait_time,
+            'compute': time.time() - start
+        })
+        return outs
+
+    def close(self):
+        """
+        Stop converting the feed dicts from the generator.
+        """
+        self._finished = True
+        self._stop.set()
+
+
 class FetchHandler(object):
     def __init__(self, fetch_target_names, period_secs=60, return_np=True):
         self.fetch_target_names = fetch_target_names
@@ -478,40 +679,66 @@ class Executor(object):
                                fetch_list=[loss.name])
     """
 
-    def __init__(self, place):
+    def __init__(self, place, program_cache_capacity=128):
         self.place = place
-        self.program_caches = dict()
-        self.ctx_caches = dict()
-        self.scope_caches = dict()
-        self.var_caches = dict()
+        self._program_cache = _ProgramCache(program_cache_capacity)
         p = core.Place()
         p.set_place(self.place)
         self._default_executor = core.Executor(p)
         self._closed = False
 
-    def _get_var_cache(self, program_cache_key):
-        return self.var_caches.get(program_cache_key, None)
+    def _get_program_cache_entry(self, program_cache_key):
+        return self._program_cache.get(program_cache_key)
 
-    def _get_scope_cache(self, program_cache_key):
-        return self.scope_caches.get(program_cache_key, None)
+    def _add_program_cache_entry(self, program_cache_key, entry):
+        self._program_cache.put(program_cache_key, entry)
 
-    def _get_ctx_cache(self, program_cache_key):
-        return self.ctx_caches.get(program_cache_key, None)
+    def set_program_cache_capacity(self, capacity):
+        """
+        Set the max number of programs cached by :code:`run` with
+        :code:`use_program_cache=True`. The least recently used programs,
+        together with their prepared contexts and sub-scopes, are released
+        when the cache exceeds the capacity.
 
-    def _get_program_cache(self, program_cache_key):
-        return self.program_caches.get(program_cache_key, None)
+        Args:
+            capacity(int|None): the max number of cached programs. None
+                means the cache is unbounded.
 
-    def _add_program_cache(self, program_cache_key, program):
-        self.program_caches[program_cache_key] = program
+        Returns:
+            None
 
-    def _add_ctx_cache(self, ctx_cache_key, ctx):
-        self.ctx_caches[ctx_cache_key] = ctx
+        Examples:
+            .. code-block:: python
 
-    def _add_scope_cache(self, scope_cache_key, scope):
-        self.scope_caches[scope_cache_key] = scope
+              import paddle.fluid as fluid
+
+              exe = fluid.Executor(fluid.CPUPlace())
+              exe.set_program_cache_capacity(16)
+        """
+        self._program_cache.set_capacity(capacity)
+
+    def program_cache_info(self):
+        """
+        Get the statistics of the program cache used by :code:`run` with
+        :code:`use_program_cache=True`.
 
-    def _add_var_cache(self, var_cache_key, var):
-        self.var_caches[var_cache_key] = var
+        Programs are cached by a structural fingerprint of their desc together
+        with the feed/fetch names and the scope, so structurally identical
+        programs built separately share one cache entry.
+
+        Returns:
+            dict: with keys :code:`hits`, :code:`misses`, :code:`evictions`,
+                :code:`size` and :code:`capacity`.
+
+        Examples:
+            .. code-block:: python
+
+              import paddle.fluid as fluid
+
+              exe = fluid.Executor(fluid.CPUPlace())
+              print(exe.program_cache_info())
+        """
+        return self._program_cache.info()
 
     def _add_feed_fetch_ops(self, program, feed, fetch_list, feed_var_name,
                             fetch_var_name):
@@ -774,6 +1001,95 @@ class Executor(object):
                     "The following exception is not an EOF exception.")
             six.reraise(*sys.exc_info())
 
+    def run_feed_generator(self,
+                           program=None,
+                           feed_generator=None,
+                           fetch_list=None,
+                           feed_var_name='feed',
+                           fetch_var_name='fetch',
+                           scope=None,
+                           return_numpy=True,
+                           prefetch_size=2):
+        """
+        Run the :code:`Program` once for every feed dict yielded by
+        :code:`feed_generator`. The numpy arrays of the next feed dicts are
+        converted into LoDTensors on a background thread while the current
+        step executes, and every step runs the cached prepared context of the
+        program, like :code:`run` with :code:`use_program_cache=True`.
+
+        Args:
+            program(Program): the :code:`Program` to be executed. If it is
+                None, :code:`fluid.default_main_program()` is used. The
+                default is None.
+            feed_generator(generator): yields a feed dict of the same keys
+                for each step, see the :code:`feed` argument of :code:`run`.
+            fetch_list(list): the variables to be returned for each step.
+                The default is None.
+            feed_var_name(str): the name of the input variable of the feed
+                operator. The default is "feed".
+            fetch_var_name(str): the name of the output variable of the
+                fetch operator. The default is "fetch".
+            scope(Scope): the scope used to run the program. The default is
+                :code:`fluid.global_scope()`.
+            return_numpy(bool): whether to convert the fetched variables to
+                numpy.ndarray. The default is True.
+            prefetch_size(int): the max number of converted feed dicts
+                waiting to run. The default is 2, i.e. double buffering.
+
+        Returns:
+            iterator: yields the fetched result list of each step. Its
+            :code:`timings` attribute is a list of dicts, one per finished
+            step, with the seconds spent on converting the feed
+            (:code:`feed`), waiting for the converted feed (:code:`wait`)
+            and running the program (:code:`compute`).
+
+        Examples:
+            .. code-block:: python
+
+              import paddle.fluid as fluid
+              import numpy
+
+              place = fluid.CPUPlace()
+              exe = fluid.Executor(place)
+
+              data = fluid.data(name='X', shape=[None, 1], dtype='float32')
+              hidden = fluid.layers.fc(input=data, size=10)
+              loss = fluid.layers.mean(hidden)
+              exe.run(fluid.default_startup_program())
+
+              def feed_generator():
+                  for i in range(10):
+                      x = numpy.random.random(size=(10, 1)).astype('float32')
+                      yield {'X': x}
+
+              runner = exe.run_feed_generator(
+                  feed_generator=feed_generator(), fetch_list=[loss])
+              for loss_data, in runner:
+                  print(loss_data)
+              print(runner.timings)
+        """
+        if self._closed:
+            raise RuntimeError("Attempted to use a closed Executor")
+        if program is None:
+            program = default_main_program()
+        if not isinstance(program, Program):
+            raise TypeError(
+                "run_feed_generator requires Program as its Parameter. "
+                "But you passed in %s" % (type(program)))
+        if feed_generator is None:
+            raise ValueError("feed_generator should not be None")
+        if scope is None:
+            scope = global_scope()
+        if fetch_list is None:
+            fetch_list = []
+        elif isinstance(fetch_list, (Variable, six.string_types)):
+            fetch_list = [fetch_list]
+        assert prefetch_size > 0, "prefetch_size should be larger than 0"
+
+        return _AsyncFeedRunner(self, program, feed_generator, fetch_list,
+                                feed_var_name, fetch_var_name, scope,
+                                return_numpy, prefetch_size)
+
     def _run_impl(self, program, feed, fetch_list, feed_var_name,
                   fetch_var_name, scope, return_numpy, use_program_cache):
         if self._closed:
@@ -849,37 +1165,37 @@ class Executor(object):
                 % (type(program)))
 
         if use_program_cache:
-            cache_key = _get_strong_program_cache_key(program, feed, fetch_list)
-            cached_program = self._get_program_cache(cache_key)
-            cached_ctx = self._get_ctx_cache(cache_key)
-            cached_scope = self._get_scope_cache(cache_key)
-            cached_var = self._get_var_cache(cache_key)
-            if cached_program is None:
+            # the sub-scope of an entry is a kid of the scope it was created
+            # in, so the same program run in another scope is another entry.
+            cache_key = _get_strong_program_cache_key(
+                program, feed, fetch_list) + str(id(scope))
+            cached = self._get_program_cache_entry(cache_key)
+            if cached is None:
                 cached_program = self._add_feed_fetch_ops(
                     program=program,
                     feed=feed,
                     fetch_list=fetch_list,
                     feed_var_name=feed_var_name,
                     fetch_var_name=fetch_var_name)
-                self._add_program_cache(cache_key, cached_program)
                 fetch_list_str = list(map(_to_name_str, fetch_list))
                 cached_ctx = self._default_executor.prepare_ctx_cache(
                     cached_program.desc, 0, fetch_list_str, False)
                 cached_var = self._default_executor.create_variables(
                     cached_program.desc, scope, 0)
-                # currently, we cache program, vars, sub_scope here
-                # we suppose that in a life cycle of training, a user
-                # will not create many programs. So, here the basic
-                # rule of caching is to cache all unseen (program, var, scope)
-                # when a user use use_program_cache.
+                # currently, we cache program, vars, sub_scope here. The
+                # cache is a bounded LRU, the sub_scope of an evicted entry
+                # is deleted from its parent scope.
                 cached_scope = scope.new_scope()
-                self._add_ctx_cache(cache_key, cached_ctx)
-                self._add_var_cache(cache_key, cached_var)
-                self._add_scope_cache(cache_key, cached_scope)
-            program = cached_program
-            ctx = cached_ctx
-            scope = cached_scope
-            var = cached_var
+                cached = _ProgramCacheEntry(
+                    program=cached_program,
+                    ctx=cached_ctx,
+                    scope=cached_scope,
+                    var=cached_var,
+                    parent_scope=scope)
+                self._add_program_cache_entry(cache_key, cached)
+            program = cached.program
+            ctx = cached.ctx
+            scope = cached.scope
         else:
             program = self._add_feed_fetch_ops(
                 program=program,
@@ -16,6 +16,7 @@ from __future__ import print_function
 
 import collections
 from collections import defaultdict
+import hashlib
 from collections import Iterable
 import contextlib
 from .wrapped_decorator import signature_safe_contextmanager, wrap_decorator
@@ -58,6 +59,9 @@ TEMP_VAR_NAME = core.kTempVarName()
 GRAD_VAR_SUFFIX = core.kGradVarSuffix()
 ZERO_VAR_SUFFIX = core.kZeroVarSuffix()
 CONTROL_DEP_VAR_PREFIX = core.kControlDepVarName()
+# The name prefix of the contiguous buffers coalesced from other variables,
+# the same as the one used by the fuse passes.
+FUSED_VAR_PREFIX = "@FUSEDVAR@"
 
 _dygraph_tracer_ = None
 _dygraph_current_expected_place_ = None
@@ -382,6 +386,10 @@ class NameScope(object):
         self._children = dict()
         self._name = name
         self._parent = parent
+        # the full path like /s1/s2/, which is built once here since it is
+        # looked up for every op and every scoped unique name.
+        self._full_name = (parent._full_name
+                           if parent is not None else "") + name + "/"
 
     def child(self, prefix):
         if prefix not in self._children:
@@ -399,6 +407,9 @@ class NameScope(object):
     def name(self):
         return self._name
 
+    def full_name(self):
+        return self._full_name
+
 
 _name_scope = NameScope()
 
@@ -463,12 +474,7 @@ def name_scope(prefix=None):
 
 def _full_name_scope():
     global _name_scope
-    scope = _name_scope
-    name = ""
-    while scope:
-        name = scope.name() + "/" + name
-        scope = scope.parent()
-    return name
+    return _name_scope.full_name()
 
 
 def generate_control_dev_var_name():
@@ -1107,6 +1113,7 @@ class Variable(object):
                 "you can just do it by hold it as normal Python variable")
         else:
             self.desc.set_persistable(p)
+            self.block.program._mutation_version += 1
 
     @property
     def name(self):
@@ -1860,7 +1867,10 @@ class Operator(object):
         Returns:
             None
         """
+        self.block._index_op_vars(self, remove=True)
         self.desc._rename_input(old_name, new_name)
+        self.block._index_op_vars(self)
+        self.block.program._mutation_version += 1
 
     def _rename_output(self, old_name, new_name):
         """
@@ -1873,7 +1883,10 @@ class Operator(object):
         Returns:
             None
         """
+        self.block._index_op_vars(self, remove=True)
         self.desc._rename_output(old_name, new_name)
+        self.block._index_op_vars(self)
+        self.block.program._mutation_version += 1
 
     @property
     def input_names(self):
@@ -1906,11 +1919,12 @@ class Operator(object):
 
     @property
     def idx(self):
-        for i, op in enumerate(self.block.ops):
-            if op == self:
-                return i
-        raise ValueError(
-            "Can't find op itself in it's block. It could be a bug of Paddle.")
+        idx = self.block._op_position(self)
+        if idx is None:
+            raise ValueError(
+                "Can't find op itself in it's block. It could be a bug of Paddle."
+            )
+        return idx
 
     def has_attr(self, name):
         """
@@ -1952,6 +1966,7 @@ class Operator(object):
 
     def _remove_attr(self, name):
         self.desc.remove_attr(name)
+        self.block.program._mutation_version += 1
 
     def _update_desc_attr(self, name, val):
         """
@@ -1964,6 +1979,7 @@ class Operator(object):
         Raises:
             ValueError: If the type of value doesn't match with desc.attr_type(name).
         """
+        self.block.program._mutation_version += 1
         if isinstance(val, Block):
             self.desc.set_block_attr(name, val.desc)
         elif isinstance(val, list) and val and all(
@@ -2111,6 +2127,11 @@ class Block(object):
         self.ops = list()  # operator list
         self.program = program
         self.removed_vars = collections.OrderedDict()
+        # op desc --> position in self.ops, valid for self.ops[:end]
+        self._op_positions = dict()
+        self._op_positions_end = 0
+        # var name --> (ops output it, ops input it), built on demand
+        self._var_ops = None
 
     def __str__(self):
         return self.to_string(True)
@@ -2262,6 +2283,7 @@ class Block(object):
                 if isinstance(item[1], Parameter))
 
     def create_var(self, *args, **kwargs):
+        self.program._mutation_version += 1
         var = Variable(block=self, *args, **kwargs)
         if 'initializer' in kwargs:
             kwargs['initializer'](var, self)
@@ -2335,15 +2357,20 @@ class Block(object):
         # new vars/ops to python side.
         self.vars[new_name] = var
         del self.vars[name]
+        if self._var_ops is not None and name in self._var_ops:
+            self._var_ops[new_name] = self._var_ops.pop(name)
+        self.program._mutation_version += 1
         self._sync_with_cpp()
         return var
 
     def _remove_var(self, name):
         self._sync_with_cpp()
+        self.program._mutation_version += 1
         self.desc._remove_var(cpt.to_bytes(name))
         del self.vars[name]
 
     def create_parameter(self, *args, **kwargs):
+        self.program._mutation_version += 1
         global_block = self.program.global_block()
         param = Parameter(global_block, *args, **kwargs)
         if 'initializer' in kwargs:
@@ -2413,6 +2440,7 @@ class Block(object):
                                        if attrs else {},
                                        kwargs.get("stop_gradient", False))
         else:
+            self.program._mutation_version += 1
             op_desc = self.desc.append_op()
             op = Operator(
                 block=self,
@@ -2423,6 +2451,7 @@ class Block(object):
                 attrs=kwargs.get("attrs", None))
 
             self.ops.append(op)
+            self._index_appended_ops(len(self.ops) - 1)
 
         return op
 
@@ -2437,9 +2466,12 @@ class Block(object):
             Operator: the insert Operator.
         """
         self._sync_with_cpp()
+        self.program._mutation_version += 1
         op_desc = self.desc._insert_op(index)
         op = Operator(block=self, desc=op_desc, *args, **kwargs)
         self.ops.insert(index, op)
+        self._op_positions_end = min(self._op_positions_end, index)
+        self._index_op_vars(op)
         return op
 
     def _remove_op(self, index):
@@ -2453,8 +2485,12 @@ class Block(object):
             None
         """
         self._sync_with_cpp()
+        self.program._mutation_version += 1
         self.desc._remove_op(index, index + 1)
-        del self.ops[index]
+        op = self.ops.pop(index)
+        self._op_positions.pop(op.desc, None)
+        self._op_positions_end = min(self._op_positions_end, index)
+        self._index_op_vars(op, remove=True)
 
     def _slice_ops(self, start, end):
         """
@@ -2482,6 +2518,7 @@ class Block(object):
                                        if attrs else {},
                                        kwargs.get("stop_gradient", False))
         else:
+            self.program._mutation_version += 1
             op_desc = self.desc._prepend_op()
             op = Operator(
                 self,
@@ -2491,6 +2528,8 @@ class Block(object):
                 outputs=kwargs.get("outputs", None),
                 attrs=kwargs.get("attrs", None))
             self.ops.insert(0, op)
+            self._op_positions_end = 0
+            self._index_op_vars(op)
 
         return op
 
@@ -2499,66 +2538,117 @@ class Block(object):
         Sync from the desc on the c++ end. This method is used to synchronize
         the c++ desc instance generated by backward.
         """
-        # sync variables from cpp
-        for var in self.desc.all_vars():
-            if not self.has_var(var.name()):
-                self.create_var(name=var.name(), desc=var, type=var.type())
-
-        # sync variables removed from c++ end
-        for var in list(self.vars.keys()):
-            if not self.desc.find_var(cpt.to_bytes(var)):
-                self.vars.pop(var)
+        # the desc could be changed on the c++ end
+        self.program._mutation_version += 1
+        # the vars are added or removed on both ends by the python side,
+        # only sync them if the cpp side has changed the number of them
+        if self.desc.var_size() != len(self.vars):
+            # sync variables from cpp
+            for var in self.desc.all_vars():
+                if not self.has_var(var.name()):
+                    self.create_var(
+                        name=var.name(), desc=var, type=var.type())
+
+            # sync variables removed from c++ end
+            for var in list(self.vars.keys()):
+                if not self.desc.find_var(cpt.to_bytes(var)):
+                    self.vars.pop(var)
 
         # sync operators from cpp
-        ops_in_cpp = []
-        for op_idx in range(0, self.desc.op_size()):
-            ops_in_cpp.append(self.desc.op(op_idx))
-
-        if len(self.ops) != 0:
-            first_op_in_python = self.ops[0].desc
-            last_op_in_python = self.ops[len(self.ops) - 1].desc
-            start_index = None
-            end_index = None
-            for index in range(len(ops_in_cpp)):
-                if first_op_in_python == ops_in_cpp[index]:
-                    start_index = index
-                if last_op_in_python == ops_in_cpp[index]:
-                    end_index = index
-            assert start_index is not None
-            assert end_index is not None
-            assert start_index <= end_index
-        else:
-            start_index = 0
-            end_index = -1
+        op_size = self.desc.op_size()
+        py_size = len(self.ops)
+        if py_size == 0 or (op_size >= py_size and
+                            self.desc.op(0) is self.ops[0].desc and
+                            self.desc.op(py_size - 1) is self.ops[-1].desc):
+            # the ops in python are unchanged in cpp, which is the case
+            # unless the cpp ops are removed or prepended, only sync the ops
+            # appended to the cpp ops
+            for index in range(py_size, op_size):
+                self.ops.append(Operator(self, self.desc.op(index)))
+                self._index_appended_ops(index)
+            return
+
+        ops_in_python = dict((op.desc, op) for op in self.ops)
+        ops = []
+        for index in range(op_size):
+            op_desc = self.desc.op(index)
+            op = ops_in_python.get(op_desc)
+            ops.append(op if op is not None else Operator(self, op_desc))
+        self.ops = ops
+        self._op_positions = dict()
+        self._op_positions_end = 0
+        self._var_ops = None
+
+    def _index_appended_ops(self, start):
+        """
+        Index the ops appended to this block from position start.
+        """
+        if self._op_positions_end == start:
+            for index in range(start, len(self.ops)):
+                self._op_positions[self.ops[index].desc] = index
+            self._op_positions_end = len(self.ops)
+        for index in range(start, len(self.ops)):
+            self._index_op_vars(self.ops[index])
+
+    def _index_op_vars(self, op, remove=False):
+        """
+        Add or remove the op in the index of var name --> ops, if the index
+        is built.
+        """
+        if self._var_ops is None:
+            return
+        for slot, names in [(0, op.output_arg_names),
+                            (1, op.input_arg_names)]:
+            for name in names:
+                if remove:
+                    ops = self._var_ops.get(name)
+                    if ops is not None and op in ops[slot]:
+                        ops[slot].remove(op)
+                else:
+                    self._var_ops.setdefault(name, ([], []))[slot].append(op)
 
-        # sync ops append to the head of cpp_ops
-        for index in range((start_index - 1 - 1), -1, -1):
-            op_desc = ops_in_cpp[index]
-            op = Operator(self, op_desc)
-            self.ops.insert(0, op)
+    def _op_position(self, op):
+        """
+        Get the position of the op in this block, or None if it is not in
+        this block. The positions are indexed on demand, inserting or
+        removing an op only invalidates the positions after it.
+        """
+        index = self._op_positions.get(op.desc)
+        if index is None or index >= self._op_positions_end:
+            for i in range(self._op_positions_end, len(self.ops)):
+                self._op_positions[self.ops[i].desc] = i
+            self._op_positions_end = len(self.ops)
+            index = self._op_positions.get(op.desc)
+        if index is None or self.ops[index] is not op:
+            return None
+        return index
 
-        # sync ops append to the end of cpp_ops
-        for index in range((end_index + 1), len(ops_in_cpp)):
-            op_desc = ops_in_cpp[index]
-            op = Operator(self, op_desc)
-            self.ops.append(op)
+    def _var_producers(self, name):
+        """
+        Get the ops which output the var in this block, in the order of the
+        ops.
+        """
+        return self._var_ops_of(name, 0, lambda op: op.output_arg_names)
 
-        # sync ops removed from c++ end
-        if end_index != -1 and end_index < len(self.ops):
-            ops_in_cpp_index = 0
-            ops_in_python_index = 0
-            while ops_in_python_index < len(
-                    self.ops) and ops_in_cpp_index < len(ops_in_cpp):
-                if self.ops[ops_in_python_index].desc != ops_in_cpp[
-                        ops_in_cpp_index]:
-                    del self.ops[ops_in_python_index]
-                else:
-                    ops_in_cpp_index += 1
-                    ops_in_python_index += 1
+    def _var_consumers(self, name):
+        """
+        Get the ops which input the var in this block, in the order of the
+        ops.
+        """
+        return self._var_ops_of(name, 1, lambda op: op.input_arg_names)
 
-        assert len(self.ops) == len(ops_in_cpp)
-        for index in range(len(self.ops)):
-            assert self.ops[index].desc == ops_in_cpp[index]
+    def _var_ops_of(self, name, slot, arg_names):
+        if self._var_ops is None:
+            self._var_ops = dict()
+            for op in self.ops:
+                self._index_op_vars(op)
+        ops = self._var_ops.get(name, ([], []))[slot]
+        # the ops could be changed through their desc, drop the stale ones
+        ops = [
+            op for op in ops
+            if name in arg_names(op) and self._op_position(op) is not None
+        ]
+        return sorted(ops, key=self._op_position)
 
     def _copy_param_info_from(self, other):
         """
@@ -3543,6 +3633,14 @@ class Program(object):
         # appending gradients times
         self._appending_grad_times = 0
 
+        # bumped when the program is modified through the python APIs,
+        # to invalidate the fingerprint cached in _fingerprint_cache
+        self._mutation_version = 0
+        self._fingerprint_cache = None
+        # (kind, args) --> (fingerprint of the program, result, fingerprint
+        # of the result), see _memoized
+        self._memoized_results = dict()
+
     @property
     def _op_role(self):
         """
@@ -3903,6 +4001,94 @@ class Program(object):
         p._copy_dist_param_info_from(self)
         return p
 
+    def _fingerprint(self, cached=False):
+        """
+        Get the structural fingerprint of this program, which is the md5
+        digest of its serialized desc. Structurally identical programs share
+        the same fingerprint, and it changes once the ops or vars are
+        modified.
+
+        Notes: This is a very low level API. Users should not use this API
+        directly.
+
+        Args:
+            cached(bool): reuse the fingerprint computed before if the
+                program has not been modified through the python APIs since
+                then. The programs modified through their desc directly should
+                use False.
+
+        Returns:
+            str: the fingerprint.
+        """
+        if cached and self._fingerprint_cache is not None and \
+                self._fingerprint_cache[0] == self._mutation_version:
+            return self._fingerprint_cache[1]
+        fingerprint = hashlib.md5(self.desc.serialize_to_string()).hexdigest()
+        self._fingerprint_cache = (self._mutation_version, fingerprint)
+        return fingerprint
+
+    def _memoized(self, key, build):
+        """
+        Get the program built from this program by :code:`build()`, which
+        is cached with :code:`key` until this program is modified.
+
+        Notes: This is a very low level API. Users should not use this API
+        directly. The result is shared by the calls with the same key, it is
+        built again if it has been modified since it was cached.
+
+        Args:
+            key(hashable): the kind and the arguments of the building.
+            build(callable): build the program from this program.
+
+        Returns:
+            Program: the built program.
+        """
+        fingerprint = self._fingerprint()
+        cached = self._memoized_results.get(key)
+        if cached is not None:
+            source_fingerprint, result, result_fingerprint = cached
+            if source_fingerprint == fingerprint and \
+                    result._fingerprint() == result_fingerprint:
+                return result
+        # drop the results built from this program before it was modified
+        self._memoized_results = dict(
+            (k, v) for k, v in six.iteritems(self._memoized_results)
+            if v[0] == fingerprint)
+        result = build()
+        self._memoized_results[key] = (fingerprint, result,
+                                       result._fingerprint())
+        return result
+
+    def _cached_clone(self, for_test=False):
+        """
+        Like :code:`clone`, but return the same program for the calls on this
+        program until it is modified. It saves rebuilding the program in
+        evaluation loops, and the result should be used as read-only.
+        """
+
+        def build():
+            return self.clone(for_test=for_test)
+
+        p = self._memoized(("clone", for_test), build)
+        # the parameter, data and distributed information are not in the
+        # desc and could have been changed
+        p._copy_param_info_from(self)
+        p._copy_data_info_from(self)
+        p._copy_dist_param_info_from(self)
+        return p
+
+    def _cached_inference_optimize(self, prune_read_op=True):
+        """
+        Like :code:`_inference_optimize`, but return the same program for the
+        calls on this program until it is modified, and the result should be
+        used as read-only.
+        """
+
+        def build():
+            return self._inference_optimize(prune_read_op=prune_read_op)
+
+        return self._memoized(("inference_optimize", prune_read_op), build)
+
     def _prune(self, targets):
         """
         Prune operators and variables which are not needed to generate
@@ -3922,6 +4108,9 @@ class Program(object):
         if not isinstance(targets, list):
             targets = [targets]
 
+        # the transpilers could change the ops through their desc, index the
+        # ops of the vars again once for all the targets
+        self.global_block()._var_ops = None
         targets_idx = []
         for t in targets:
             if not isinstance(t, Operator):
@@ -3930,12 +4119,8 @@ class Program(object):
                     # variable maybe has been changed, so t.op is not reliable
                     # and we need to find the current op that generate this
                     # variable here.
-                    t.op = None
-                    global_block = self.global_block()
-                    for idx, op in enumerate(global_block.ops):
-                        if t.name in op.output_arg_names:
-                            t.op = op
-                            break
+                    producers = self.global_block()._var_producers(t.name)
+                    t.op = producers[0] if producers else None
 
                     t = t.op
                     if t is None:
@@ -3984,6 +4169,9 @@ class Program(object):
                 raise ValueError("All feeded_var_names of prune() can only be "
                                  "str.")
 
+        # the transpilers could change the ops through their desc, index the
+        # ops of the vars again once for all the targets
+        self.global_block()._var_ops = None
         targets_idx = []
         for t in targets:
             if not isinstance(t, Operator):
@@ -3992,12 +4180,8 @@ class Program(object):
                     # variable maybe has been changed, so t.op is not reliable
                     # and we need to find the current op that generate this
                     # variable here.
-                    t.op = None
-                    global_block = self.global_block()
-                    for idx, op in enumerate(global_block.ops):
-                        if t.name in op.output_arg_names:
-                            t.op = op
-                            break
+                    producers = self.global_block()._var_producers(t.name)
+                    t.op = producers[0] if producers else None
 
                     t = t.op
                     if t is None:
@@ -153,6 +153,16 @@ class MPIRoleMaker(RoleMakerBase):
             return self._node_type_comm.allgather(obj)
         return None
 
+    def _all_reduce(self, input, output, mode="sum"):
+        """
+        all_reduce(input, output, mode) will call MPI's Allreduce function
+        among the processes of the same node type
+        """
+        ops = {"sum": self.MPI.SUM, "min": self.MPI.MIN, "max": self.MPI.MAX}
+        if mode not in ops:
+            raise ValueError("unsupported all reduce mode: %s" % mode)
+        self._node_type_comm.Allreduce(input, output, op=ops[mode])
+
     def _barrier_all(self):
         """
         barrier_all() will call MPI's barrier_all function
@@ -16,7 +16,6 @@
 import collections
 import json
 import logging
-import math
 import numpy as np
 import os
 import sys
@@ -26,6 +25,7 @@ from paddle.fluid.log_helper import get_logger
 from paddle.fluid.incubate.fleet.parameter_server.pslib import fleet
 from . import hdfs
 from .hdfs import *
+from .metric_state import MetricState
 
 __all__ = ["FleetUtil"]
 
@@ -46,6 +46,23 @@ class FleetUtil(object):
 
     """
 
+    def __init__(self):
+        # (hadoop home, fs name, fs ugi) --> HDFSClient
+        self._hdfs_clients = {}
+
+    def _get_hdfs_client(self, hadoop_home, hadoop_fs_name, hadoop_fs_ugi):
+        """
+        Get the client of the hdfs/afs shared by the calls of this FleetUtil.
+        """
+        key = (hadoop_home, hadoop_fs_name, hadoop_fs_ugi)
+        if key not in self._hdfs_clients:
+            configs = {
+                "fs.default.name": hadoop_fs_name,
+                "hadoop.job.ugi": hadoop_fs_ugi
+            }
+            self._hdfs_clients[key] = HDFSClient(hadoop_home, configs)
+        return self._hdfs_clients[key]
+
     def rank0_print(self, s):
         """
         Worker of rank 0 print some log.
@@ -198,49 +215,10 @@ class FleetUtil(object):
             self.rank0_print("not found auc bucket")
             return None
         fleet._role_maker._barrier_worker()
-        # auc pos bucket
-        pos = np.array(scope.find_var(stat_pos).get_tensor())
-        # auc pos bucket shape
-        old_pos_shape = np.array(pos.shape)
-        # reshape to one dim
-        pos = pos.reshape(-1)
-        global_pos = np.copy(pos) * 0
-        # mpi allreduce
-        fleet._role_maker._node_type_comm.Allreduce(pos, global_pos)
-        # reshape to its original shape
-        global_pos = global_pos.reshape(old_pos_shape)
-
-        # auc neg bucket
-        neg = np.array(scope.find_var(stat_neg).get_tensor())
-        old_neg_shape = np.array(neg.shape)
-        neg = neg.reshape(-1)
-        global_neg = np.copy(neg) * 0
-        fleet._role_maker._node_type_comm.Allreduce(neg, global_neg)
-        global_neg = global_neg.reshape(old_neg_shape)
-
-        # calculate auc
-        num_bucket = len(global_pos[0])
-        area = 0.0
-        pos = 0.0
-        neg = 0.0
-        new_pos = 0.0
-        new_neg = 0.0
-        total_ins_num = 0
-        for i in xrange(num_bucket):
-            index = num_bucket - 1 - i
-            new_pos = pos + global_pos[0][index]
-            total_ins_num += global_pos[0][index]
-            new_neg = neg + global_neg[0][index]
-            total_ins_num += global_neg[0][index]
-            area += (new_neg - neg) * (pos + new_pos) / 2
-            pos = new_pos
-            neg = new_neg
-
-        auc_value = None
-        if pos * neg == 0 or total_ins_num == 0:
-            auc_value = 0.5
-        else:
-            auc_value = area / (pos * neg)
+        # all reduce the auc buckets in a single call
+        global_state = MetricState.from_scope(
+            scope, stat_pos, stat_neg).all_reduce(fleet._role_maker)
+        auc_value = global_state.auc()
 
         fleet._role_maker._barrier_worker()
         return auc_value
@@ -396,12 +374,13 @@ class FleetUtil(object):
             donefile_path = output_path + "/" + donefile_name
             content  = "%s\t%lu\t%s\t%s\t%d" % (day, xbox_base_key,\
                                                 model_path, pass_id, 0)
-            configs = {
-                "fs.default.name": hadoop_fs_name,
-                "hadoop.job.ugi": hadoop_fs_ugi
-            }
-            client = HDFSClient(hadoop_home, configs)
-            if client.is_file(donefile_path):
+            client = self._get_hdfs_client(hadoop_home, hadoop_fs_name,
+                                           hadoop_fs_ugi)
+            # the donefile and its directory are queried by one command
+            types = client.stat([donefile_path, output_path])
+            if types[output_path] is None:
+                client.makedirs(output_path)
+            if types[donefile_path] == "file":
                 pre_content = client.cat(donefile_path)
                 pre_content_list = pre_content.split("\n")
                 day_list = [i.split("\t")[0] for i in pre_content_list]
@@ -509,12 +488,12 @@ class FleetUtil(object):
             xbox_str = self._get_xbox_str(output_path, day, model_path, \
                     xbox_base_key, data_path, hadoop_fs_name, monitor_data={},
                     mode=mode)
-            configs = {
-                "fs.default.name": hadoop_fs_name,
-                "hadoop.job.ugi": hadoop_fs_ugi
-            }
-            client = HDFSClient(hadoop_home, configs)
-            if client.is_file(donefile_path):
+            client = self._get_hdfs_client(hadoop_home, hadoop_fs_name,
+                                           hadoop_fs_ugi)
+            types = client.stat([donefile_path, output_path])
+            if types[output_path] is None:
+                client.makedirs(output_path)
+            if types[donefile_path] == "file":
                 pre_content = client.cat(donefile_path)
                 last_dict = json.loads(pre_content.split("\n")[-1])
                 last_day = last_dict["input"].split("/")[-3]
@@ -601,12 +580,12 @@ class FleetUtil(object):
 
         if fleet.worker_index() == 0:
             donefile_path = model_path + "/" + donefile_name
-            configs = {
-                "fs.default.name": hadoop_fs_name,
-                "hadoop.job.ugi": hadoop_fs_ugi
-            }
-            client = HDFSClient(hadoop_home, configs)
-            if client.is_file(donefile_path):
+            client = self._get_hdfs_client(hadoop_home, hadoop_fs_name,
+                                           hadoop_fs_ugi)
+            types = client.stat([donefile_path, model_path])
+            if types[model_path] is None:
+                client.makedirs(model_path)
+            if types[donefile_path] == "file":
                 self.rank0_error( \
                     "not write because %s already exists" % donefile_path)
             else:
@@ -925,23 +904,20 @@ class FleetUtil(object):
                 else:
                     fluid.io.save_vars(executor, model_name, program, vars=vars)
 
-            configs = {
-                "fs.default.name": hadoop_fs_name,
-                "hadoop.job.ugi": hadoop_fs_ugi
-            }
-            client = HDFSClient(hadoop_home, configs)
+            client = self._get_hdfs_client(hadoop_home, hadoop_fs_name,
+                                           hadoop_fs_ugi)
 
             if pass_id == "-1":
                 dest = "%s/%s/base/dnn_plugin/" % (output_path, day)
             else:
                 dest = "%s/%s/delta-%s/dnn_plugin/" % (output_path, day,
                                                        pass_id)
-            if not client.is_exist(dest):
-                client.makedirs(dest)
-
             if os.path.isdir(model_name):
+                # upload_dir makes dest if it does not exist
                 client.upload_dir(dest, model_name)
             else:
+                if not client.is_exist(dest):
+                    client.makedirs(dest)
                 client.upload(dest, model_name)
 
         fleet._role_maker._barrier_worker()
@@ -977,14 +953,12 @@ class FleetUtil(object):
 
         """
         donefile_path = output_path + "/xbox_base_done.txt"
-        configs = {
-            "fs.default.name": hadoop_fs_name,
-            "hadoop.job.ugi": hadoop_fs_ugi
-        }
-        client = HDFSClient(hadoop_home, configs)
-        if not client.is_file(donefile_path):
-            return [-1, -1, int(time.time())]
+        client = self._get_hdfs_client(hadoop_home, hadoop_fs_name,
+                                       hadoop_fs_ugi)
+        # empty if the donefile does not exist
         pre_content = client.cat(donefile_path)
+        if not pre_content:
+            return [-1, -1, int(time.time())]
         last_dict = json.loads(pre_content.split("\n")[-1])
         last_day = int(last_dict["input"].split("/")[-3])
         last_path = "/".join(last_dict["input"].split("/")[:-1])
@@ -1022,14 +996,12 @@ class FleetUtil(object):
 
         """
         donefile_path = output_path + "/xbox_patch_done.txt"
-        configs = {
-            "fs.default.name": hadoop_fs_name,
-            "hadoop.job.ugi": hadoop_fs_ugi
-        }
-        client = HDFSClient(hadoop_home, configs)
-        if not client.is_file(donefile_path):
-            return [-1, -1, "", int(time.time())]
+        client = self._get_hdfs_client(hadoop_home, hadoop_fs_name,
+                                       hadoop_fs_ugi)
+        # empty if the donefile does not exist
         pre_content = client.cat(donefile_path)
+        if not pre_content:
+            return [-1, -1, "", int(time.time())]
         last_dict = json.loads(pre_content.split("\n")[-1])
         last_day = int(last_dict["input"].split("/")[-3])
         last_pass = int(last_dict["input"].split("/")[-2].split("-")[-1])
@@ -1071,14 +1043,12 @@ class FleetUtil(object):
         last_save_pass = -1
         last_path = ""
         donefile_path = output_path + "/donefile.txt"
-        configs = {
-            "fs.default.name": hadoop_fs_name,
-            "hadoop.job.ugi": hadoop_fs_ugi
-        }
-        client = HDFSClient(hadoop_home, configs)
-        if not client.is_file(donefile_path):
-            return [-1, -1, "", int(time.time())]
+        client = self._get_hdfs_client(hadoop_home, hadoop_fs_name,
+                                       hadoop_fs_ugi)
+        # empty if the donefile does not exist
         content = client.cat(donefile_path)
+        if not content:
+            return [-1, -1, "", int(time.time())]
         content = content.split("\n")[-1].split("\t")
         last_save_day = int(content[0])
         last_save_pass = int(content[3])
@@ -1237,104 +1207,15 @@ class FleetUtil(object):
         # barrier worker to ensure all workers finished training
         fleet._role_maker._barrier_worker()
 
-        # get auc
-        auc = self.get_global_auc(scope, stat_pos_name, stat_neg_name)
-        pos = np.array(scope.find_var(stat_pos_name).get_tensor())
-        # auc pos bucket shape
-        old_pos_shape = np.array(pos.shape)
-        # reshape to one dim
-        pos = pos.reshape(-1)
-        global_pos = np.copy(pos) * 0
-        # mpi allreduce
-        fleet._role_maker._node_type_comm.Allreduce(pos, global_pos)
-        # reshape to its original shape
-        global_pos = global_pos.reshape(old_pos_shape)
-        # auc neg bucket
-        neg = np.array(scope.find_var(stat_neg_name).get_tensor())
-        old_neg_shape = np.array(neg.shape)
-        neg = neg.reshape(-1)
-        global_neg = np.copy(neg) * 0
-        fleet._role_maker._node_type_comm.Allreduce(neg, global_neg)
-        global_neg = global_neg.reshape(old_neg_shape)
-
-        num_bucket = len(global_pos[0])
-
-        def get_metric(name):
-            metric = np.array(scope.find_var(name).get_tensor())
-            old_metric_shape = np.array(metric.shape)
-            metric = metric.reshape(-1)
-            global_metric = np.copy(metric) * 0
-            fleet._role_maker._node_type_comm.Allreduce(metric, global_metric)
-            global_metric = global_metric.reshape(old_metric_shape)
-            return global_metric[0]
-
-        global_sqrerr = get_metric(sqrerr_name)
-        global_abserr = get_metric(abserr_name)
-        global_prob = get_metric(prob_name)
-        global_q_value = get_metric(q_name)
+        # pack the auc buckets and the metric counters of this worker, and all
+        # reduce them in a single call
         # note: get ins_num from auc bucket is not actual value,
         # so get it from metric op
-        pos_ins_num = get_metric(pos_ins_num_name)
-        total_ins_num = get_metric(total_ins_num_name)
-        neg_ins_num = total_ins_num - pos_ins_num
-
-        mae = global_abserr / total_ins_num
-        rmse = math.sqrt(global_sqrerr / total_ins_num)
-        return_actual_ctr = pos_ins_num / total_ins_num
-        predicted_ctr = global_prob / total_ins_num
-        mean_predict_qvalue = global_q_value / total_ins_num
-        copc = 0.0
-        if abs(predicted_ctr > 1e-6):
-            copc = return_actual_ctr / predicted_ctr
-
-        # calculate bucket error
-        last_ctr = -1.0
-        impression_sum = 0.0
-        ctr_sum = 0.0
-        click_sum = 0.0
-        error_sum = 0.0
-        error_count = 0.0
-        click = 0.0
-        show = 0.0
-        ctr = 0.0
-        adjust_ctr = 0.0
-        relative_error = 0.0
-        actual_ctr = 0.0
-        relative_ctr_error = 0.0
-        k_max_span = 0.01
-        k_relative_error_bound = 0.05
-        for i in xrange(num_bucket):
-            click = global_pos[0][i]
-            show = global_pos[0][i] + global_neg[0][i]
-            ctr = float(i) / num_bucket
-            if abs(ctr - last_ctr) > k_max_span:
-                last_ctr = ctr
-                impression_sum = 0.0
-                ctr_sum = 0.0
-                click_sum = 0.0
-            impression_sum += show
-            ctr_sum += ctr * show
-            click_sum += click
-            if impression_sum == 0:
-                continue
-            adjust_ctr = ctr_sum / impression_sum
-            if adjust_ctr == 0:
-                continue
-            relative_error = \
-                           math.sqrt((1 - adjust_ctr) / (adjust_ctr * impression_sum))
-            if relative_error < k_relative_error_bound:
-                actual_ctr = click_sum / impression_sum
-                relative_ctr_error = abs(actual_ctr / adjust_ctr - 1)
-                error_sum += relative_ctr_error * impression_sum
-                error_count += impression_sum
-                last_ctr = -1
-
-        bucket_error = error_sum / error_count if error_count > 0 else 0.0
-
-        return [
-            auc, bucket_error, mae, rmse, return_actual_ctr, predicted_ctr,
-            copc, mean_predict_qvalue, int(total_ins_num)
-        ]
+        global_state = MetricState.from_scope(
+            scope, stat_pos_name, stat_neg_name, sqrerr_name, abserr_name,
+            prob_name, q_name, pos_ins_num_name,
+            total_ins_num_name).all_reduce(fleet._role_maker)
+        return global_state.metrics()
 
     def print_global_metrics(self,
                              scope=fluid.global_scope(),
@@ -16,16 +16,21 @@
 import os
 import sys
 import subprocess
-import multiprocessing
+import shutil
+import threading
+import time
+import collections
+import posixpath
+from multiprocessing.pool import ThreadPool
 from datetime import datetime
 
 import re
-import copy
 import errno
+import six
 
 import logging
 
-__all__ = ["HDFSClient"]
+__all__ = ["FS", "LocalFS", "HDFSClient"]
 
 
 def get_logger(name, level, fmt):
@@ -42,15 +47,376 @@ _logger = get_logger(
     __name__, logging.INFO, fmt='%(asctime)s-%(levelname)s: %(message)s')
 
 
-class HDFSClient(object):
+class FS(object):
     """
-    A tool of HDFS 
+    FS is the interface of the file systems used by fleet to save and load
+    models and donefiles. A file system implements stat, which queries the
+    types of several paths at once, the listing and the modifying methods,
+    and the copy of a single file or directory in _put and _get, and FS
+    builds is_exist, is_dir, is_file and the parallel upload and download
+    on them.
+    """
+
+    def stat(self, fs_paths):
+        """
+        Query the types of several paths at once.
+
+        Args:
+            fs_paths(list): paths on the file system
+
+        Returns:
+            dict: maps every path to "dir", "file", or None if it does not
+            exist.
+        """
+        raise NotImplementedError("Please implement this method in child class")
+
+    def is_exist(self, fs_path=None):
+        """
+        whether the path exists
+        """
+        return self.stat([fs_path])[fs_path] is not None
+
+    def is_dir(self, fs_path=None):
+        """
+        whether the path is a directory
+        """
+        return self.stat([fs_path])[fs_path] == "dir"
+
+    def is_file(self, fs_path=None):
+        """
+        whether the path is a file
+        """
+        return self.stat([fs_path])[fs_path] == "file"
+
+    def cat(self, fs_path=None):
+        raise NotImplementedError("Please implement this method in child class")
+
+    def ls(self, fs_path):
+        raise NotImplementedError("Please implement this method in child class")
+
+    def lsr(self, fs_path, excludes=[]):
+        raise NotImplementedError("Please implement this method in child class")
+
+    def delete(self, fs_path):
+        raise NotImplementedError("Please implement this method in child class")
+
+    def rename(self, fs_src_path, fs_dst_path, overwrite=False):
+        raise NotImplementedError("Please implement this method in child class")
+
+    def makedirs(self, fs_path):
+        raise NotImplementedError("Please implement this method in child class")
+
+    def _put(self, local_path, fs_path, retry_times=5):
+        """
+        Copy a local file or directory to fs_path, or into it if fs_path is a
+        directory. Returns True or False.
+        """
+        raise NotImplementedError("Please implement this method in child class")
+
+    def _get(self, fs_path, local_path, retry_times=5):
+        """
+        Copy a file or directory to local_path, or into it if local_path is a
+        directory. Returns True or False.
+        """
+        raise NotImplementedError("Please implement this method in child class")
+
+    @staticmethod
+    def make_local_dirs(local_path):
+        """
+        create a directiory local, is same to mkdir
+
+        Args:
+            local_path(str): local path that wants to create a directiory.
+        """
+        try:
+            os.makedirs(local_path)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    @staticmethod
+    def split_files(files, trainer_id, trainers):
+        """
+        split file list
+
+        Args:
+            files(list): file list
+            trainer_id(int): trainer mpi rank id
+            trainers(int): all trainers num
+
+        Returns:
+            fileist(list): file list of current trainer
+        """
+        remainder = len(files) % trainers
+        blocksize = len(files) // trainers
+
+        blocks = [blocksize] * trainers
+        for i in range(remainder):
+            blocks[i] += 1
+
+        trainer_files = [[]] * trainers
+        begin = 0
+        for i in range(trainers):
+            trainer_files[i] = files[begin:begin + blocks[i]]
+            begin += blocks[i]
+
+        return trainer_files[trainer_id]
+
+    @staticmethod
+    def _parallel_map(func, items, multi_processes):
+        """
+        Run func on every item by a pool of at most multi_processes workers,
+        and return whether all of them succeed. The workers are threads,
+        which wait for the copies done by the file system clients.
+        """
+        if not items:
+            return True
+        pool = ThreadPool(max(1, min(multi_processes, len(items))))
+        try:
+            return all(pool.map(func, items))
+        finally:
+            pool.close()
+            pool.join()
+
+    def download(self,
+                 fs_path,
+                 local_path,
+                 multi_processes=5,
+                 overwrite=False,
+                 retry_times=5):
+        """
+        Download the files in fs_path by a pool of workers.
+
+        Args:
+            fs_path(str): path on the file system
+            local_path(str): path on local
+            multi_processes(int|5): the download data process at the same time, default=5
+            overwrite(bool): is overwrite
+            retry_times(int): retry times
+
+        Returns:
+            List:
+            Download files in local folder.
+        """
+        self.make_local_dirs(local_path)
+
+        all_files = self.ls(fs_path)
+        if not self._parallel_map(
+                lambda data: self._get(data, local_path, retry_times),
+                all_files, multi_processes):
+            _logger.error("Get local path: {} from path: {} failed".format(
+                local_path, fs_path))
+
+        _logger.info("Finish {} multi process to download datas".format(
+            multi_processes))
+
+        local_downloads = []
+        for dirname, folder, files in os.walk(local_path):
+            for i in files:
+                t = os.path.join(dirname, i)
+                local_downloads.append(t)
+        return local_downloads
+
+    def upload(self,
+               fs_path,
+               local_path,
+               multi_processes=5,
+               overwrite=False,
+               retry_times=5):
+        """
+        Upload a local file, or the files in a local directory, to fs_path by
+        a pool of workers.
+
+        Args:
+            fs_path(str): path on the file system
+            local_path(str): path on local
+            multi_processes(int|5): the upload data process at the same time, default=5
+            overwrite(bool|False): will overwrite file on the file system or not
+            retry_times(int): upload file max retry time.
+
+        Returns:
+            True or False
+        """
+
+        def get_local_files(path):
+            """
+            get local files
+
+            Args:
+                path(str): local path
+
+            Returns:
+                list of local files
+            """
+            rlist = []
+
+            if not os.path.exists(path):
+                return rlist
+
+            if os.path.isdir(path):
+                for file in os.listdir(path):
+                    t = os.path.join(path, file)
+                    rlist.append(t)
+            else:
+                rlist.append(path)
+            return rlist
+
+        all_files = get_local_files(local_path)
+        if not all_files:
+            _logger.info("there are nothing need to upload, exit")
+            return True
+
+        if overwrite and self.is_exist(fs_path):
+            self.delete(fs_path)
+            self.makedirs(fs_path)
+
+        succeed = self._parallel_map(
+            lambda data: self._put(data, fs_path, retry_times), all_files,
+            multi_processes)
+        _logger.info("Finish upload datas from {} to {}".format(local_path,
+                                                                fs_path))
+        return succeed
+
+    def upload_dir(self, dest_dir, local_dir, overwrite=False, retry_times=5):
+        """
+        upload dir to the file system
+        Args:
+            dest_dir(str): dest dir on the file system
+            local_dir(str): local dir
+            overwrite(bool): is overwrite
+            retry_times(int): upload max retry time.
+        Returns:
+            True or False
+        """
+        local_dir = local_dir.rstrip("/")
+        dest_dir = dest_dir.rstrip("/")
+        dest_path = dest_dir + "/" + os.path.basename(local_dir)
+        types = self.stat([dest_path, dest_dir])
+        if types[dest_path] is not None and overwrite:
+            self.delete(dest_path)
+        if types[dest_dir] is None:
+            self.makedirs(dest_dir)
+        if not self._put(local_dir, dest_dir, retry_times):
+            _logger.error("Put local dir: {} to dir: {} failed".format(
+                local_dir, dest_dir))
+            return False
+        return True
+
+
+class LocalFS(FS):
+    """
+    The local file system with the interface of FS, which can be used in
+    place of HDFSClient to test the code saving to and loading from HDFS.
+
+    Examples:
+        client = LocalFS()
+        client.upload("/tmp/output", "./model")
+        files = client.lsr("/tmp/output")
+    """
+
+    def stat(self, fs_paths):
+        types = {}
+        for fs_path in fs_paths:
+            if os.path.isdir(fs_path):
+                types[fs_path] = "dir"
+            elif os.path.exists(fs_path):
+                types[fs_path] = "file"
+            else:
+                types[fs_path] = None
+        return types
+
+    def cat(self, fs_path=None):
+        if not self.is_file(fs_path):
+            return ""
+        with open(fs_path) as f:
+            return f.read().strip()
+
+    def ls(self, fs_path):
+        if os.path.isdir(fs_path):
+            return [
+                os.path.join(fs_path, name)
+                for name in sorted(os.listdir(fs_path))
+            ]
+        return [fs_path] if os.path.exists(fs_path) else []
+
+    def lsr(self, fs_path, excludes=[]):
+        files = []
+        for dirname, folders, names in os.walk(fs_path):
+            folders.sort()
+            for name in sorted(names):
+                path = os.path.join(dirname, name)
+                if path not in excludes:
+                    files.append(path)
+        return files
+
+    def delete(self, fs_path):
+        if os.path.isdir(fs_path):
+            shutil.rmtree(fs_path)
+        elif os.path.exists(fs_path):
+            os.remove(fs_path)
+        return True
+
+    def rename(self, fs_src_path, fs_dst_path, overwrite=False):
+        if not os.path.exists(fs_src_path):
+            return False
+        if os.path.exists(fs_dst_path):
+            if not overwrite:
+                _logger.error("path is exist: {} and overwrite=False".format(
+                    fs_dst_path))
+                return False
+            self.delete(fs_dst_path)
+        os.rename(fs_src_path, fs_dst_path)
+        return True
+
+    def makedirs(self, fs_path):
+        self.make_local_dirs(fs_path)
+        return True
+
+    @staticmethod
+    def _copy(src, dst):
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src.rstrip("/")))
+        if not os.path.exists(src) or os.path.exists(dst):
+            return False
+        if os.path.isdir(src):
+            shutil.copytree(src, dst)
+        else:
+            shutil.copy(src, dst)
+        return True
+
+    def _put(self, local_path, fs_path, retry_times=5):
+        return self._copy(local_path, fs_path)
+
+    def _get(self, fs_path, local_path, retry_times=5):
+        return self._copy(fs_path, local_path)
+
+
+# the scheme and the authority of a path, e.g. hdfs://host:port or afs:
+_PATH_PREFIX = re.compile(r'^([a-zA-Z][\w+.-]*:(?://[^/]*)?)?(.*)$')
+_NOT_FOUND = re.compile(r'No such file or directory|does not exist')
+
+
+class HDFSClient(FS):
+    """
+    A tool of HDFS
+
+    Every command forks a hadoop client, so the types of several paths
+    queried by stat are answered by listing their parent directories in one
+    command. The listings can be cached for ls_cache_ttl seconds, or until
+    this client modifies HDFS, if the paths are not modified by others
+    meanwhile. A single path whose parent listing is not cached is tested by
+    -test, which neither lists the parent nor needs to read it. The failed
+    commands are retried after exponentially growing intervals.
 
     Args:
-        hadoop_home (string): hadoop_home 
+        hadoop_home (string): hadoop_home
         configs (dict): hadoop config, it is a dict, please contain \
             key "fs.default.name" and "hadoop.job.ugi"
-        Can be a float value
+        ls_cache_ttl (float): seconds to cache the listings of directories,
+            0 to disable the cache. Default 0.
+        retry_interval (float): seconds to wait before the first retry, the
+            interval doubles for every retry
+        max_retry_interval (float): the max seconds to wait before a retry
     Examples:
         hadoop_home = "/home/client/hadoop-client/hadoop/"
 
@@ -65,43 +431,210 @@ class HDFSClient(object):
         files = client.lsr("/user/com/train-25/models")
     """
 
-    def __init__(self, hadoop_home, configs):
+    def __init__(self,
+                 hadoop_home,
+                 configs,
+                 ls_cache_ttl=0,
+                 retry_interval=1.0,
+                 max_retry_interval=30.0):
         self.pre_commands = []
-        hadoop_bin = '%s/bin/hadoop' % hadoop_home
+        # the commands run without a shell, which expanded $HADOOP_HOME
+        hadoop_bin = '%s/bin/hadoop' % os.path.expandvars(hadoop_home)
         self.pre_commands.append(hadoop_bin)
         dfs = 'fs'
         self.pre_commands.append(dfs)
 
-        for k, v in configs.iteritems():
+        for k, v in six.iteritems(configs):
             config_command = '-D%s=%s' % (k, v)
             self.pre_commands.append(config_command)
 
+        self._ls_cache_ttl = ls_cache_ttl
+        self._retry_interval = retry_interval
+        self._max_retry_interval = max_retry_interval
+        # the key of a directory -> (the time listed, its entries)
+        self._ls_cache = {}
+        self._ls_cache_lock = threading.Lock()
+
     def __run_hdfs_cmd(self, commands, retry_times=5):
-        whole_commands = copy.deepcopy(self.pre_commands)
-        whole_commands.extend(commands)
+        whole_commands = self.pre_commands + list(commands)
 
         ret_code = 0
         ret_out = None
         ret_err = None
-        whole_commands = " ".join(whole_commands)
         for x in range(retry_times + 1):
+            if x > 0:
+                time.sleep(
+                    min(self._retry_interval * 2**(x - 1),
+                        self._max_retry_interval))
             proc = subprocess.Popen(
                 whole_commands,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                shell=True)
+                universal_newlines=True)
             (output, errors) = proc.communicate()
             ret_code, ret_out, ret_err = proc.returncode, output, errors
 
             _logger.info(
                 'Times: %d, Running command: %s. Return code: %d, Msg: %s' %
-                (x, whole_commands, proc.returncode, errors))
+                (x, " ".join(whole_commands), proc.returncode, errors))
 
-            if ret_code == 0:
+            # retrying does not help if the path does not exist
+            if ret_code == 0 or _NOT_FOUND.search(errors):
                 break
 
         return ret_code, ret_out, ret_err
 
+    @staticmethod
+    def _split_path(hdfs_path):
+        """
+        Returns the scheme and authority of hdfs_path, and its normalized
+        path, which is the key of the path in the listings.
+        """
+        prefix, path = _PATH_PREFIX.match(hdfs_path).groups()
+        if path:
+            path = posixpath.normpath(path)
+        else:
+            # the root of hdfs://host:port, or the current directory
+            path = "/" if prefix else "."
+        return prefix or "", path
+
+    def _invalidate_ls_cache(self):
+        with self._ls_cache_lock:
+            self._ls_cache.clear()
+
+    def _cached_listing(self, key, now=None):
+        """
+        Returns the entries listed of the key of a path if they are cached,
+        or None.
+        """
+        now = time.time() if now is None else now
+        with self._ls_cache_lock:
+            cached = self._ls_cache.get(key)
+        if cached is not None and now - cached[0] < self._ls_cache_ttl:
+            return cached[1]
+        return None
+
+    def _parent(self, hdfs_path):
+        """
+        Returns the parent of hdfs_path, or None for the root.
+        """
+        prefix, path = self._split_path(hdfs_path)
+        if path == "/":
+            return None
+        return prefix + (posixpath.dirname(path) or ".")
+
+    def _is_listed(self, hdfs_path):
+        parent = self._parent(hdfs_path)
+        return parent is None or \
+            self._cached_listing(self._split_path(parent)[1]) is not None
+
+    def _test(self, hdfs_path, flag):
+        """
+        Run -test with flag, e.g. -e or -d, on hdfs_path.
+        """
+        test_cmd = ['-test', flag, hdfs_path]
+        returncode, output, errors = self.__run_hdfs_cmd(
+            test_cmd, retry_times=0)
+        if returncode not in (0, 1):
+            # the client failed, rather than the test is false
+            returncode, output, errors = self.__run_hdfs_cmd(
+                test_cmd, retry_times=1)
+        return returncode == 0
+
+    def _list_dirs(self, hdfs_paths):
+        """
+        List the directories with a single ls command, except the ones whose
+        listings are cached.
+
+        Returns:
+            dict: the key of every path -> an OrderedDict from the keys of the
+            entries listed to (the path printed, "dir" or "file"), which is
+            empty if the path does not exist, or None if ls failed.
+        """
+        requested = collections.OrderedDict()
+        for hdfs_path in hdfs_paths:
+            requested[self._split_path(hdfs_path)[1]] = hdfs_path
+
+        listings = {}
+        now = time.time()
+        for key in list(requested):
+            cached = self._cached_listing(key, now)
+            if cached is not None:
+                listings[key] = cached
+                del requested[key]
+        if not requested:
+            return listings
+
+        returncode, output, errors = self.__run_hdfs_cmd(
+            ['-ls'] + list(requested.values()), retry_times=1)
+        if returncode and not _NOT_FOUND.search(errors):
+            _logger.error("HDFS list paths: {} failed".format(
+                list(requested.values())))
+            listings.update((key, None) for key in requested)
+            return listings
+
+        listed = dict((key, collections.OrderedDict()) for key in requested)
+        regex = re.compile('\s+')
+        for line in output.strip().split("\n"):
+            re_line = regex.split(line)
+            if len(re_line) != 8:
+                continue
+            path_type = "dir" if re_line[0][0] == "d" else "file"
+            key = self._split_path(re_line[7])[1]
+            entry = (re_line[7], path_type)
+            # an entry in a listed directory, or a listed file itself. The
+            # entries of the current directory are relative names.
+            parent = posixpath.dirname(key) or "."
+            if parent in listed:
+                listed[parent][key] = entry
+            if key in listed and path_type == "file":
+                listed[key][key] = entry
+
+        with self._ls_cache_lock:
+            for key, entries in six.iteritems(listed):
+                self._ls_cache[key] = (now, entries)
+        listings.update(listed)
+        return listings
+
+    def stat(self, hdfs_paths):
+        """
+        Query the types of several HDFS paths by listing their parent
+        directories in one command. A single path is tested by -test unless
+        the listing of its parent is cached.
+
+        Args:
+            hdfs_paths(list): the hdfs paths
+
+        Returns:
+            dict: maps every path to "dir", "file", or None if it does not
+            exist.
+        """
+        if len(set(hdfs_paths)) == 1 and not self._is_listed(hdfs_paths[0]):
+            hdfs_path = hdfs_paths[0]
+            if not self._test(hdfs_path, '-e'):
+                return {hdfs_path: None}
+            return {
+                hdfs_path: "dir" if self._test(hdfs_path, '-d') else "file"
+            }
+
+        parents = {}
+        for hdfs_path in hdfs_paths:
+            parent = self._parent(hdfs_path)
+            if parent is not None:
+                parents[hdfs_path] = parent
+        listings = self._list_dirs(set(parents.values()))
+
+        types = {}
+        for hdfs_path in hdfs_paths:
+            if hdfs_path not in parents:
+                types[hdfs_path] = "dir"
+                continue
+            entries = listings[self._split_path(parents[hdfs_path])[1]]
+            entry = entries.get(self._split_path(hdfs_path)[1]) \
+                if entries else None
+            types[hdfs_path] = entry[1] if entry else None
+        return types
+
     def cat(self, hdfs_path=None):
         """
         cat hdfs file
@@ -110,19 +643,17 @@ class HDFSClient(object):
         Returns:
             file content
         """
-        if self.is_file(hdfs_path):
-            exist_cmd = ['-cat', hdfs_path]
-            returncode, output, errors = self.__run_hdfs_cmd(
-                exist_cmd, retry_times=1)
-            if returncode != 0:
-                _logger.error("HDFS cat HDFS path: {} failed".format(hdfs_path))
-                return ""
-            else:
-                _logger.info("HDFS cat HDFS path: {} succeed".format(hdfs_path))
-                return output.strip()
-
-        else:
+        # not checked by the cached listings, the file may be written by
+        # others after they are listed
+        exist_cmd = ['-cat', hdfs_path]
+        returncode, output, errors = self.__run_hdfs_cmd(
+            exist_cmd, retry_times=1)
+        if returncode != 0:
+            _logger.error("HDFS cat HDFS path: {} failed".format(hdfs_path))
             return ""
+        else:
+            _logger.info("HDFS cat HDFS path: {} succeed".format(hdfs_path))
+            return output.strip()
 
     def is_exist(self, hdfs_path=None):
         """
@@ -134,18 +665,9 @@ class HDFSClient(object):
         Returns:
             True or False
         """
-        exist_cmd = ['-test', '-e', hdfs_path]
-        returncode, output, errors = self.__run_hdfs_cmd(
-            exist_cmd, retry_times=1)
-
-        if returncode:
-            _logger.error("HDFS is_exist HDFS path: {} failed".format(
-                hdfs_path))
-            return False
-        else:
-            _logger.info("HDFS is_exist HDFS path: {} successfully".format(
-                hdfs_path))
-            return True
+        if not self._is_listed(hdfs_path):
+            return self._test(hdfs_path, '-e')
+        return super(HDFSClient, self).is_exist(hdfs_path)
 
     def is_dir(self, hdfs_path=None):
         """
@@ -157,21 +679,9 @@ class HDFSClient(object):
         Returns:
             True or False
         """
-
-        if not self.is_exist(hdfs_path):
-            return False
-
-        dir_cmd = ['-test', '-d', hdfs_path]
-        returncode, output, errors = self.__run_hdfs_cmd(dir_cmd, retry_times=1)
-
-        if returncode:
-            _logger.error("HDFS path: {} failed is not a directory".format(
-                hdfs_path))
-            return False
-        else:
-            _logger.info("HDFS path: {} successfully is a directory".format(
-                hdfs_path))
-            return True
+        if not self._is_listed(hdfs_path):
+            return self._test(hdfs_path, '-d')
+        return super(HDFSClient, self).is_dir(hdfs_path)
 
     def is_file(self, hdfs_path=None):
         """
@@ -183,21 +693,7 @@ class HDFSClient(object):
         Returns:
             True or False
         """
-
-        if not self.is_exist(hdfs_path):
-            return False
-
-        dir_cmd = ['-test', '-d', hdfs_path]
-        returncode, output, errors = self.__run_hdfs_cmd(dir_cmd, retry_times=1)
-
-        if returncode == 0:
-            _logger.error("HDFS path: {} failed is not a file".format(
-                hdfs_path))
-            return False
-        else:
-            _logger.info("HDFS path: {} successfully is a file".format(
-                hdfs_path))
-            return True
+        return super(HDFSClient, self).is_file(hdfs_path)
 
     def delete(self, hdfs_path):
         """
@@ -215,16 +711,18 @@ class HDFSClient(object):
         """
         _logger.info('Deleting %r.', hdfs_path)
 
-        if not self.is_exist(hdfs_path):
+        path_type = self.stat([hdfs_path])[hdfs_path]
+        if path_type is None:
             _logger.warn("HDFS path: {} do not exist".format(hdfs_path))
             return True
 
-        if self.is_dir(hdfs_path):
+        if path_type == "dir":
             del_cmd = ['-rmr', hdfs_path]
         else:
             del_cmd = ['-rm', hdfs_path]
 
         returncode, output, errors = self.__run_hdfs_cmd(del_cmd, retry_times=0)
+        self._invalidate_ls_cache()
 
         if returncode:
             _logger.error("HDFS path: {} delete files failure".format(
@@ -250,15 +748,17 @@ class HDFSClient(object):
         assert hdfs_src_path is not None
         assert hdfs_dst_path is not None
 
-        if not self.is_exist(hdfs_src_path):
+        types = self.stat([hdfs_src_path, hdfs_dst_path])
+        if types[hdfs_src_path] is None:
             _logger.info("HDFS path do not exist: {}".format(hdfs_src_path))
-        if self.is_exist(hdfs_dst_path) and not overwrite:
+        if types[hdfs_dst_path] is not None and not overwrite:
             _logger.error("HDFS path is exist: {} and overwrite=False".format(
                 hdfs_dst_path))
 
         rename_command = ['-mv', hdfs_src_path, hdfs_dst_path]
         returncode, output, errors = self.__run_hdfs_cmd(
             rename_command, retry_times=1)
+        self._invalidate_ls_cache()
 
         if returncode:
             _logger.error("HDFS rename path: {} to {} failed".format(
@@ -269,20 +769,6 @@ class HDFSClient(object):
                 hdfs_src_path, hdfs_dst_path))
             return True
 
-    @staticmethod
-    def make_local_dirs(local_path):
-        """
-        create a directiory local, is same to mkdir
-
-        Args:
-            local_path(str): local path that wants to create a directiory.
-        """
-        try:
-            os.makedirs(local_path)
-        except OSError as e:
-            if e.errno != errno.EEXIST:
-                raise
-
     def makedirs(self, hdfs_path):
         """
         Create a remote directory, recursively if necessary.
@@ -304,6 +790,7 @@ class HDFSClient(object):
         mkdirs_commands = ['-mkdir', hdfs_path]
         returncode, output, errors = self.__run_hdfs_cmd(
             mkdirs_commands, retry_times=1)
+        self._invalidate_ls_cache()
 
         if returncode:
             _logger.error("HDFS mkdir path: {} failed".format(hdfs_path))
@@ -324,27 +811,12 @@ class HDFSClient(object):
         """
         assert hdfs_path is not None
 
-        if not self.is_exist(hdfs_path):
+        entries = self._list_dirs([hdfs_path])[self._split_path(hdfs_path)[
+            1]]
+        if entries is None:
             return []
-
-        ls_commands = ['-ls', hdfs_path]
-        returncode, output, errors = self.__run_hdfs_cmd(
-            ls_commands, retry_times=1)
-
-        if returncode:
-            _logger.error("HDFS list path: {} failed".format(hdfs_path))
-            return []
-        else:
-            _logger.info("HDFS list path: {} successfully".format(hdfs_path))
-
-            ret_lines = []
-            regex = re.compile('\s+')
-            out_lines = output.strip().split("\n")
-            for line in out_lines:
-                re_line = regex.split(line)
-                if len(re_line) == 8:
-                    ret_lines.append(re_line[7])
-            return ret_lines
+        _logger.info("HDFS list path: {} successfully".format(hdfs_path))
+        return [path for path, _ in entries.values()]
 
     def lsr(self, hdfs_path, excludes=[]):
         """
@@ -360,9 +832,6 @@ class HDFSClient(object):
 
         assert hdfs_path is not None
 
-        if not self.is_exist(hdfs_path):
-            return []
-
         ls_commands = ['-lsr', hdfs_path]
         returncode, output, errors = self.__run_hdfs_cmd(
             ls_commands, retry_times=1)
@@ -390,33 +859,26 @@ class HDFSClient(object):
             ret_lines = [ret[0] for ret in lines]
             return ret_lines
 
-    @staticmethod
-    def split_files(files, trainer_id, trainers):
-        """
-        split file list
-
-        Args:
-            files(list): file list
-            trainer_id(int): trainer mpi rank id
-            trainers(int): all trainers num
-
-        Returns:
-            fileist(list): file list of current trainer
-        """
-        remainder = len(files) % trainers
-        blocksize = len(files) / trainers
-
-        blocks = [blocksize] * trainers
-        for i in range(remainder):
-            blocks[i] += 1
-
-        trainer_files = [[]] * trainers
-        begin = 0
-        for i in range(trainers):
-            trainer_files[i] = files[begin:begin + blocks[i]]
-            begin += blocks[i]
+    def _put(self, local_path, hdfs_path, retry_times=5):
+        put_commands = ["-put", local_path, hdfs_path]
+        returncode, output, errors = self.__run_hdfs_cmd(put_commands,
+                                                         retry_times)
+        self._invalidate_ls_cache()
+        if returncode:
+            _logger.error("Put local path: {} to HDFS path: {} failed".format(
+                local_path, hdfs_path))
+            return False
+        return True
 
-        return trainer_files[trainer_id]
+    def _get(self, hdfs_path, local_path, retry_times=5):
+        download_commands = ["-get", hdfs_path, local_path]
+        returncode, output, errors = self.__run_hdfs_cmd(download_commands,
+                                                         retry_times)
+        if returncode:
+            _logger.error("Get local path: {} from HDFS path: {} failed".format(
+                local_path, hdfs_path))
+            return False
+        return True
 
     def download(self,
                  hdfs_path,
@@ -438,62 +900,8 @@ class HDFSClient(object):
             List:
             Download files in local folder.
         """
-
-        def __subprocess_download(local_path, datas):
-            """
-            download file from HDFS
-
-            Args:
-                hdfs_path(str): the hdfs file path
-                local_path(str): the local file path
-                overwrite(bool|None): will overwrite the file on HDFS or not
-                retry_times(int|5): retry times
-
-            Returns:
-                True or False
-            """
-            for data in datas:
-                download_commands = ["-get", data, local_path]
-
-                returncode, output, errors = self.__run_hdfs_cmd(
-                    download_commands, retry_times=retry_times)
-
-                if returncode:
-                    _logger.error(
-                        "Get local path: {} from HDFS path: {} failed".format(
-                            local_path, hdfs_path))
-                    return False
-            return True
-
-        self.make_local_dirs(local_path)
-
-        all_files = client.ls(hdfs_path)
-
-        procs = []
-        for i in range(multi_processes):
-            process_datas = HDFSClient.split_files(all_files, i,
-                                                   multi_processes)
-            p = multiprocessing.Process(
-                target=__subprocess_download,
-                args=(
-                    local_path,
-                    process_datas, ))
-            procs.append(p)
-            p.start()
-
-        # complete the processes
-        for proc in procs:
-            proc.join()
-
-        _logger.info("Finish {} multi process to download datas".format(
-            multi_processes))
-
-        local_downloads = []
-        for dirname, folder, files in os.walk(local_path):
-            for i in files:
-                t = os.path.join(dirname, i)
-                local_downloads.append(t)
-        return local_downloads
+        return super(HDFSClient, self).download(
+            hdfs_path, local_path, multi_processes, overwrite, retry_times)
 
     def upload(self,
                hdfs_path,
@@ -512,96 +920,10 @@ class HDFSClient(object):
             retry_times(int): upload file max retry time.
 
         Returns:
-            None
-        """
-
-        def __subprocess_upload(hdfs_path_single, datas):
-            for data in datas:
-                put_commands = ["-put", data, hdfs_path_single]
-                returncode, output, errors = self.__run_hdfs_cmd(put_commands,
-                                                                 retry_times)
-
-                if returncode:
-                    _logger.error("Put local path: {} to HDFS path: {} failed".
-                                  format(data, hdfs_path_single))
-                    return False
-            return True
-
-        def get_local_files(path):
-            """
-            get local files
-
-            Args:
-                path(str): local path
-
-            Returns:
-                list of local files
-            """
-            rlist = []
-
-            if not os.path.exists(path):
-                return rlist
-
-            if os.path.isdir(path):
-                for file in os.listdir(path):
-                    t = os.path.join(path, file)
-                    rlist.append(t)
-            else:
-                rlist.append(path)
-            return rlist
-
-        all_files = get_local_files(local_path)
-        if not all_files:
-            _logger.info("there are nothing need to upload, exit")
-            return
-
-        if self.is_exist(hdfs_path) and overwrite:
-            self.delete(hdfs_path)
-            self.makedirs(hdfs_path)
-
-        procs = []
-        for i in range(multi_processes):
-            process_datas = HDFSClient.split_files(all_files, i,
-                                                   multi_processes)
-            p = multiprocessing.Process(
-                target=__subprocess_upload, args=(
-                    hdfs_path,
-                    process_datas, ))
-            procs.append(p)
-            p.start()
-
-        # complete the processes
-        for proc in procs:
-            proc.join()
-
-        _logger.info("Finish upload datas from {} to {}".format(local_path,
-                                                                hdfs_path))
-
-    def upload_dir(self, dest_dir, local_dir, overwrite=False):
-        """
-        upload dir to hdfs
-        Args:
-            dest_dir(str): hdfs dest dir
-            local_dir(str): hdfs local dir
-            overwrite(bool): is overwrite
-        Returns:
-            return code
+            True or False
         """
-        local_dir = local_dir.rstrip("/")
-        dest_dir = dest_dir.rstrip("/")
-        local_basename = os.path.basename(local_dir)
-        if self.is_exist(dest_dir + "/" + local_basename) and overwrite:
-            self.delete(dest_dir + "/" + local_basename)
-        if not self.is_exist(dest_dir):
-            self.makedirs(dest_dir)
-        put_command = ["-put", local_dir, dest_dir]
-        returncode, output, errors = self.__run_hdfs_cmd(put_command,
-                                                         retry_times)
-        if returncode != 0:
-            _logger.error("Put local dir: {} to HDFS dir: {} failed".format(
-                local_dir, dest_dir))
-            return False
-        return True
+        return super(HDFSClient, self).upload(
+            hdfs_path, local_path, multi_processes, overwrite, retry_times)
 
 
 if __name__ == "__main__":
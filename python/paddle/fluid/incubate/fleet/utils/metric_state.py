@@ -0,0 +1,302 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Mergeable states of the auc and ctr metrics of distributed workers."""
+
+import math
+import numpy as np
+
+__all__ = ["MetricState"]
+
+
+class MetricState(object):
+    """
+    MetricState holds the auc buckets and the counters of the ctr metrics
+    (see fluid.contrib.layers.ctr_metric_bundle) of a worker. All of them are
+    sums over the instances, so the states of the workers are merged by
+    adding them together, and all_reduce packs the buckets and the counters
+    into one flat buffer to merge the states of all workers in a single
+    collective call. The metrics are computed from the merged state with
+    numpy.
+
+    Args:
+        stat_pos(numpy.ndarray): the auc positive buckets, one dimension
+        stat_neg(numpy.ndarray): the auc negative buckets, one dimension
+        sqrerr(float): sum of the squared errors
+        abserr(float): sum of the absolute errors
+        prob(float): sum of the predicted probabilities
+        q(float): sum of the predicted q values
+        pos_ins_num(float): number of positive instances
+        total_ins_num(float): number of instances
+
+    Examples:
+        .. code-block:: python
+
+          from paddle.fluid.incubate.fleet.utils.metric_state import MetricState
+          state = MetricState.from_scope(myscope, stat_pos.name, stat_neg.name)
+          global_state = state.all_reduce(fleet._role_maker)
+          print("global auc = %s" % global_state.auc())
+
+    """
+
+    COUNTERS = [
+        "sqrerr", "abserr", "prob", "q", "pos_ins_num", "total_ins_num"
+    ]
+
+    # the number of the window sums computed at a time by bucket_error
+    _WINDOW_CHUNK_SIZE = 1 << 20
+
+    def __init__(self,
+                 stat_pos,
+                 stat_neg,
+                 sqrerr=0.0,
+                 abserr=0.0,
+                 prob=0.0,
+                 q=0.0,
+                 pos_ins_num=0.0,
+                 total_ins_num=0.0):
+        self.stat_pos = np.array(stat_pos, dtype='float64').reshape(-1)
+        self.stat_neg = np.array(stat_neg, dtype='float64').reshape(-1)
+        if self.stat_pos.shape != self.stat_neg.shape:
+            raise ValueError(
+                "The positive and the negative buckets should have the same "
+                "size, but got %d and %d" %
+                (self.stat_pos.size, self.stat_neg.size))
+        self.sqrerr = np.float64(sqrerr)
+        self.abserr = np.float64(abserr)
+        self.prob = np.float64(prob)
+        self.q = np.float64(q)
+        self.pos_ins_num = np.float64(pos_ins_num)
+        self.total_ins_num = np.float64(total_ins_num)
+
+    @classmethod
+    def from_scope(cls,
+                   scope,
+                   stat_pos_name,
+                   stat_neg_name,
+                   sqrerr_name=None,
+                   abserr_name=None,
+                   prob_name=None,
+                   q_name=None,
+                   pos_ins_num_name=None,
+                   total_ins_num_name=None):
+        """
+        Read the local state of this worker from the variables in scope. The
+        counters whose names are None are zero.
+
+        Args:
+            scope(Scope): Scope object holding the variables
+            stat_pos_name(str): name of auc pos bucket Variable
+            stat_neg_name(str): name of auc neg bucket Variable
+            sqrerr_name(str): name of sqrerr Variable
+            abserr_name(str): name of abserr Variable
+            prob_name(str): name of prob Variable
+            q_name(str): name of q Variable
+            pos_ins_num_name(str): name of pos ins num Variable
+            total_ins_num_name(str): name of total ins num Variable
+
+        Returns:
+            MetricState: the local state
+        """
+
+        def get_tensor(name):
+            return np.array(scope.find_var(name).get_tensor())
+
+        counters = {}
+        for counter, name in zip(cls.COUNTERS, [
+                sqrerr_name, abserr_name, prob_name, q_name, pos_ins_num_name,
+                total_ins_num_name
+        ]):
+            if name is not None:
+                counters[counter] = get_tensor(name).reshape(-1)[0]
+        # the global auc buckets are of shape [1, num_thresholds + 1]
+        return cls(
+            get_tensor(stat_pos_name)[0], get_tensor(stat_neg_name)[0],
+            **counters)
+
+    @property
+    def num_bucket(self):
+        return self.stat_pos.size
+
+    def pack(self):
+        """
+        Pack the buckets and the counters into one flat float64 buffer.
+        """
+        return np.concatenate([
+            self.stat_pos, self.stat_neg,
+            [getattr(self, counter) for counter in self.COUNTERS]
+        ])
+
+    @classmethod
+    def unpack(cls, buffer, num_bucket):
+        """
+        Create a state from a buffer packed by pack().
+        """
+        buffer = np.asarray(buffer, dtype='float64')
+        if buffer.size != 2 * num_bucket + len(cls.COUNTERS):
+            raise ValueError("The buffer of size %d does not hold %d buckets" %
+                             (buffer.size, num_bucket))
+        return cls(buffer[:num_bucket], buffer[num_bucket:2 * num_bucket],
+                   *buffer[2 * num_bucket:])
+
+    def merge(self, other):
+        """
+        Add the buckets and the counters of another state into this one.
+
+        Args:
+            other(MetricState): a state with the same number of buckets
+        """
+        if other.num_bucket != self.num_bucket:
+            raise ValueError("Can not merge the states of %d and %d buckets" %
+                             (other.num_bucket, self.num_bucket))
+        self.stat_pos += other.stat_pos
+        self.stat_neg += other.stat_neg
+        for counter in self.COUNTERS:
+            setattr(self, counter,
+                    getattr(self, counter) + getattr(other, counter))
+
+    def all_reduce(self, role_maker):
+        """
+        Sum the states of all workers with a single all reduce of the packed
+        buffer.
+
+        Args:
+            role_maker(RoleMakerBase): the role maker of fleet, which should
+                implement _all_reduce(input, output, mode)
+
+        Returns:
+            MetricState: the global state
+        """
+        local = self.pack()
+        output = np.zeros_like(local)
+        role_maker._all_reduce(local, output, mode="sum")
+        return self.unpack(output, self.num_bucket)
+
+    def auc(self):
+        """
+        The area under the ROC curve of the buckets, 0.5 if there is no
+        positive or no negative instance.
+        """
+        # accumulate the buckets from the highest threshold to the lowest one
+        pos = np.cumsum(self.stat_pos[::-1])
+        neg = np.cumsum(self.stat_neg[::-1])
+        pos_prev = np.concatenate(([0.0], pos[:-1]))
+        neg_prev = np.concatenate(([0.0], neg[:-1]))
+        area = np.sum((neg - neg_prev) * (pos_prev + pos) / 2)
+        total_pos, total_neg = pos[-1], neg[-1]
+        if total_pos * total_neg == 0:
+            return 0.5
+        return area / (total_pos * total_neg)
+
+    def bucket_error(self, k_max_span=0.01, k_relative_error_bound=0.05):
+        """
+        The bucket error of the predicted ctr. The buckets are scanned in
+        order of the ctr and merged into windows, a window ends when its
+        impressions are enough for the relative error of its adjusted ctr to
+        be less than k_relative_error_bound, or when the ctr is more than
+        k_max_span away from the start of the window.
+        """
+        num_bucket = self.num_bucket
+        click = self.stat_pos
+        show = self.stat_pos + self.stat_neg
+        ctr = np.arange(num_bucket, dtype='float64') / num_bucket
+
+        # the sums of the windows starting at every bucket, for the offsets up
+        # to the longest span of a window, at the first offset accepted
+        max_span = int(k_max_span * num_bucket) + 2
+        chunk_size = max(1, self._WINDOW_CHUNK_SIZE // max_span)
+        has_accepted, first_accepted, span = [], [], []
+        impression, click_sum, adjust_ctr = [], [], []
+        for chunk_start in range(0, num_bucket, chunk_size):
+            starts = np.arange(chunk_start,
+                               min(chunk_start + chunk_size, num_bucket))
+            index = starts[:, None] + np.arange(max_span)
+            in_range = index < num_bucket
+            index = np.minimum(index, num_bucket - 1)
+            in_span = in_range & (
+                np.abs(ctr[index] - ctr[starts][:, None]) <= k_max_span)
+            window_show = np.where(in_range, show[index], 0)
+            window_impression = np.cumsum(window_show, axis=1)
+            window_ctr_sum = np.cumsum(ctr[index] * window_show, axis=1)
+            window_click = np.cumsum(
+                np.where(in_range, click[index], 0), axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                window_adjust_ctr = window_ctr_sum / window_impression
+                relative_error = np.sqrt((1 - window_adjust_ctr) / (
+                    window_adjust_ctr * window_impression))
+                accepted = in_span & (window_impression != 0) & (
+                    window_adjust_ctr != 0) & (
+                        relative_error < k_relative_error_bound)
+            first = accepted.argmax(axis=1)
+            rows = np.arange(starts.size)
+            has_accepted.append(accepted[rows, first])
+            first_accepted.append(first)
+            span.append(in_span.sum(axis=1))
+            impression.append(window_impression[rows, first])
+            click_sum.append(window_click[rows, first])
+            adjust_ctr.append(window_adjust_ctr[rows, first])
+
+        # follow the windows from the first bucket, a window ends at its first
+        # accepted offset, or restarts at the first bucket out of its span
+        first_accepted = np.concatenate(first_accepted).tolist()
+        span = np.concatenate(span).tolist()
+        has_accepted = np.concatenate(has_accepted).tolist()
+        windows = []
+        start = 0
+        while start < num_bucket:
+            if has_accepted[start]:
+                windows.append(start)
+                start += first_accepted[start] + 1
+            else:
+                start += span[start]
+        if not windows:
+            return 0.0
+
+        impression = np.concatenate(impression)[windows]
+        actual_ctr = np.concatenate(click_sum)[windows] / impression
+        relative_ctr_error = np.abs(actual_ctr / np.concatenate(adjust_ctr)[
+            windows] - 1)
+        return np.sum(relative_ctr_error * impression) / np.sum(impression)
+
+    def mae(self):
+        return self.abserr / self.total_ins_num
+
+    def rmse(self):
+        return math.sqrt(self.sqrerr / self.total_ins_num)
+
+    def actual_ctr(self):
+        return self.pos_ins_num / self.total_ins_num
+
+    def predicted_ctr(self):
+        return self.prob / self.total_ins_num
+
+    def mean_predict_qvalue(self):
+        return self.q / self.total_ins_num
+
+    def copc(self):
+        predicted_ctr = self.predicted_ctr()
+        if predicted_ctr > 1e-6:
+            return self.actual_ctr() / predicted_ctr
+        return 0.0
+
+    def metrics(self):
+        """
+        Returns:
+            [auc, bucket_error, mae, rmse, actual_ctr, predicted_ctr, copc,
+             mean_predict_qvalue, total_ins_num]
+        """
+        return [
+            self.auc(), self.bucket_error(), self.mae(), self.rmse(),
+            self.actual_ctr(), self.predicted_ctr(), self.copc(),
+            self.mean_predict_qvalue(), int(self.total_ins_num)
+        ]
@@ -30,6 +30,7 @@ from paddle.fluid import layers
 from paddle.fluid.executor import Executor, global_scope
 from paddle.fluid.evaluator import Evaluator
 from paddle.fluid.framework import Program, Parameter, default_main_program, default_startup_program, Variable, program_guard
+from paddle.fluid.framework import FUSED_VAR_PREFIX
 from paddle.fluid.compiler import CompiledProgram
 from paddle.fluid.log_helper import get_logger
 from . import reader
@@ -92,6 +93,9 @@ def is_persistable(var):
             var.desc.type() == core.VarDesc.VarType.FETCH_LIST or \
             var.desc.type() == core.VarDesc.VarType.READER:
         return False
+    # the fused buffers only hold the data of other persistable variables
+    if var.name.startswith(FUSED_VAR_PREFIX):
+        return False
     return var.persistable
 
 
@@ -994,6 +998,22 @@ def append_fetch_ops(inference_program,
             attrs={'col': i})
 
 
+def _get_target_scale_var(program, var, idx):
+    """
+    Get the output of the 1-scale op added on the target var by
+    save_inference_model, reuse the one added by the previous saving so that
+    saving a program again does not modify it.
+    """
+    name = "save_infer_model/scale_{}".format(idx)
+    block = program.global_block()
+    if block.has_var(name):
+        for op in block._var_producers(name):
+            if op.type == 'scale' and op.input('X') == [var.name] and \
+                    op.attr('scale') == 1. and op.attr('bias') == 0.:
+                return block.var(name)
+    return layers.scale(var, 1., name=name)
+
+
 def save_inference_model(dirname,
                          feeded_var_names,
                          target_vars,
@@ -1123,8 +1143,7 @@ def save_inference_model(dirname,
         uniq_target_vars = []
         for i, var in enumerate(target_vars):
             if isinstance(var, Variable):
-                var = layers.scale(
-                    var, 1., name="save_infer_model/scale_{}".format(i))
+                var = _get_target_scale_var(main_program, var, i)
             uniq_target_vars.append(var)
         target_vars = uniq_target_vars
     target_var_name_list = [var.name for var in target_vars]
@@ -1149,32 +1168,42 @@ def save_inference_model(dirname,
     # original program and related meta are saved so that future usage can be
     # more flexible.
 
-    origin_program = main_program.clone()
+    # main_program is not modified below, only the programs built from it
+    origin_program = main_program
 
     if export_for_deployment:
-        main_program = main_program.clone()
-        global_block = main_program.global_block()
-        need_to_remove_op_index = []
-        for i, op in enumerate(global_block.ops):
-            op.desc.set_is_target(False)
-            if op.type == "feed" or op.type == "fetch":
-                need_to_remove_op_index.append(i)
-
-        for index in need_to_remove_op_index[::-1]:
-            global_block._remove_op(index)
-
-        main_program.desc.flush()
-
-        main_program = main_program._prune_with_input(
-            feeded_var_names=feeded_var_names, targets=target_vars)
-        main_program = main_program._inference_optimize(prune_read_op=True)
-        fetch_var_names = [v.name for v in target_vars]
-
-        prepend_feed_ops(main_program, feeded_var_names)
-        append_fetch_ops(main_program, fetch_var_names)
 
-        main_program.desc._set_version()
-        paddle.fluid.core.save_op_compatible_info(main_program.desc)
+        def build_inference_program():
+            program = origin_program.clone()
+            global_block = program.global_block()
+            need_to_remove_op_index = []
+            for i, op in enumerate(global_block.ops):
+                op.desc.set_is_target(False)
+                if op.type == "feed" or op.type == "fetch":
+                    need_to_remove_op_index.append(i)
+
+            for index in need_to_remove_op_index[::-1]:
+                global_block._remove_op(index)
+
+            program.desc.flush()
+
+            program = program._prune_with_input(
+                feeded_var_names=feeded_var_names, targets=target_vars)
+            program = program._inference_optimize(prune_read_op=True)
+            fetch_var_names = [v.name for v in target_vars]
+
+            prepend_feed_ops(program, feeded_var_names)
+            append_fetch_ops(program, fetch_var_names)
+
+            program.desc._set_version()
+            paddle.fluid.core.save_op_compatible_info(program.desc)
+            return program
+
+        # saving the same program again, e.g. checkpointing in a training
+        # loop, reuses the pruned inference program
+        main_program = origin_program._memoized(
+            ("save_inference_model", tuple(feeded_var_names),
+             tuple(target_var_name_list)), build_inference_program)
         with open(model_basename, "wb") as f:
             f.write(main_program.desc.serialize_to_string())
     else:
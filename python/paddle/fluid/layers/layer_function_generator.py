@@ -14,6 +14,7 @@
 
 from __future__ import print_function
 import re
+import collections
 import functools
 import warnings
 import string
@@ -130,16 +131,28 @@ def _generate_doc_string_(op_proto,
     return buf.getvalue()
 
 
-def generate_layer_fn(op_type):
-    """Register the Python layer for an Operator.
+# The metadata of an op used to run its generated layer function:
+# inputs: the (proto name, argument name) of the inputs.
+# out_name, out_arg: the proto name and the argument name of the output.
+# intermediate_output_names: the proto names of the intermediate outputs.
+_LayerFnDesc = collections.namedtuple(
+    '_LayerFnDesc', ['inputs', 'out_name', 'out_arg',
+                     'intermediate_output_names'])
 
-    Args:
-       op_type: The name of the operator to be created.
+# op type --> _LayerFnDesc
+_layer_fn_descs = dict()
 
-    This function takes in the operator type (sigmoid, mean , average etc) and
-    creates the operator functionality.
 
+def _get_layer_fn_desc(op_type):
     """
+    Get the _LayerFnDesc of an op, which is built from its proto once and
+    shared by all its generated layer functions, to save walking the proto
+    and converting the names on every call.
+    """
+    desc = _layer_fn_descs.get(op_type)
+    if desc is not None:
+        return desc
+
     op_proto = OpProtoHolder.instance().get_op_proto(op_type)
     not_intermediate_outputs = \
         [output for output in op_proto.outputs if not output.intermediate]
@@ -160,22 +173,48 @@ def generate_layer_fn(op_type):
                              "all intermediate ops are not duplicable.")
 
     o_name = not_intermediate_outputs[0].name
-    intermediate_output_names = [output.name for output in intermediate_outputs]
+    desc = _LayerFnDesc(
+        inputs=tuple((ipt.name, _convert_(ipt.name))
+                     for ipt in op_proto.inputs),
+        out_name=o_name,
+        out_arg=_convert_(o_name),
+        intermediate_output_names=tuple(output.name
+                                        for output in intermediate_outputs))
+    _layer_fn_descs[op_type] = desc
+    return desc
+
+
+def generate_layer_fn(op_type):
+    """Register the Python layer for an Operator.
+
+    Args:
+       op_type: The name of the operator to be created.
 
-    def infer_and_check_dtype(op_proto, *args, **kwargs):
+    This function takes in the operator type (sigmoid, mean , average etc) and
+    creates the operator functionality.
+
+    """
+    op_proto = OpProtoHolder.instance().get_op_proto(op_type)
+    desc = _get_layer_fn_desc(op_type)
+
+    def collect_inputs_and_dtype(args, kwargs):
         """
-        This function performs the sanity check for dtype and
-        instance type.
+        This function collects the inputs from the arguments, and performs
+        the sanity check for dtype and instance type.
         """
+        inputs = dict()
         dtype = None
-        for ipt in op_proto.inputs:
-            name = _convert_(ipt.name)
-            val = kwargs.pop(name, [])
+        for ipt_name, arg_name in desc.inputs:
+            val = kwargs.pop(arg_name, [])
             if not isinstance(val, list) and not isinstance(val, tuple):
                 val = [val]
             if len(val) == 0:
-                val = [args[0]]
+                val = args[0]
                 args = args[1:]
+                inputs[ipt_name] = val
+                val = [val]
+            else:
+                inputs[ipt_name] = val
 
             for each in val:
                 if not isinstance(each, Variable):
@@ -198,33 +237,22 @@ def generate_layer_fn(op_type):
                     dtype = arg_dtype
             else:
                 dtype = core.VarDesc.VarType.FP32
-        return dtype
+        return inputs, dtype
 
     def func(*args, **kwargs):
         helper = LayerHelper(op_type, **kwargs)
 
-        dtype = infer_and_check_dtype(op_proto, *args, **kwargs)
-
-        inputs = dict()
-        for ipt in op_proto.inputs:
-            name = _convert_(ipt.name)
-            val = kwargs.pop(name, [])
-            if not isinstance(val, list) and not isinstance(val, tuple):
-                val = [val]
-            if len(val) == 0 and len(args) != 0:
-                val = args[0]
-                args = args[1:]
-            inputs[ipt.name] = val
+        inputs, dtype = collect_inputs_and_dtype(args, kwargs)
 
         outputs = dict()
-        out = kwargs.pop(_convert_(o_name), [])
+        out = kwargs.pop(desc.out_arg, [])
         if out:
             out_var = out[0] if (isinstance(out, list) or
                                  isinstance(out, tuple)) else out
         else:
             out_var = helper.create_variable_for_type_inference(dtype=dtype)
-        outputs[o_name] = [out_var]
-        for name in intermediate_output_names:
+        outputs[desc.out_name] = [out_var]
+        for name in desc.intermediate_output_names:
             outputs[name] = [
                 helper.create_variable_for_type_inference(dtype=dtype)
             ]
@@ -297,6 +325,46 @@ Examples:
     return func
 
 
+class _LazyLayerFunction(object):
+    """
+    The Python layer generated by :code:`generator(op_type)` on its first use,
+    i.e. the first call or the first access to its docstring. It saves
+    fetching the op protos and building the docstrings of all the generated
+    layers when importing paddle.fluid.
+
+    Args:
+       op_type: The name of the operator to be created.
+       generator: The function to generate the layer, e.g. generate_layer_fn.
+    """
+
+    def __init__(self, op_type, generator):
+        self.__name__ = op_type
+        self.__module__ = generator.__module__
+        self._op_type = op_type
+        self._generator = generator
+        self._func = None
+
+    def _materialize(self):
+        if self._func is None:
+            self._func = self._generator(self._op_type)
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self._materialize()(*args, **kwargs)
+
+    @property
+    def __doc__(self):
+        return self._materialize().__doc__
+
+    @property
+    def __wrapped__(self):
+        # used by inspect.signature to show the arguments of the layer
+        return self._materialize()
+
+    def __repr__(self):
+        return "<generated layer function %s>" % self.__name__
+
+
 def deprecated(func_or_class):
     """
     Deprecated warning decorator. It will result a warning message.
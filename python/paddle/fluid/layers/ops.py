@@ -15,6 +15,7 @@
 from __future__ import print_function
 import os
 from .layer_function_generator import generate_layer_fn, generate_activation_fn
+from .layer_function_generator import _LazyLayerFunction
 from .. import core
 from ..framework import convert_np_dtype_to_dtype_
 
@@ -43,24 +44,26 @@ __activations_noattr__ = [
 
 __all__ = []
 
+# The layers are generated on their first use, see _LazyLayerFunction
 for _OP in set(__all__):
-    globals()[_OP] = generate_layer_fn(_OP)
+    globals()[_OP] = _LazyLayerFunction(_OP, generate_layer_fn)
 
 # It is a hot fix in some unittest using:
 #   fluid.layers.scale(x=x, scale=10.0, out=out_var)
 # e.g.: test_program_code.py, test_dist_train.py
-globals()['_scale'] = generate_layer_fn('scale')
+globals()['_scale'] = _LazyLayerFunction('scale', generate_layer_fn)
 
-globals()['_elementwise_div'] = generate_layer_fn('elementwise_div')
+globals()['_elementwise_div'] = _LazyLayerFunction('elementwise_div',
+                                                 generate_layer_fn)
 
 __all__ += __activations_noattr__
 
 for _OP in set(__activations_noattr__):
-    globals()[_OP] = generate_activation_fn(_OP)
+    globals()[_OP] = _LazyLayerFunction(_OP, generate_activation_fn)
 
 __all__ += ['softshrink']
 
-_softshrink_ = generate_layer_fn('softshrink')
+_softshrink_ = _LazyLayerFunction('softshrink', generate_layer_fn)
 
 
 def softshrink(x, alpha=None):
@@ -103,29 +106,34 @@ Examples:
 
 __all__ += ['hard_shrink']
 
-_hard_shrink_ = generate_layer_fn('hard_shrink')
+_hard_shrink_ = _LazyLayerFunction('hard_shrink', generate_layer_fn)
 
 
-def hard_shrink(x, threshold=None):
-    locals_var = locals().copy()
-    kwargs = dict()
-    for name, val in locals_var.items():
-        if val is not None:
-            kwargs[name] = val
-    return _hard_shrink_(**kwargs)
-
+def _generate_hard_shrink(op_type):
+    def hard_shrink(x, threshold=None):
+        locals_var = locals().copy()
+        kwargs = dict()
+        for name, val in locals_var.items():
+            if val is not None:
+                kwargs[name] = val
+        return _hard_shrink_(**kwargs)
 
-hard_shrink.__doc__ = _hard_shrink_.__doc__ + """
+    hard_shrink.__doc__ = _hard_shrink_.__doc__ + """
 Examples:
 
     >>> import paddle.fluid as fluid
     >>> data = fluid.layers.data(name="input", shape=[784])
     >>> result = fluid.layers.hard_shrink(x=data, threshold=0.3)
 """
+    return hard_shrink
+
+
+# the docstring is extended from the one of the generated layer
+hard_shrink = _LazyLayerFunction('hard_shrink', _generate_hard_shrink)
 
 __all__ += ['cumsum']
 
-_cum_sum_ = generate_layer_fn('cumsum')
+_cum_sum_ = _LazyLayerFunction('cumsum', generate_layer_fn)
 
 
 def cumsum(x, axis=None, exclusive=None, reverse=None):
@@ -159,7 +167,8 @@ Examples:
 
 __all__ += ['thresholded_relu']
 
-_thresholded_relu_ = generate_layer_fn('thresholded_relu')
+_thresholded_relu_ = _LazyLayerFunction('thresholded_relu',
+                                        generate_layer_fn)
 
 
 def thresholded_relu(x, threshold=None):
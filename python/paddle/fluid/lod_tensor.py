@@ -15,7 +15,7 @@
 from __future__ import print_function
 
 from . import core
-from .data_feeder import DataToLoDTensorConverter
+from .data_feeder import _flatten_sequences
 import numpy as np
 
 __all__ = ['create_lod_tensor', 'create_random_int_lodtensor']
@@ -72,24 +72,12 @@ def create_lod_tensor(data, recursive_seq_lens, place):
     if isinstance(data, core.LoDTensor):
         return create_lod_tensor(np.array(data), recursive_seq_lens, place)
     elif isinstance(data, list):
-        # dtype and shape are not important here,
-        # we only want to reuse code of DataToLoDTensorConverter
-        converter = DataToLoDTensorConverter(
-            place=place,
-            lod_level=len(recursive_seq_lens),
-            shape=[],
-            dtype=core.VarDesc.VarType.FP32)
-
-        new_recursive_seq_lens = []
-        for seq in data:
-            new_recursive_seq_lens.append(len(seq))
-            converter.feed(seq)
-
-        assert [
-            new_recursive_seq_lens
-        ] == recursive_seq_lens, "data and recursive_seq_lens do not match"
-
-        arr = np.array(converter.data)
+        # dtype is inferred from data here, we only want to reuse the
+        # flattening code of DataToLoDTensorConverter
+        arr, new_recursive_seq_lens = _flatten_sequences(data, 1)
+
+        assert new_recursive_seq_lens == recursive_seq_lens, \
+            "data and recursive_seq_lens do not match"
 
         # FIXME(zjl): the original logic of create_lod_tensor would append
         # 1 to the shape. Maybe it is not a right way? Currently, we only
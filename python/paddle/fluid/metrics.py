@@ -118,12 +118,7 @@ class MetricBase(object):
             None
 
         """
-        states = {
-            attr: value
-            for attr, value in six.iteritems(self.__dict__)
-            if not attr.startswith("_")
-        }
-        for attr, value in six.iteritems(states):
+        for attr, value in six.iteritems(self._get_states()):
             if isinstance(value, int):
                 setattr(self, attr, 0)
             elif isinstance(value, float):
@@ -147,14 +142,43 @@ class MetricBase(object):
         Return types:
             a python dict
         """
-        states = {
+        config = {}
+        config.update({
+            "name": self._name,
+            "states": copy.deepcopy(self._get_states())
+        })
+        return config
+
+    def _get_states(self):
+        return {
             attr: value
             for attr, value in six.iteritems(self.__dict__)
             if not attr.startswith("_")
         }
-        config = {}
-        config.update({"name": self._name, "states": copy.deepcopy(states)})
-        return config
+
+    def merge(self, other):
+        """
+        Merge the evaluation memory of another metric instance of the same
+        class into this one, so that the partial metrics accumulated by
+        several threads or processes, e.g. after being pickled, can be
+        combined and evaluated once. The states of this class are sums over
+        the mini-batches, so they are added together.
+
+        Args:
+            other(MetricBase): a metric instance of the same class.
+
+        Returns:
+            None
+
+        Return types:
+            None
+
+        """
+        if type(other) is not type(self):
+            raise ValueError("Can not merge a %s metric into a %s metric." %
+                             (type(other).__name__, type(self).__name__))
+        for attr, value in six.iteritems(self._get_states()):
+            setattr(self, attr, value + getattr(other, attr))
 
     def update(self, preds, labels):
         """
@@ -268,6 +292,21 @@ class CompositeMetric(MetricBase):
             ans.append(m.eval())
         return ans
 
+    def merge(self, other):
+        """
+        Merge the metrics of another container with the same added metrics
+        into the metrics of this container.
+
+        Args:
+            other(CompositeMetric): a container with the same added metrics.
+        """
+        if not isinstance(other, CompositeMetric) or len(other._metrics) != len(
+                self._metrics):
+            raise ValueError(
+                "Can only merge a CompositeMetric with the same metrics.")
+        for m, other_m in zip(self._metrics, other._metrics):
+            m.merge(other_m)
+
 
 class Precision(MetricBase):
     """
@@ -326,17 +365,13 @@ class Precision(MetricBase):
             raise ValueError("The 'preds' must be a numpy ndarray.")
         if not _is_numpy_(labels):
             raise ValueError("The 'labels' must be a numpy ndarray.")
-        sample_num = labels.shape[0]
-        preds = np.rint(preds).astype("int32")
-
-        for i in range(sample_num):
-            pred = preds[i]
-            label = labels[i]
-            if pred == 1:
-                if pred == label:
-                    self.tp += 1
-                else:
-                    self.fp += 1
+        preds = np.rint(preds).astype("int32").reshape(-1)
+        labels = labels.reshape(-1)
+
+        pos = preds == 1
+        tp = int(np.count_nonzero(pos & (labels == 1)))
+        self.tp += tp
+        self.fp += int(np.count_nonzero(pos)) - tp
 
     def eval(self):
         """
@@ -409,17 +444,13 @@ class Recall(MetricBase):
             raise ValueError("The 'preds' must be a numpy ndarray.")
         if not _is_numpy_(labels):
             raise ValueError("The 'labels' must be a numpy ndarray.")
-        sample_num = labels.shape[0]
-        preds = np.rint(preds).astype("int32")
-
-        for i in range(sample_num):
-            pred = preds[i]
-            label = labels[i]
-            if label == 1:
-                if pred == label:
-                    self.tp += 1
-                else:
-                    self.fn += 1
+        preds = np.rint(preds).astype("int32").reshape(-1)
+        labels = labels.reshape(-1)
+
+        pos = labels == 1
+        tp = int(np.count_nonzero(pos & (preds == 1)))
+        self.tp += tp
+        self.fn += int(np.count_nonzero(pos)) - tp
 
     def eval(self):
         """
@@ -675,7 +706,7 @@ class EditDistance(MetricBase):
             raise ValueError("The 'distances' must be a numpy ndarray.")
         if not _is_number_(seq_num):
             raise ValueError("The 'seq_num' must be a number(int, float).")
-        seq_right_count = np.sum(distances == 0)
+        seq_right_count = np.count_nonzero(distances == 0)
         total_distance = np.sum(distances)
         self.seq_num += seq_num
         self.instance_error += seq_num - seq_right_count
@@ -700,8 +731,8 @@ class Auc(MetricBase):
     """
     The auc metric is for binary classification.
     Refer to https://en.wikipedia.org/wiki/Receiver_operating_characteristic#Area_under_the_curve.
-    Please notice that the auc metric is implemented with python, which may be a little bit slow.
-    If you concern the speed, please use the fluid.layers.auc instead.
+    Please notice that the auc metric is implemented with numpy on the host. If you want to
+    compute it in the program, please use the fluid.layers.auc instead.
 
     The `auc` function creates four local variables, `true_positives`,
     `true_negatives`, `false_positives` and `false_negatives` that are used to
@@ -749,8 +780,8 @@ class Auc(MetricBase):
         self._num_thresholds = num_thresholds
 
         _num_pred_buckets = num_thresholds + 1
-        self._stat_pos = [0] * _num_pred_buckets
-        self._stat_neg = [0] * _num_pred_buckets
+        self._stat_pos = np.zeros(_num_pred_buckets, dtype='int64')
+        self._stat_neg = np.zeros(_num_pred_buckets, dtype='int64')
 
     def update(self, preds, labels):
         """
@@ -765,14 +796,30 @@ class Auc(MetricBase):
         if not _is_numpy_(preds):
             raise ValueError("The 'predictions' must be a numpy ndarray.")
 
-        for i, lbl in enumerate(labels):
-            value = preds[i, 1]
-            bin_idx = int(value * self._num_thresholds)
-            assert bin_idx <= self._num_thresholds
-            if lbl:
-                self._stat_pos[bin_idx] += 1.0
-            else:
-                self._stat_neg[bin_idx] += 1.0
+        labels = labels.reshape(-1) != 0
+        bin_idx = (preds[:labels.shape[0], 1] *
+                   self._num_thresholds).astype('int64')
+        assert bin_idx.size == 0 or bin_idx.max() <= self._num_thresholds
+        num_buckets = self._num_thresholds + 1
+        self._stat_pos += np.bincount(bin_idx[labels], minlength=num_buckets)
+        self._stat_neg += np.bincount(bin_idx[~labels], minlength=num_buckets)
+
+    def merge(self, other):
+        """
+        Merge the buckets of another auc metric with the same curve and the
+        same number of thresholds into the buckets of this one.
+
+        Args:
+            other(Auc): an auc metric instance.
+        """
+        super(Auc, self).merge(other)
+        if (other._curve, other._num_thresholds) != (self._curve,
+                                                     self._num_thresholds):
+            raise ValueError(
+                "Can not merge auc metrics with different curves or numbers "
+                "of thresholds.")
+        self._stat_pos += other._stat_pos
+        self._stat_neg += other._stat_neg
 
     @staticmethod
     def trapezoid_area(x1, x2, y1, y2):
@@ -785,20 +832,18 @@ class Auc(MetricBase):
         Return:
             float: the area under auc curve
         """
-        tot_pos = 0.0
-        tot_neg = 0.0
-        auc = 0.0
-
-        idx = self._num_thresholds
-        while idx >= 0:
-            tot_pos_prev = tot_pos
-            tot_neg_prev = tot_neg
-            tot_pos += self._stat_pos[idx]
-            tot_neg += self._stat_neg[idx]
-            auc += self.trapezoid_area(tot_neg, tot_neg_prev, tot_pos,
-                                       tot_pos_prev)
-            idx -= 1
-
+        # accumulate the buckets from the highest threshold to the lowest one
+        tot_pos = np.cumsum(self._stat_pos[::-1], dtype='float64')
+        tot_neg = np.cumsum(self._stat_neg[::-1], dtype='float64')
+        tot_pos_prev = np.concatenate(([0.0], tot_pos[:-1]))
+        tot_neg_prev = np.concatenate(([0.0], tot_neg[:-1]))
+        auc = float(
+            np.sum(
+                self.trapezoid_area(tot_neg, tot_neg_prev, tot_pos,
+                                    tot_pos_prev)))
+
+        tot_pos = tot_pos[-1]
+        tot_neg = tot_neg[-1]
         return auc / tot_pos / tot_neg if tot_pos > 0.0 and tot_neg > 0.0 else 0.0
 
 
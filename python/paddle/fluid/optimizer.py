@@ -15,10 +15,11 @@
 from __future__ import print_function
 
 import numpy as np
-from collections import defaultdict
+from collections import defaultdict, namedtuple, OrderedDict
 
 from paddle.fluid.distribute_lookup_table import find_distributed_lookup_table
 from paddle.fluid.framework import Program, Variable, name_scope, default_main_program, default_startup_program
+from paddle.fluid.framework import FUSED_VAR_PREFIX
 
 from . import framework
 from . import layers
@@ -50,6 +51,12 @@ __all__ = [
     'RecomputeOptimizer'
 ]
 
+# The parameters updated together in the fused update mode. param, grad and
+# accumulators are the contiguous buffers the group is coalesced into, param
+# and grad are None if the parameters and gradients are not coalesced.
+_FusedUpdateGroup = namedtuple(
+    '_FusedUpdateGroup', ['params_grads', 'param', 'grad', 'accumulators'])
+
 
 class Optimizer(object):
     """Optimizer Base class.
@@ -97,6 +104,10 @@ class Optimizer(object):
         self.helper = None
         self._opti_name_list = []
         self._accumulators_holder = {}
+        # Whether to update the dense parameters in groups, which is only
+        # supported by some optimizers, see _create_fused_groups.
+        self._fuse_update = False
+        self._fused_groups = []
 
     @framework.dygraph_only
     def state_dict(self):
@@ -382,6 +393,107 @@ class Optimizer(object):
                             format(name, param.name))
         return self._accumulators[name][param.name]
 
+    # The accumulators coalesced into contiguous buffers in the fused update
+    # mode, and whether the parameters and gradients are coalesced too.
+    _fused_accumulator_strs = []
+    _fuse_params = True
+
+    def _fused_update_key(self, param):
+        """The attributes of the optimize op of a parameter besides its dtype
+        and learning rate, which are the same in a fused update group.
+        """
+        return ()
+
+    def _append_fused_optimize_op(self, block, group):
+        """ append the optimize operator to update a _FusedUpdateGroup
+        """
+        raise NotImplementedError()
+
+    def _create_fused_groups(self, block, parameters_and_grads):
+        """Group the parameters with dense gradients by dtype and the
+        attributes of their optimize op, and coalesce each group into
+        contiguous buffers, which are updated by one optimize op.
+
+        The parameters and accumulators are coalesced once by the startup
+        program, after which they are views of the fused buffers, and the
+        gradients are coalesced by the main program in every step.
+
+        Args:
+            block: the block in which the loss variable is present
+            parameters_and_grads: list of (parameter, gradient) pairs
+
+        Returns:
+            list: the (parameter, gradient) pairs to update one by one.
+        """
+        groups = OrderedDict()
+        for param, grad in parameters_and_grads:
+            if grad is None or param.trainable is False:
+                continue
+            # the sparse gradients only update some rows of the parameters
+            if grad.type != core.VarDesc.VarType.LOD_TENSOR:
+                continue
+            param_lr = param.optimize_attr['learning_rate']
+            if isinstance(param_lr, Variable):
+                param_lr = param_lr.name
+            key = (param.dtype, param_lr) + self._fused_update_key(param)
+            groups.setdefault(key, []).append((param, grad))
+
+        fused_params = set()
+        for params_grads in groups.values():
+            if len(params_grads) < 2:
+                continue
+            self._fused_groups.append(
+                self._coalesce_group(block, params_grads))
+            fused_params.update(param.name for param, _ in params_grads)
+        return [(param, grad) for param, grad in parameters_and_grads
+                if param.name not in fused_params]
+
+    def _coalesce_group(self, block, params_grads):
+        params = [param for param, _ in params_grads]
+        startup_block = self.helper.startup_program.global_block()
+
+        def fused_var(block, name, vars, persistable):
+            return block.create_var(
+                name=name,
+                dtype=vars[0].dtype,
+                shape=[sum(int(np.prod(var.shape)) for var in vars)],
+                persistable=persistable)
+
+        def coalesce(vars, key):
+            name = unique_name.generate("_".join(
+                [FUSED_VAR_PREFIX, self.type, key, params[0].name]))
+            fused = fused_var(startup_block, name, vars, True)
+            startup_vars = [startup_block.var(var.name) for var in vars]
+            startup_block.append_op(
+                type='coalesce_tensor',
+                inputs={'Input': startup_vars},
+                outputs={'Output': startup_vars,
+                         'FusedOutput': fused},
+                attrs={
+                    'copy_data': True,
+                    'check_name': True,
+                    'dtype': fused.dtype
+                })
+            return fused_var(block, name, vars, True)
+
+        accumulators = dict()
+        for acc_str in self._fused_accumulator_strs:
+            accumulators[acc_str] = coalesce(
+                [self._get_accumulator(acc_str, param) for param in params],
+                acc_str)
+        if not self._fuse_params:
+            return _FusedUpdateGroup(params_grads, None, None, accumulators)
+
+        grads = [grad for _, grad in params_grads]
+        fused_grad = fused_var(
+            block,
+            unique_name.generate("_".join(
+                [FUSED_VAR_PREFIX, self.type, "grad", params[0].name])),
+            grads, False)
+        return _FusedUpdateGroup(params_grads,
+                                 coalesce(params, "param"), fused_grad,
+                                 accumulators)
+
     def _create_optimization_pass(self, parameters_and_grads):
         """Add optimization operators to update gradients to variables.
 
@@ -410,6 +522,7 @@ class Optimizer(object):
             global_block,
             [p[0] for p in parameters_and_grads if p[0].trainable])
         self._create_global_learning_rate()
+        self._fused_groups = []
 
         optimize_ops = []
         if framework.in_dygraph_mode():
@@ -423,6 +536,29 @@ class Optimizer(object):
                                                                param_and_grad)
                         optimize_ops.append(optimize_op)
         else:
+            if self._fuse_update:
+                parameters_and_grads = self._create_fused_groups(
+                    global_block, parameters_and_grads)
+            for group in self._fused_groups:
+                role_vars = [var for p_g in group.params_grads for var in p_g]
+                with global_block.program._optimized_guard(
+                        role_vars), name_scope("optimizer"):
+                    if group.grad is not None:
+                        grads = [grad for _, grad in group.params_grads]
+                        global_block.append_op(
+                            type='coalesce_tensor',
+                            inputs={'Input': grads},
+                            outputs={'Output': grads,
+                                     'FusedOutput': group.grad},
+                            attrs={
+                                'copy_data': True,
+                                'check_name': True,
+                                'dtype': group.grad.dtype
+                            },
+                            stop_gradient=True)
+                    optimize_op = self._append_fused_optimize_op(global_block,
+                                                                 group)
+                    optimize_ops.append(optimize_op)
             for param_and_grad in parameters_and_grads:
                 if param_and_grad[1] is None:
                     continue
@@ -702,6 +838,11 @@ class SGDOptimizer(Optimizer):
             Optional, default is None.
         name (str, optional): This parameter is used by developers to print debugging information. \
             For details, please refer to :ref:`api_guide_Name`. Default is None.
+        fuse_update (bool, optional): Whether to update the parameters of the same dtype and \
+            learning rate with dense gradients by one op, over their parameters, gradients and \
+            accumulators coalesced into contiguous buffers, which saves launching many small ops \
+            for a model with many parameters. The fused update only works with the Executor or \
+            a single-device CompiledProgram. Default is False.
 
     Examples:
         .. code-block:: python
@@ -733,13 +874,18 @@ class SGDOptimizer(Optimizer):
 
     """
 
-    def __init__(self, learning_rate, regularization=None, name=None):
+    def __init__(self,
+                 learning_rate,
+                 regularization=None,
+                 name=None,
+                 fuse_update=False):
         assert learning_rate is not None
         super(SGDOptimizer, self).__init__(
             learning_rate=learning_rate,
             regularization=regularization,
             name=name)
         self.type = "sgd"
+        self._fuse_update = fuse_update
 
     def _append_optimize_op(self, block, param_and_grad):
         assert isinstance(block, framework.Block)
@@ -757,6 +903,22 @@ class SGDOptimizer(Optimizer):
 
         return sgd_op
 
+    def _append_fused_optimize_op(self, block, group):
+        assert isinstance(block, framework.Block)
+
+        # create the optimize op of the fused parameters
+        sgd_op = block.append_op(
+            type=self.type,
+            inputs={
+                "Param": group.param,
+                "Grad": group.grad,
+                "LearningRate": self._create_param_lr(group.params_grads[0])
+            },
+            outputs={"ParamOut": group.param},
+            stop_gradient=True)
+
+        return sgd_op
+
 
 class MomentumOptimizer(Optimizer):
     """
@@ -788,6 +950,11 @@ class MomentumOptimizer(Optimizer):
             Optional, default is None.
         name (str, optional): This parameter is used by developers to print debugging information. \
             For details, please refer to :ref:`api_guide_Name`. Default is None.
+        fuse_update (bool, optional): Whether to update the parameters of the same dtype and \
+            learning rate with dense gradients by one op, over their parameters, gradients and \
+            velocities coalesced into contiguous buffers, which saves launching many small ops \
+            for a model with many parameters. The fused update only works with the Executor or \
+            a single-device CompiledProgram. Default is False.
 
     Examples:
         .. code-block:: python
@@ -819,13 +986,15 @@ class MomentumOptimizer(Optimizer):
 
     """
     _velocity_acc_str = "velocity"
+    _fused_accumulator_strs = [_velocity_acc_str]
 
     def __init__(self,
                  learning_rate,
                  momentum,
                  use_nesterov=False,
                  regularization=None,
-                 name=None):
+                 name=None,
+                 fuse_update=False):
         assert learning_rate is not None
         assert momentum is not None
         super(MomentumOptimizer, self).__init__(
@@ -835,6 +1004,7 @@ class MomentumOptimizer(Optimizer):
         self.type = "momentum"
         self._momentum = momentum
         self._use_nesterov = bool(use_nesterov)
+        self._fuse_update = fuse_update
 
     def _create_accumulators(self, block, parameters):
         assert isinstance(block, framework.Block)
@@ -866,6 +1036,27 @@ class MomentumOptimizer(Optimizer):
 
         return momentum_op
 
+    def _append_fused_optimize_op(self, block, group):
+        assert isinstance(block, framework.Block)
+
+        velocity_acc = group.accumulators[self._velocity_acc_str]
+        # create the momentum optimize op of the fused parameters
+        momentum_op = block.append_op(
+            type=self.type,
+            inputs={
+                "Param": group.param,
+                "Grad": group.grad,
+                "Velocity": velocity_acc,
+                "LearningRate": self._create_param_lr(group.params_grads[0])
+            },
+            outputs={"ParamOut": group.param,
+                     "VelocityOut": velocity_acc},
+            attrs={"mu": self._momentum,
+                   "use_nesterov": self._use_nesterov},
+            stop_gradient=True)
+
+        return momentum_op
+
 
 class DGCMomentumOptimizer(MomentumOptimizer):
     """
@@ -1384,6 +1575,11 @@ class AdamOptimizer(Optimizer):
             gradient in current mini-batch, so it will be much more faster. But this mode has
             different semantics with the original Adam algorithm and may lead to different result.
             The default value is False.
+        fuse_update (bool, optional): Whether to update the parameters of the same dtype and
+            learning rate with dense gradients by one op, over their parameters, gradients and
+            accumulators coalesced into contiguous buffers, which saves launching many small ops
+            for a model with many parameters. The fused update only works with the Executor or
+            a single-device CompiledProgram. The default value is False.
 
     Examples:
         .. code-block:: python
@@ -1417,6 +1613,10 @@ class AdamOptimizer(Optimizer):
     _moment2_acc_str = "moment2"
     _beta1_pow_acc_str = "beta1_pow_acc"
     _beta2_pow_acc_str = "beta2_pow_acc"
+    _fused_accumulator_strs = [
+        _moment1_acc_str, _moment2_acc_str, _beta1_pow_acc_str,
+        _beta2_pow_acc_str
+    ]
 
     def __init__(self,
                  learning_rate=0.001,
@@ -1425,7 +1625,8 @@ class AdamOptimizer(Optimizer):
                  epsilon=1e-8,
                  regularization=None,
                  name=None,
-                 lazy_mode=False):
+                 lazy_mode=False,
+                 fuse_update=False):
         assert learning_rate is not None
         assert beta1 is not None
         assert beta2 is not None
@@ -1439,6 +1640,7 @@ class AdamOptimizer(Optimizer):
         self._beta2 = beta2
         self._epsilon = epsilon
         self._lazy_mode = lazy_mode
+        self._fuse_update = fuse_update
 
     def _create_accumulators(self, block, parameters):
         assert isinstance(block, framework.Block)
@@ -1500,11 +1702,64 @@ class AdamOptimizer(Optimizer):
 
         return adam_op
 
+    def _append_fused_optimize_op(self, block, group):
+        assert isinstance(block, framework.Block)
+
+        moment1 = group.accumulators[self._moment1_acc_str]
+        moment2 = group.accumulators[self._moment2_acc_str]
+        # the beta power accumulators of a group are always the same, and the
+        # op takes one value of them
+        param = group.params_grads[0][0]
+        beta1_pow_acc = self._get_accumulator(self._beta1_pow_acc_str, param)
+        beta2_pow_acc = self._get_accumulator(self._beta2_pow_acc_str, param)
+
+        # create the adam optimize op of the fused parameters
+        adam_op = block.append_op(
+            type=self.type,
+            inputs={
+                "Param": group.param,
+                "Grad": group.grad,
+                "LearningRate": self._create_param_lr(group.params_grads[0]),
+                "Moment1": moment1,
+                "Moment2": moment2,
+                "Beta1Pow": beta1_pow_acc,
+                "Beta2Pow": beta2_pow_acc
+            },
+            outputs={
+                "ParamOut": group.param,
+                "Moment1Out": moment1,
+                "Moment2Out": moment2
+            },
+            attrs={
+                "beta1": self._beta1,
+                "beta2": self._beta2,
+                "epsilon": self._epsilon,
+                "lazy_mode": self._lazy_mode,
+                "min_row_size_to_use_multithread": 1000
+            },
+            stop_gradient=True)
+
+        return adam_op
+
     def _finish_update(self, block, param_and_grads):
         """Update Beta1 and Beta2 Power accumulators
         """
         assert isinstance(block, framework.Block)
         main_block = block.program.global_block()
+        for group in self._fused_groups:
+            role_vars = [var for p_g in group.params_grads for var in p_g]
+            with main_block.program._optimized_guard(
+                    role_vars), name_scope("optimizer"):
+                # scale the coalesced beta power accumulators of the group
+                for acc_str, beta in [(self._beta1_pow_acc_str, self._beta1),
+                                      (self._beta2_pow_acc_str, self._beta2)]:
+                    beta_pow_acc = group.accumulators[acc_str]
+                    main_block.append_op(
+                        type="scale",
+                        inputs={"X": beta_pow_acc},
+                        outputs={"Out": beta_pow_acc},
+                        attrs={"scale": beta},
+                        stop_gradient=True)
         for param, grad in param_and_grads:
             if grad is None or param.trainable is False:
                 continue
@@ -2329,6 +2584,11 @@ class LambOptimizer(AdamOptimizer):
             Default None.
         name(str|None): For detailed information, please refer to 
             :ref:`api_guide_Name` . Usually name is no need to set and None by default.
+        fuse_update (bool, optional): Whether to update the parameters of the same dtype,
+            learning rate and weight decay with dense gradients in groups. Since the trust
+            ratio of LAMB is computed per parameter, each parameter is still updated by one
+            op, while the beta power accumulators of a group are coalesced into a contiguous
+            buffer and updated by one op. Default False.
 
     Examples:
         .. code-block:: python
@@ -2351,6 +2611,8 @@ class LambOptimizer(AdamOptimizer):
     # these two not used in op temporarily
     _beta1_pow_acc_str = "beta1_pow_acc"
     _beta2_pow_acc_str = "beta2_pow_acc"
+    _fused_accumulator_strs = [_beta1_pow_acc_str, _beta2_pow_acc_str]
+    _fuse_params = False
 
     def __init__(self,
                  learning_rate=0.001,
@@ -2360,7 +2622,8 @@ class LambOptimizer(AdamOptimizer):
                  epsilon=1e-6,
                  regularization=None,
                  exclude_from_weight_decay_fn=None,
-                 name=None):
+                 name=None,
+                 fuse_update=False):
         assert learning_rate is not None
         assert lamb_weight_decay is not None
         assert beta1 is not None
@@ -2372,11 +2635,28 @@ class LambOptimizer(AdamOptimizer):
             beta1=beta1,
             beta2=beta2,
             epsilon=epsilon,
-            name=name)
+            name=name,
+            fuse_update=fuse_update)
         self.type = "lamb"
         self._weight_decay = lamb_weight_decay
         self._exclude_from_weight_decay_fn = exclude_from_weight_decay_fn
 
+    def _weight_decay_of(self, param):
+        if self._exclude_from_weight_decay_fn is not None \
+            and self._exclude_from_weight_decay_fn(param):
+            return 0.0
+        return self._weight_decay
+
+    def _fused_update_key(self, param):
+        return (self._weight_decay_of(param), )
+
+    def _append_fused_optimize_op(self, block, group):
+        # the trust ratio is computed per parameter, so a group is updated by
+        # one op per parameter
+        for param_and_grad in group.params_grads:
+            lamb_op = self._append_optimize_op(block, param_and_grad)
+        return lamb_op
+
     def _append_optimize_op(self, block, param_and_grad):
         assert isinstance(block, framework.Block)
         block.program._use_lamb = True
@@ -2390,11 +2670,7 @@ class LambOptimizer(AdamOptimizer):
         beta2_pow_acc = self._get_accumulator(self._beta2_pow_acc_str,
                                               param_and_grad[0])
 
-        if self._exclude_from_weight_decay_fn is not None \
-            and self._exclude_from_weight_decay_fn(param_and_grad[0]):
-            weight_decay = 0.0
-        else:
-            weight_decay = self._weight_decay
+        weight_decay = self._weight_decay_of(param_and_grad[0])
 
         # create the lamb optimize op
         lamb_op = block.append_op(
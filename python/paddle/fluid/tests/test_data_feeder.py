@@ -14,6 +14,7 @@
 
 from __future__ import print_function
 
+import numpy as np
 import paddle.fluid as fluid
 import unittest
 
@@ -36,6 +37,24 @@ class TestDataFeeder(unittest.TestCase):
         except ValueError:
             self.assertTrue(True)
 
+    def test_lod_level_0_converter_reuse_buffer(self):
+        img = fluid.layers.data(name='image', shape=[2, 3])
+        label = fluid.layers.data(name='label', shape=[1], dtype='int64')
+        feeder = fluid.DataFeeder([img, label], fluid.CPUPlace())
+        samples = [(np.arange(6) + i, i) for i in range(20)]
+        first = feeder.feed(samples)
+        second = feeder.feed(samples[:3])
+
+        self.assertEqual(first['image'].shape(), [20, 2, 3])
+        self.assertEqual(second['image'].shape(), [3, 2, 3])
+        expected = np.array([s[0] for s in samples]).reshape([20, 2, 3])
+        self.assertTrue(np.array_equal(np.array(first['image']), expected))
+        self.assertTrue(
+            np.array_equal(np.array(second['image']), expected[:3]))
+        self.assertTrue(
+            np.array_equal(
+                np.array(first['label']), np.arange(20).reshape([20, 1])))
+
     def test_lod_level_1_converter(self):
         # lod_level = 1
         # each sentence has a different number of words
@@ -0,0 +1,137 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import collections
+import time
+import unittest
+
+import paddle.fluid as fluid
+import paddle.fluid.backward as backward
+from paddle.fluid import core
+
+# Compare the time of append_backward with the _addup_repetitive_outputs_
+# used before, which renames a slice of the ops every time a gradient is
+# produced again, on deep graphs updating a variable in place like unrolled
+# RNNs. The generated programs are checked to be identical.
+
+
+def legacy_addup_repetitive_outputs(op_descs):
+    pending_sum_ops = []
+    var_rename_count = collections.defaultdict(int)
+    renamed_vars = collections.defaultdict(list)
+    renamed_var_start_idx = collections.defaultdict(list)
+    for idx, op_desc in enumerate(op_descs):
+        for var_name in op_desc.input_arg_names():
+            if "@GRAD" not in var_name:
+                continue
+            if len(renamed_vars[var_name]) > 1:
+                pending_sum_ops.append((backward._create_op_desc_(
+                    "sum", {"X": renamed_vars[var_name]}, {"Out": [var_name]},
+                    {"use_mkldnn": False}), idx))
+                renamed_vars[var_name] = [var_name]
+        for param_idx, param_name in enumerate(op_desc.output_names()):
+            arg_names = op_desc.output(param_name)
+            for arg_idx, var_name in enumerate(arg_names):
+                if "@GRAD" not in var_name:
+                    continue
+                if var_name == core.empty_var_name(
+                ) or var_name in op_desc.input_arg_names():
+                    continue
+                if len(renamed_vars[var_name]) == 0:
+                    renamed_vars[var_name] = [var_name]
+                    renamed_var_start_idx[var_name] = idx
+                else:
+                    if len(renamed_vars[var_name]) == 1:
+                        new_name = var_name + "@RENAME@" + \
+                            str(var_rename_count[var_name])
+                        var_rename_count[var_name] += 1
+                        renamed_vars[var_name][0] = new_name
+                        backward._rename_arg_(op_descs, var_name, new_name,
+                                              renamed_var_start_idx[var_name],
+                                              idx)
+                        backward._rename_arg_(pending_sum_ops, var_name,
+                                              new_name)
+                        for p in op_desc.output_names()[:param_idx]:
+                            p_arg_names = op_desc.output(p)
+                            if var_name in p_arg_names:
+                                op_desc.set_output(p, [
+                                    new_name if x == var_name else x
+                                    for x in p_arg_names
+                                ])
+                        arg_names = [
+                            new_name if x == var_name else x
+                            for x in arg_names[:arg_idx]
+                        ] + arg_names[arg_idx:]
+                    new_name = var_name + "@RENAME@" + \
+                        str(var_rename_count[var_name])
+                    var_rename_count[var_name] += 1
+                    arg_names[arg_idx] = new_name
+                    op_desc.set_output(param_name, arg_names)
+                    renamed_vars[var_name].append(new_name)
+    for var_name, inputs in renamed_vars.items():
+        if len(inputs) > 1:
+            pending_sum_ops.append((backward._create_op_desc_(
+                "sum", {"X": inputs}, {"Out": [var_name]},
+                {"use_mkldnn": False}), len(op_descs)))
+    for p in reversed(pending_sum_ops):
+        op_descs.insert(p[1], p[0])
+    return op_descs
+
+
+class BenchmarkAppendBackward(unittest.TestCase):
+    def build_and_append_backward(self, layer_num):
+        main = fluid.Program()
+        with fluid.unique_name.guard():
+            with fluid.program_guard(main, fluid.Program()):
+                x = fluid.layers.data(name='x', shape=[16], dtype='float32')
+                # a state updated in place, the gradient of it is produced
+                # and consumed again in every layer
+                h = fluid.layers.fc(input=x, size=16)
+                for _ in range(layer_num):
+                    a = fluid.layers.scale(h, scale=2.0)
+                    b = fluid.layers.fc(input=h, size=16)
+                    fluid.layers.assign(
+                        fluid.layers.elementwise_add(a, b), output=h)
+                loss = fluid.layers.mean(h)
+                start = time.time()
+                fluid.backward.append_backward(loss)
+                elapsed = time.time() - start
+        return main, elapsed
+
+    def run_benchmark(self, layer_num):
+        origin_addup = backward._addup_repetitive_outputs_
+        backward._addup_repetitive_outputs_ = legacy_addup_repetitive_outputs
+        try:
+            legacy_program, legacy = self.build_and_append_backward(layer_num)
+        finally:
+            backward._addup_repetitive_outputs_ = origin_addup
+        program, elapsed = self.build_and_append_backward(layer_num)
+
+        self.assertEqual(program.desc.serialize_to_string(),
+                         legacy_program.desc.serialize_to_string())
+        print("%d ops: append_backward legacy %.3fs, one pass %.3fs (%.1fx)" %
+              (len(program.global_block().ops), legacy, elapsed,
+               legacy / elapsed))
+
+    def test_shallow_graph(self):
+        self.run_benchmark(100)
+
+    def test_deep_graph(self):
+        self.run_benchmark(1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
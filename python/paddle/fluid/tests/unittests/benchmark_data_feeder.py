@@ -0,0 +1,159 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import time
+import unittest
+
+import numpy as np
+import paddle.fluid as fluid
+import paddle.fluid.core as core
+
+# Compare the samples/sec of DataFeeder.feed with the conversions it used
+# before: numpy.array over a list of samples followed by a reshape for the
+# fixed-shape slots, and a recursion over every token for the sequence slots.
+
+
+def legacy_convert(samples, shape, dtype, place):
+    data = []
+    for each in samples:
+        data.append(each)
+    arr = np.array(data, dtype=dtype)
+    if len(arr.shape) != len(shape):
+        arr = arr.reshape(shape)
+    t = core.LoDTensor()
+    t.set(arr, place)
+    return t
+
+
+def legacy_convert_sequences(samples, lod_level, shape, dtype, place):
+    data = []
+    lod = [[] for _ in range(lod_level)]
+
+    def feed_impl(each, lod, lod_level):
+        if lod_level == 0:
+            data.append(each)
+        else:
+            lod[0].append(len(each))
+            for each_data in each:
+                feed_impl(each_data, lod[1:], lod_level - 1)
+
+    for each in samples:
+        feed_impl(each, lod, lod_level)
+    arr = np.array(data, dtype=dtype)
+    if len(arr.shape) != len(shape):
+        arr = arr.reshape(shape)
+    t = core.LoDTensor()
+    t.set(arr, place)
+    t.set_recursive_sequence_lengths(lod)
+    return t
+
+
+class BenchmarkDataFeeder(unittest.TestCase):
+    def setUp(self):
+        self.place = fluid.CPUPlace()
+        self.batch_size = 128
+        self.iters = 50
+
+    def run_benchmark(self, name, sample_shape, dtype, sample_fn):
+        shape = [-1] + sample_shape
+        var = fluid.data(name=name, shape=[None] + sample_shape, dtype=dtype)
+        feeder = fluid.DataFeeder([var], self.place)
+        samples = [(sample_fn(), ) for _ in range(self.batch_size)]
+        slot = [s[0] for s in samples]
+
+        start = time.time()
+        for _ in range(self.iters):
+            legacy_convert(slot, shape, dtype, self.place)
+        legacy = self.batch_size * self.iters / (time.time() - start)
+
+        start = time.time()
+        for _ in range(self.iters):
+            feeder.feed(samples)
+        buffered = self.batch_size * self.iters / (time.time() - start)
+
+        print("%s: legacy %.1f samples/sec, buffered %.1f samples/sec, "
+              "speedup %.2fx" % (name, legacy, buffered, buffered / legacy))
+        self.assertTrue(
+            np.array_equal(
+                np.array(feeder.feed(samples)[name]),
+                np.array(legacy_convert(slot, shape, dtype, self.place))))
+
+    def test_mnist_slot(self):
+        self.run_benchmark(
+            'mnist_image', [1, 28, 28],
+            'float32', lambda: np.random.random([784]).astype('float32'))
+
+    def test_mnist_list_slot(self):
+        self.run_benchmark('mnist_image_list', [1, 28, 28],
+                           'float32', lambda: np.random.random([784]).tolist())
+
+    def test_ctr_slot(self):
+        self.run_benchmark(
+            'ctr_dense', [13],
+            'float32', lambda: np.random.random([13]).astype('float32'))
+
+    def test_ctr_label_slot(self):
+        self.run_benchmark('ctr_label', [1],
+                           'int64', lambda: np.random.randint(0, 2))
+
+    def run_sequence_benchmark(self, name, lod_level, sample_fn):
+        var = fluid.layers.data(
+            name=name, shape=[1], dtype='int64', lod_level=lod_level)
+        feeder = fluid.DataFeeder([var], self.place)
+        samples = [(sample_fn(), ) for _ in range(self.batch_size)]
+        slot = [s[0] for s in samples]
+
+        start = time.time()
+        for _ in range(self.iters):
+            legacy_convert_sequences(slot, lod_level, [-1, 1], 'int64',
+                                     self.place)
+        legacy = self.batch_size * self.iters / (time.time() - start)
+
+        start = time.time()
+        for _ in range(self.iters):
+            feeder.feed(samples)
+        flattened = self.batch_size * self.iters / (time.time() - start)
+
+        print("%s: legacy %.1f samples/sec, flattened %.1f samples/sec, "
+              "speedup %.2fx" % (name, legacy, flattened, flattened / legacy))
+        expected = legacy_convert_sequences(slot, lod_level, [-1, 1], 'int64',
+                                            self.place)
+        actual = feeder.feed(samples)[name]
+        self.assertTrue(np.array_equal(np.array(actual), np.array(expected)))
+        self.assertEqual(actual.recursive_sequence_lengths(),
+                         expected.recursive_sequence_lengths())
+
+    def test_text_sequence_slot(self):
+        # word ids of sentences like the imdb/conll05 readers
+        self.run_sequence_benchmark(
+            'words', 1, lambda: np.random.randint(
+                0, 10000, size=np.random.randint(5, 200)).tolist())
+
+    def test_text_numpy_sequence_slot(self):
+        self.run_sequence_benchmark(
+            'words_np', 1, lambda: np.random.randint(
+                0, 10000, size=np.random.randint(5, 200)))
+
+    def test_paragraph_slot(self):
+        self.run_sequence_benchmark(
+            'paragraphs', 2, lambda: [
+                np.random.randint(0, 10000, size=np.random.randint(5, 50)).
+                tolist() for _ in range(np.random.randint(1, 8))
+            ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import time
+import unittest
+
+import numpy as np
+
+import paddle.fluid as fluid
+
+# Compare the step time of the per-parameter and the fused updates of the
+# optimizers on a model with many small parameters, where launching the small
+# optimize ops takes most of the time of a step on CPU.
+
+NUM_LAYERS = 256
+HIDDEN_SIZE = 32
+BATCH_SIZE = 16
+
+OPTIMIZERS = {
+    'sgd': lambda fuse: fluid.optimizer.SGD(0.01, fuse_update=fuse),
+    'momentum': lambda fuse: fluid.optimizer.Momentum(
+        0.01, momentum=0.9, fuse_update=fuse),
+    'adam': lambda fuse: fluid.optimizer.Adam(0.001, fuse_update=fuse),
+    'lamb': lambda fuse: fluid.optimizer.Lamb(0.001, fuse_update=fuse),
+}
+
+
+def many_small_params_net(optimizer):
+    main = fluid.Program()
+    startup = fluid.Program()
+    main.random_seed = 1
+    startup.random_seed = 1
+    with fluid.unique_name.guard():
+        with fluid.program_guard(main, startup):
+            hidden = fluid.layers.data(
+                name='x', shape=[HIDDEN_SIZE], dtype='float32')
+            for _ in range(NUM_LAYERS):
+                hidden = fluid.layers.fc(input=hidden,
+                                         size=HIDDEN_SIZE,
+                                         act='tanh')
+            loss = fluid.layers.mean(hidden)
+            optimizer.minimize(loss)
+    return main, startup, loss
+
+
+class BenchmarkFusedOptimizer(unittest.TestCase):
+    def step_time(self, optimizer, steps=50, warmup=5):
+        main, startup, loss = many_small_params_net(optimizer)
+        exe = fluid.Executor(fluid.CPUPlace())
+        feed = {
+            'x': np.random.RandomState(0).uniform(
+                -1, 1, [BATCH_SIZE, HIDDEN_SIZE]).astype('float32')
+        }
+        scope = fluid.core.Scope()
+        with fluid.scope_guard(scope):
+            exe.run(startup)
+            for _ in range(warmup):
+                exe.run(main, feed=feed, fetch_list=[loss])
+            start = time.time()
+            for _ in range(steps):
+                last_loss, = exe.run(main, feed=feed, fetch_list=[loss])
+            elapsed = (time.time() - start) / steps
+        return len(main.global_block().ops), elapsed, last_loss
+
+    def run_benchmark(self, name):
+        num_ops, step, loss = self.step_time(OPTIMIZERS[name](False))
+        fused_num_ops, fused_step, fused_loss = self.step_time(
+            OPTIMIZERS[name](True))
+        self.assertTrue(np.allclose(loss, fused_loss, atol=1e-5))
+        print("%s, %d parameters: per-parameter update %d ops %.2f ms/step, "
+              "fused update %d ops %.2f ms/step (%.2fx)" %
+              (name, 2 * NUM_LAYERS, num_ops, step * 1e3, fused_num_ops,
+               fused_step * 1e3, step / fused_step))
+
+    def test_sgd(self):
+        self.run_benchmark('sgd')
+
+    def test_momentum(self):
+        self.run_benchmark('momentum')
+
+    def test_adam(self):
+        self.run_benchmark('adam')
+
+    def test_lamb(self):
+        self.run_benchmark('lamb')
+
+
+if __name__ == '__main__':
+    unittest.main()
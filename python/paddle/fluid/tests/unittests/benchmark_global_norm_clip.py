@@ -0,0 +1,185 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import time
+import unittest
+
+import numpy as np
+
+import paddle.fluid as fluid
+import paddle.fluid.layers as layers
+from paddle.fluid import core
+from paddle.fluid.contrib import MemoryPlan
+
+# Compare the step time and the peak memory of a transformer encoder with many
+# parameters, whose gradients are clipped by the global norm computed by
+# square, reduce_sum and elementwise_mul ops for every gradient, which is how
+# GradientClipByGlobalNorm worked before, and by the squared_l2_norm op with
+# the in-place rescaling of GradientClipByGlobalNorm now.
+
+N_LAYER = 12
+N_HEAD = 8
+D_MODEL = 256
+D_INNER = 1024
+SEQ_LEN = 32
+BATCH_SIZE = 16
+
+
+class LegacyGradientClipByGlobalNorm(fluid.clip.GradientClipByGlobalNorm):
+    def _process_context(self, context, param, grad):
+        if self.group_name not in context:
+            context[self.group_name] = []
+            context[self.group_name + "_clip_value"] = self.clip_norm
+            context[self.group_name + "_clip"] = layers.fill_constant(
+                shape=[1], dtype="float32", value=self.clip_norm)
+
+        merge_grad = grad
+        if grad.type == core.VarDesc.VarType.SELECTED_ROWS:
+            merge_grad = layers.merge_selected_rows(grad)
+            merge_grad = layers.get_tensor_from_selected_rows(merge_grad)
+
+        square = layers.square(merge_grad)
+        local_norm_var = layers.reduce_sum(input=square)
+        context[self.group_name].append(local_norm_var)
+
+        self.context = context
+
+    def _create_operators(self, param, grad):
+        group_scale_name = self.group_name + "_scale"
+        if group_scale_name not in self.context:
+            group_norm_var = layers.sums(input=self.context[self.group_name])
+            group_norm_var = layers.sqrt(x=group_norm_var)
+            clip_var = self.context[self.group_name + "_clip"]
+            group_scale_var = layers.elementwise_div(
+                x=clip_var,
+                y=layers.elementwise_max(
+                    x=clip_var, y=group_norm_var))
+            self.context[group_scale_name] = group_scale_var
+
+        new_grad = layers.elementwise_mul(
+            x=grad, y=self.context[group_scale_name])
+
+        return param, new_grad
+
+
+def encoder(x):
+    d_key = D_MODEL // N_HEAD
+
+    def split_heads(t):
+        t = layers.reshape(t, shape=[0, 0, N_HEAD, d_key])
+        return layers.transpose(t, perm=[0, 2, 1, 3])
+
+    for _ in range(N_LAYER):
+        q, k, v = [
+            split_heads(layers.fc(input=x, size=D_MODEL, num_flatten_dims=2))
+            for _ in range(3)
+        ]
+        product = layers.matmul(q, k, transpose_y=True, alpha=d_key**-0.5)
+        ctx = layers.matmul(layers.softmax(product), v)
+        ctx = layers.reshape(
+            layers.transpose(
+                ctx, perm=[0, 2, 1, 3]), shape=[0, 0, D_MODEL])
+        attn = layers.fc(input=ctx, size=D_MODEL, num_flatten_dims=2)
+        x = layers.layer_norm(x + attn, begin_norm_axis=2)
+        hidden = layers.fc(input=x,
+                           size=D_INNER,
+                           num_flatten_dims=2,
+                           act='relu')
+        ffn = layers.fc(input=hidden, size=D_MODEL, num_flatten_dims=2)
+        x = layers.layer_norm(x + ffn, begin_norm_axis=2)
+    return x
+
+
+def build(clip):
+    main = fluid.Program()
+    startup = fluid.Program()
+    main.random_seed = 1
+    startup.random_seed = 1
+    with fluid.unique_name.guard():
+        with fluid.program_guard(main, startup):
+            src = layers.data(
+                name='src', shape=[SEQ_LEN, D_MODEL], dtype='float32')
+            loss = layers.mean(encoder(src))
+            fluid.clip.set_gradient_clip(clip)
+            num_ops = len(main.global_block().ops)
+            fluid.optimizer.SGD(learning_rate=0.01).minimize(loss)
+    clip_ops = [
+        op for op in main.global_block().ops[num_ops:]
+        if op.attr('op_namescope').startswith('/append_')
+    ]
+    return main, startup, loss, clip_ops
+
+
+def temporary_memory(main, ops, batch_size):
+    """
+    The memory of the variables created by the clipping ops, except the ones
+    written in place.
+    """
+    plan = MemoryPlan(main)
+    outputs = set()
+    for op in ops:
+        outputs.update(
+            set(op.output_arg_names) - set(op.input_arg_names))
+    return sum(plan.var_size(name, batch_size) for name in outputs)
+
+
+class BenchmarkGlobalNormClip(unittest.TestCase):
+    def run_steps(self, main, startup, loss, steps=10, warmup=2):
+        exe = fluid.Executor(fluid.CPUPlace())
+        feed = {
+            'src': np.random.RandomState(0).uniform(
+                -1, 1, [BATCH_SIZE, SEQ_LEN, D_MODEL]).astype('float32')
+        }
+        scope = fluid.core.Scope()
+        with fluid.scope_guard(scope):
+            exe.run(startup)
+            for _ in range(warmup):
+                exe.run(main, feed=feed, fetch_list=[loss])
+            start = time.time()
+            for _ in range(steps):
+                last_loss, = exe.run(main, feed=feed, fetch_list=[loss])
+        return (time.time() - start) / steps, last_loss
+
+    def test_transformer(self):
+        results = []
+        for clip in [
+                LegacyGradientClipByGlobalNorm(clip_norm=1.0),
+                fluid.clip.GradientClipByGlobalNorm(clip_norm=1.0)
+        ]:
+            main, startup, loss, clip_ops = build(clip)
+            peak, _ = MemoryPlan(main).peak_memory(BATCH_SIZE)
+            temp = temporary_memory(main, clip_ops, BATCH_SIZE)
+            step, last_loss = self.run_steps(main, startup, loss)
+            results.append((len(clip_ops), temp, peak, step, last_loss))
+
+        (legacy_ops, legacy_temp, legacy_peak, legacy_step, legacy_loss), \
+            (ops, temp, peak, step, last_loss) = results
+        self.assertTrue(np.allclose(legacy_loss, last_loss, atol=1e-5))
+        self.assertLess(ops, legacy_ops)
+        self.assertLess(temp, legacy_temp)
+        self.assertLessEqual(peak, legacy_peak)
+        print("transformer, %d parameters:" % len(main.all_parameters()))
+        for name, num_ops, temp, peak, step in [
+            ("legacy clip", legacy_ops, legacy_temp, legacy_peak,
+             legacy_step), ("fused clip", ops, temp, peak, step)
+        ]:
+            print("    %s: %d ops, temporaries %.1f MB, peak memory %.1f MB, "
+                  "%.2f ms/step" % (name, num_ops, temp / 2.0**20,
+                                    peak / 2.0**20, step * 1e3))
+
+
+if __name__ == '__main__':
+    unittest.main()
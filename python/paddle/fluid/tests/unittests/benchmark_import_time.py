@@ -0,0 +1,105 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import subprocess
+import sys
+import unittest
+
+# Break down the time of `import paddle.fluid` with `python -X importtime`,
+# which is available since python 3.7, and measure the time to generate the
+# layer functions of paddle.fluid.layers.ops that are generated on their
+# first use now. Run it directly to print the reports, e.g.
+#
+#     python benchmark_import_time.py [top_n]
+
+IMPORT_STMT = "import paddle.fluid"
+
+GENERATE_ALL_LAYERS = """
+import time
+import paddle.fluid.layers.ops as ops
+from paddle.fluid.layers.layer_function_generator import _LazyLayerFunction
+lazy = [f for f in vars(ops).values() if isinstance(f, _LazyLayerFunction)]
+assert not any(f._func is not None for f in lazy), 'generated on import'
+start = time.time()
+for f in lazy:
+    f.__doc__
+print(len(lazy), time.time() - start)
+"""
+
+
+def run_python(args):
+    proc = subprocess.Popen(
+        [sys.executable] + args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True)
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(err)
+    return out, err
+
+
+def import_time_breakdown(stmt=IMPORT_STMT):
+    """
+    Returns:
+        list: the (self us, cumulative us, module) of the imported modules.
+    """
+    _, err = run_python(["-X", "importtime", "-c", stmt])
+    records = []
+    for line in err.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header
+        records.append((int(fields[0]), int(fields[1]), fields[2].strip()))
+    return records
+
+
+def report(top_n=20):
+    records = import_time_breakdown()
+    total = max(r[1] for r in records)
+    print("import paddle.fluid: %.1f ms, %d modules" %
+          (total / 1e3, len(records)))
+    print("\n%-60s %10s %10s" % ("by self time", "self ms", "cum ms"))
+    for self_us, cum_us, name in sorted(records, reverse=True)[:top_n]:
+        print("%-60s %10.1f %10.1f" % (name, self_us / 1e3, cum_us / 1e3))
+    print("\n%-60s %10s %10s" % ("paddle modules by cumulative time",
+                                   "self ms", "cum ms"))
+    paddle_records = [r for r in records if r[2].startswith("paddle")]
+    for self_us, cum_us, name in sorted(
+            paddle_records, key=lambda r: r[1], reverse=True)[:top_n]:
+        print("%-60s %10.1f %10.1f" % (name, self_us / 1e3, cum_us / 1e3))
+
+    out, _ = run_python(["-c", GENERATE_ALL_LAYERS])
+    count, seconds = out.split()
+    print("\ngenerating all the %s lazy layers of paddle.fluid.layers.ops, "
+          "saved from the import: %.1f ms" % (count, float(seconds) * 1e3))
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "-X importtime needs python 3.7")
+class TestImportTime(unittest.TestCase):
+    def test_layers_not_generated_on_import(self):
+        out, _ = run_python(["-c", GENERATE_ALL_LAYERS])
+        self.assertGreater(int(out.split()[0]), 0)
+
+    def test_breakdown(self):
+        names = [r[2] for r in import_time_breakdown()]
+        self.assertIn("paddle.fluid.layers.ops", names)
+
+
+if __name__ == '__main__':
+    report(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,259 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import time
+import unittest
+
+import paddle.fluid as fluid
+import paddle.fluid.layers as layers
+from paddle.fluid import core
+from paddle.fluid.framework import OpProtoHolder, Variable
+from paddle.fluid.framework import convert_np_dtype_to_dtype_
+from paddle.fluid.layer_helper import LayerHelper
+from paddle.fluid.layers.layer_function_generator import _convert_
+from paddle.fluid.layers.layer_function_generator import generate_layer_fn
+
+# Compare the time to build a ResNet-152 and a 24-layer transformer, whose
+# parameter-free ops are appended by the generated layer functions, with the
+# generate_layer_fn used before, which walks the op proto and converts the
+# argument names on every call. The built programs are checked to be the
+# same.
+
+GENERATED_OPS = ['elementwise_add', 'relu', 'matmul', 'softmax', 'layer_norm']
+
+CALLSTACK_ATTR = core.op_proto_and_checker_maker.kOpCreationCallstackAttrName()
+
+
+def legacy_generate_layer_fn(op_type):
+    op_proto = OpProtoHolder.instance().get_op_proto(op_type)
+    not_intermediate_outputs = \
+        [output for output in op_proto.outputs if not output.intermediate]
+    intermediate_outputs = \
+        [output for output in op_proto.outputs if output.intermediate]
+    o_name = not_intermediate_outputs[0].name
+    intermediate_output_names = [output.name for output in intermediate_outputs]
+
+    def infer_and_check_dtype(op_proto, *args, **kwargs):
+        dtype = None
+        for ipt in op_proto.inputs:
+            name = _convert_(ipt.name)
+            val = kwargs.pop(name, [])
+            if not isinstance(val, list) and not isinstance(val, tuple):
+                val = [val]
+            if len(val) == 0:
+                val = [args[0]]
+                args = args[1:]
+
+            for each in val:
+                if not isinstance(each, Variable):
+                    raise ValueError("input of {0} must be variable".format(
+                        op_type))
+
+                if dtype is None:
+                    dtype = each.dtype
+                elif dtype != each.dtype:
+                    raise ValueError(
+                        "operator {0} must input same dtype. {1} vs {2}".format(
+                            op_type, dtype, each.dtype))
+
+        if dtype is None:
+            arg_dtype = kwargs.get("dtype")
+            if arg_dtype:
+                if not isinstance(arg_dtype, core.VarDesc.VarType):
+                    dtype = convert_np_dtype_to_dtype_(arg_dtype)
+                else:
+                    dtype = arg_dtype
+            else:
+                dtype = core.VarDesc.VarType.FP32
+        return dtype
+
+    def func(*args, **kwargs):
+        helper = LayerHelper(op_type, **kwargs)
+
+        dtype = infer_and_check_dtype(op_proto, *args, **kwargs)
+
+        inputs = dict()
+        for ipt in op_proto.inputs:
+            name = _convert_(ipt.name)
+            val = kwargs.pop(name, [])
+            if not isinstance(val, list) and not isinstance(val, tuple):
+                val = [val]
+            if len(val) == 0 and len(args) != 0:
+                val = args[0]
+                args = args[1:]
+            inputs[ipt.name] = val
+
+        outputs = dict()
+        out = kwargs.pop(_convert_(o_name), [])
+        if out:
+            out_var = out[0] if (isinstance(out, list) or
+                                 isinstance(out, tuple)) else out
+        else:
+            out_var = helper.create_variable_for_type_inference(dtype=dtype)
+        outputs[o_name] = [out_var]
+        for name in intermediate_output_names:
+            outputs[name] = [
+                helper.create_variable_for_type_inference(dtype=dtype)
+            ]
+        helper.append_op(
+            type=op_type, inputs=inputs, outputs=outputs, attrs=kwargs)
+        return helper.append_activation(out_var)
+
+    return func
+
+
+class GeneratedOps(object):
+    def __init__(self, generator):
+        for op_type in GENERATED_OPS:
+            setattr(self, op_type, generator(op_type))
+        self.calls = 0
+        self.elapsed = 0.0
+
+    def __getattribute__(self, name):
+        attr = object.__getattribute__(self, name)
+        if name not in GENERATED_OPS:
+            return attr
+
+        def timed(*args, **kwargs):
+            start = time.time()
+            ret = attr(*args, **kwargs)
+            self.elapsed += time.time() - start
+            self.calls += 1
+            return ret
+
+        return timed
+
+
+def conv_bn(ops, input, num_filters, filter_size, stride=1, act=True):
+    conv = layers.conv2d(
+        input=input,
+        num_filters=num_filters,
+        filter_size=filter_size,
+        stride=stride,
+        padding=(filter_size - 1) // 2,
+        bias_attr=False)
+    bn = layers.batch_norm(input=conv)
+    return ops.relu(bn) if act else bn
+
+
+def resnet152(ops, image):
+    conv = conv_bn(ops, image, 64, 7, stride=2)
+    conv = layers.pool2d(
+        input=conv, pool_size=3, pool_stride=2, pool_padding=1, pool_type='max')
+    for stage, (depth, num_filters) in enumerate(
+            zip([3, 8, 36, 3], [64, 128, 256, 512])):
+        for i in range(depth):
+            stride = 2 if i == 0 and stage != 0 else 1
+            if i == 0:
+                short = conv_bn(
+                    ops, conv, num_filters * 4, 1, stride=stride, act=False)
+            else:
+                short = conv
+            out = conv_bn(ops, conv, num_filters, 1)
+            out = conv_bn(ops, out, num_filters, 3, stride=stride)
+            out = conv_bn(ops, out, num_filters * 4, 1, act=False)
+            conv = ops.relu(ops.elementwise_add(short, out))
+    pool = layers.pool2d(input=conv, pool_type='avg', global_pooling=True)
+    return layers.fc(input=pool, size=1000, act='softmax')
+
+
+def layer_norm(ops, x, d_model):
+    scale = layers.create_parameter(
+        shape=[d_model],
+        dtype='float32',
+        default_initializer=fluid.initializer.Constant(1.0))
+    bias = layers.create_parameter(
+        shape=[d_model], dtype='float32', is_bias=True)
+    return ops.layer_norm(x, scale, bias, begin_norm_axis=2)
+
+
+def transformer(ops, x, n_layer=24, n_head=16, d_model=1024, d_inner=4096):
+    d_key = d_model // n_head
+
+    def split_heads(t):
+        t = layers.reshape(t, shape=[0, 0, n_head, d_key])
+        return layers.transpose(t, perm=[0, 2, 1, 3])
+
+    for _ in range(n_layer):
+        q, k, v = [
+            split_heads(
+                layers.fc(input=x, size=d_model, num_flatten_dims=2))
+            for _ in range(3)
+        ]
+        product = ops.matmul(q, k, transpose_Y=True, alpha=d_key**-0.5)
+        weights = ops.softmax(product)
+        ctx = layers.transpose(ops.matmul(weights, v), perm=[0, 2, 1, 3])
+        ctx = layers.reshape(ctx, shape=[0, 0, d_model])
+        attn = layers.fc(input=ctx, size=d_model, num_flatten_dims=2)
+        x = layer_norm(ops, ops.elementwise_add(x, attn), d_model)
+        hidden = ops.relu(layers.fc(input=x, size=d_inner, num_flatten_dims=2))
+        ffn = layers.fc(input=hidden, size=d_model, num_flatten_dims=2)
+        x = layer_norm(ops, ops.elementwise_add(x, ffn), d_model)
+    return x
+
+
+def program_ops(program):
+    ret = []
+    for op in program.global_block().ops:
+        # the call stacks are different in the legacy layer functions
+        attrs = dict((name, op.attr(name)) for name in op.attr_names
+                     if name != CALLSTACK_ATTR)
+        ret.append((op.type, dict((n, op.input(n)) for n in op.input_names),
+                    dict((n, op.output(n)) for n in op.output_names), attrs))
+    return ret
+
+
+class BenchmarkLayerFnDispatch(unittest.TestCase):
+    def build(self, model, generator):
+        ops = GeneratedOps(generator)
+        main = fluid.Program()
+        with fluid.unique_name.guard():
+            with fluid.program_guard(main, fluid.Program()):
+                if model == 'resnet152':
+                    image = layers.data(
+                        name='image', shape=[3, 224, 224], dtype='float32')
+                    start = time.time()
+                    resnet152(ops, image)
+                else:
+                    src = layers.data(
+                        name='src', shape=[128, 1024], dtype='float32')
+                    start = time.time()
+                    transformer(ops, src)
+                elapsed = time.time() - start
+        return main, ops, elapsed
+
+    def run_benchmark(self, model):
+        legacy_program, legacy_ops, legacy = self.build(
+            model, legacy_generate_layer_fn)
+        program, ops, elapsed = self.build(model, generate_layer_fn)
+
+        self.assertEqual(program_ops(program), program_ops(legacy_program))
+        print("%s, %d ops, %d generated layer calls: "
+              "build legacy %.3fs (generated layers %.3fs), "
+              "cached descriptors %.3fs (generated layers %.3fs, %.1fx)" %
+              (model, len(program.global_block().ops), ops.calls, legacy,
+               legacy_ops.elapsed, elapsed, ops.elapsed,
+               legacy_ops.elapsed / ops.elapsed))
+
+    def test_resnet152(self):
+        self.run_benchmark('resnet152')
+
+    def test_transformer(self):
+        self.run_benchmark('transformer')
+
+
+if __name__ == '__main__':
+    unittest.main()
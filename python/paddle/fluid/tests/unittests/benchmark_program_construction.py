@@ -0,0 +1,138 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import time
+import unittest
+
+import paddle.compat as cpt
+import paddle.fluid as fluid
+from paddle.fluid.framework import Block, Operator
+
+# Compare the time of editing a large program the way the transpilers do,
+# inserting and removing ops one by one and pruning it for many targets,
+# with the full Block._sync_with_cpp and the linear op lookups used before.
+
+
+def legacy_sync_with_cpp(self):
+    for var in self.desc.all_vars():
+        if not self.has_var(var.name()):
+            self.create_var(name=var.name(), desc=var, type=var.type())
+    for var in list(self.vars.keys()):
+        if not self.desc.find_var(cpt.to_bytes(var)):
+            self.vars.pop(var)
+
+    ops_in_cpp = []
+    for op_idx in range(0, self.desc.op_size()):
+        ops_in_cpp.append(self.desc.op(op_idx))
+    start_index = None
+    end_index = None
+    for index in range(len(ops_in_cpp)):
+        if self.ops[0].desc == ops_in_cpp[index]:
+            start_index = index
+        if self.ops[-1].desc == ops_in_cpp[index]:
+            end_index = index
+    for index in range((end_index + 1), len(ops_in_cpp)):
+        self.ops.append(Operator(self, ops_in_cpp[index]))
+    for index in range(len(self.ops)):
+        assert self.ops[index].desc == ops_in_cpp[index]
+
+
+def legacy_find_target_op(block, var):
+    for op in block.ops:
+        if var.name in op.output_arg_names:
+            return op
+
+
+def legacy_op_idx(op):
+    for i, each in enumerate(op.block.ops):
+        if each == op:
+            return i
+
+
+class BenchmarkProgramConstruction(unittest.TestCase):
+    def build_program(self, layer_num):
+        main = fluid.Program()
+        outs = []
+        with fluid.program_guard(main, fluid.Program()):
+            hidden = fluid.layers.data(name='x', shape=[16], dtype='float32')
+            for _ in range(layer_num):
+                hidden = fluid.layers.fc(input=hidden, size=16, act='relu')
+                outs.append(hidden)
+        return main, outs
+
+    def edit(self, block, outs):
+        start = time.time()
+        for out in outs:
+            op = block._var_producers(out.name)[0]
+            index = op.idx + 1
+            block._insert_op(
+                index,
+                type='scale',
+                inputs={'X': [out]},
+                outputs={'Out': [out]},
+                attrs={'scale': 1.0})
+            block._remove_op(index)
+        return time.time() - start
+
+    def legacy_edit(self, block, outs):
+        origin_sync_with_cpp = Block._sync_with_cpp
+        Block._sync_with_cpp = legacy_sync_with_cpp
+        try:
+            start = time.time()
+            for out in outs:
+                op = legacy_find_target_op(block, out)
+                index = legacy_op_idx(op) + 1
+                block._insert_op(
+                    index,
+                    type='scale',
+                    inputs={'X': [out]},
+                    outputs={'Out': [out]},
+                    attrs={'scale': 1.0})
+                block._remove_op(index)
+            return time.time() - start
+        finally:
+            Block._sync_with_cpp = origin_sync_with_cpp
+
+    def run_benchmark(self, layer_num):
+        main, outs = self.build_program(layer_num)
+        block = main.global_block()
+        targets = outs[::10]
+
+        legacy = self.legacy_edit(block, targets)
+        indexed = self.edit(block, targets)
+
+        start = time.time()
+        for out in targets:
+            legacy_op_idx(legacy_find_target_op(block, out))
+        legacy_lookup = time.time() - start
+        start = time.time()
+        main._prune(targets)
+        prune = time.time() - start
+
+        print("%d ops, %d targets: insert/remove legacy %.3fs, indexed %.3fs "
+              "(%.1fx); prune target lookup legacy %.3fs, whole prune %.3fs" %
+              (len(block.ops), len(targets), legacy, indexed,
+               legacy / indexed, legacy_lookup, prune))
+
+    def test_small_program(self):
+        self.run_benchmark(300)
+
+    def test_large_program(self):
+        self.run_benchmark(3000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -84,5 +84,30 @@ class TestBackward(unittest.TestCase):
         self.check_backward(case4_with_no_grad_op_maker, {})
 
 
+class TestAddupRepetitiveOutputs(unittest.TestCase):
+    def op_desc(self, op_type, inputs, outputs):
+        return fluid.backward._create_op_desc_(op_type, {"X": inputs},
+                                               {"Out": outputs}, {})
+
+    def test_accumulate_consumed_grad(self):
+        op_descs = [
+            self.op_desc("a", ["x"], ["v@GRAD"]),
+            self.op_desc("b", ["y"], ["v@GRAD"]),
+            self.op_desc("c", ["v@GRAD"], ["u@GRAD"]),
+            self.op_desc("d", ["z"], ["v@GRAD"]),
+            self.op_desc("e", ["v@GRAD"], ["w@GRAD"]),
+        ]
+        op_descs = fluid.backward._addup_repetitive_outputs_(op_descs)
+        self.assertEqual(
+            [(op.type(), op.input("X"), op.output("Out")) for op in op_descs],
+            [("a", ["x"], ["v@GRAD@RENAME@0"]),
+             ("b", ["y"], ["v@GRAD@RENAME@1"]),
+             ("sum", ["v@GRAD@RENAME@0", "v@GRAD@RENAME@1"],
+              ["v@GRAD@RENAME@2"]), ("c", ["v@GRAD@RENAME@2"], ["u@GRAD"]),
+             ("d", ["z"], ["v@GRAD@RENAME@3"]),
+             ("sum", ["v@GRAD@RENAME@2", "v@GRAD@RENAME@3"], ["v@GRAD"]),
+             ("e", ["v@GRAD"], ["w@GRAD"])])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -18,7 +18,7 @@ import unittest
 
 import paddle.fluid as fluid
 import paddle.fluid.layers as layers
-from paddle.fluid.backward import calc_gradient
+from paddle.fluid.backward import calc_gradient, _find_op_path_
 
 
 class TestCalcGradient(unittest.TestCase):
@@ -35,5 +35,72 @@ class TestCalcGradient(unittest.TestCase):
         exe.run(fluid.default_main_program(), feed={}, fetch_list=[a, b])
 
 
+class TestFindOpPath(unittest.TestCase):
+    def test_op_path(self):
+        main = fluid.Program()
+        with fluid.program_guard(main, fluid.Program()):
+            x = layers.data(name='x', shape=[4], dtype='float32')
+            y = layers.data(name='y', shape=[4], dtype='float32')
+            h1 = layers.fc(input=x, size=4)
+            h2 = layers.scale(y, scale=2.0)
+            out = layers.elementwise_add(h1, h2)
+            other = layers.scale(h1, scale=3.0)
+        block = main.global_block()
+
+        path = _find_op_path_(block, [out], [x], set())
+        self.assertEqual([op.type for op in path],
+                         ['mul', 'elementwise_add', 'elementwise_add'])
+        # the index of the block is reused by the following queries
+        index = block._var_ops
+        self.assertIsNotNone(index)
+        path = _find_op_path_(block, [other], [y], set())
+        self.assertEqual(path, [])
+        path = _find_op_path_(block, [out, other], [], set())
+        self.assertEqual(len(path), len(block.ops))
+        self.assertIs(block._var_ops, index)
+
+        no_grad_set = set([h2.name])
+        path = _find_op_path_(block, [out], [], no_grad_set)
+        self.assertNotIn('scale', [op.type for op in path])
+
+    def test_op_path_with_sub_block(self):
+        main = fluid.Program()
+        with fluid.program_guard(main, fluid.Program()):
+            x = layers.data(name='x', shape=[4], dtype='float32')
+            i = layers.fill_constant(shape=[1], dtype='int64', value=0)
+            limit = layers.fill_constant(shape=[1], dtype='int64', value=3)
+            cond = layers.less_than(x=i, y=limit)
+            while_op = layers.While(cond=cond)
+            with while_op.block():
+                h = layers.scale(x, scale=2.0)
+                s = layers.elementwise_add(h, x)
+                layers.increment(x=i, in_place=True)
+                layers.less_than(x=i, y=limit, cond=cond)
+
+        sub_block = main.block(1)
+        path = _find_op_path_(sub_block, [s], [x], set())
+        self.assertEqual([op.type for op in path],
+                         ['scale', 'elementwise_add'])
+        path = _find_op_path_(main.global_block(), [i], [x], set())
+        self.assertEqual([op.type for op in path], ['while'])
+
+    def test_repeated_calc_gradient(self):
+        main = fluid.Program()
+        with fluid.program_guard(main, fluid.Program()):
+            x = layers.create_parameter(dtype="float32", shape=[5, 10])
+            y = layers.create_parameter(dtype="float32", shape=[10, 8])
+            mul_out = layers.mul(x=x, y=y)
+            sum_out = layers.reduce_sum(mul_out)
+            mean_out = layers.mean(mul_out)
+            grads = [
+                calc_gradient(target, [x, y])
+                for target in [mean_out, sum_out, mean_out]
+            ]
+        for grad_x, grad_y in grads:
+            self.assertEqual(grad_x.shape, x.shape)
+            self.assertEqual(grad_y.shape, y.shape)
+        self.assertEqual(len(set(g.name for g in sum(grads, []))), 6)
+
+
 if __name__ == "__main__":
     unittest.main()
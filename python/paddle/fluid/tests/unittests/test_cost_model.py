@@ -0,0 +1,141 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import unittest
+
+import paddle.fluid as fluid
+from paddle.fluid.contrib import cost_model
+from paddle.fluid.contrib.cost_model import op_cost, register_op_cost
+
+
+class TestCostModel(unittest.TestCase):
+    def build_program(self):
+        main = fluid.Program()
+        with fluid.program_guard(main, fluid.Program()):
+            image = fluid.layers.data(
+                name='image', shape=[3, 32, 32], dtype='float32')
+            conv = fluid.layers.conv2d(
+                input=image, num_filters=8, filter_size=3, padding=1)
+            pool = fluid.layers.pool2d(
+                input=conv, pool_size=2, pool_stride=2, pool_type='max')
+            # two branches from pool, only one of them is on the critical path
+            left = fluid.layers.fc(input=pool, size=10)
+            right = fluid.layers.sigmoid(fluid.layers.fc(input=pool, size=10))
+            out = fluid.layers.elementwise_add(left, right)
+        return main, out
+
+    def test_op_cost(self):
+        main, _ = self.build_program()
+        conv = main.global_block().ops[0]
+        self.assertEqual(conv.type, 'conv2d')
+        cost = op_cost(conv, batch_size=2)
+        # 2 * output numel * (c_in * k_h * k_w)
+        self.assertEqual(cost.flops, 2 * (2 * 8 * 32 * 32) * (3 * 3 * 3))
+        self.assertEqual(cost.param_bytes, 8 * 3 * 3 * 3 * 4)
+        self.assertEqual(cost.bytes_read,
+                         cost.param_bytes + 2 * 3 * 32 * 32 * 4)
+        self.assertEqual(cost.bytes_written, 2 * 8 * 32 * 32 * 4)
+        self.assertEqual(op_cost(conv, batch_size=4).flops, 2 * cost.flops)
+
+    def test_program_cost(self):
+        main, _ = self.build_program()
+        cost = fluid.contrib.ProgramCost(main, batch_size=2)
+        self.assertEqual(len(cost.records), len(main.global_block().ops))
+        totals = cost.totals()
+        self.assertEqual(totals['flops'],
+                         sum(r.cost.flops for r in cost.records))
+        self.assertEqual(totals['param_bytes'],
+                         (8 * 3 * 3 * 3 + 8 + 2 * (8 * 16 * 16 * 10 + 10)) * 4)
+        self.assertGreater(totals['arithmetic_intensity'], 0)
+        self.assertLess(totals['critical_path_time'], totals['serial_time'])
+        self.assertGreater(totals['parallelism'], 1.0)
+
+        path = [r.type for r in cost.critical_path]
+        self.assertEqual(path[:2], ['conv2d', 'elementwise_add'])
+        self.assertEqual(path[-1], 'elementwise_add')
+        report = cost.report(top_n=3)
+        self.assertIn('Critical path', report)
+        self.assertIn('conv2d', report)
+
+    def test_register_op_cost(self):
+        main, _ = self.build_program()
+        sigmoid = [
+            op for op in main.global_block().ops if op.type == 'sigmoid'
+        ][0]
+        self.assertEqual(op_cost(sigmoid, batch_size=2).flops, 4 * 2 * 10)
+
+        origin = cost_model._op_flops_fns['sigmoid']
+
+        @register_op_cost('sigmoid')
+        def sigmoid_flops(op, shape):
+            return 100
+
+        try:
+            self.assertEqual(op_cost(sigmoid).flops, 100)
+        finally:
+            register_op_cost('sigmoid')(origin)
+
+        # the bugs of the functions are not taken as unknown shapes
+        @register_op_cost('sigmoid')
+        def buggy_flops(op, shape):
+            return op.attr('no_such_attr') * shape(op.output('Out')[0])[0]
+
+        try:
+            self.assertRaises(Exception, op_cost, sigmoid)
+        finally:
+            register_op_cost('sigmoid')(origin)
+
+    def test_unknown_shapes(self):
+        main, _ = self.build_program()
+        block = main.global_block()
+        sigmoid = [op for op in block.ops if op.type == 'sigmoid'][0]
+        block._remove_var(sigmoid.output('Out')[0])
+        self.assertIsNone(op_cost(sigmoid).flops)
+
+        cost = fluid.contrib.ProgramCost(main, batch_size=2)
+        self.assertEqual([r.type for r in cost.unestimated_records],
+                         ['sigmoid'])
+        totals = cost.totals()
+        self.assertEqual(totals['unestimated_ops'], 1)
+        self.assertEqual(totals['flops'],
+                         sum(r.cost.flops or 0 for r in cost.records))
+        self.assertIn('Unestimated FLOPs of 1 ops', cost.report())
+
+    def test_sub_block(self):
+        main = fluid.Program()
+        with fluid.program_guard(main, fluid.Program()):
+            x = fluid.layers.data(name='x', shape=[16], dtype='float32')
+            i = fluid.layers.fill_constant(shape=[1], dtype='int64', value=0)
+            limit = fluid.layers.fill_constant(
+                shape=[1], dtype='int64', value=3)
+            cond = fluid.layers.less_than(x=i, y=limit)
+            while_op = fluid.layers.While(cond=cond)
+            with while_op.block():
+                fluid.layers.assign(fluid.layers.tanh(x), output=x)
+                fluid.layers.increment(x=i, in_place=True)
+                fluid.layers.less_than(x=i, y=limit, cond=cond)
+        cost = fluid.contrib.ProgramCost(main)
+        self.assertEqual(sorted(cost.block_costs), [0, 1])
+        self.assertEqual(cost.block_costs[1].flops, 4 * 16 + 1)
+        # the while op takes the time of its sub-block
+        self.assertIn('while', [r.type for r in cost.critical_path])
+        self.assertGreaterEqual(cost.critical_path_time,
+                                sum(r.time for r in cost.records
+                                    if r.block_idx == 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -732,6 +732,66 @@ class TestRMSPropOptimizer(TranspilerTest):
         self.assertEqual(moment_var.shape, (500, 1000))
 
 
+class TestSizeBalanced(TranspilerTest):
+    def net_conf(self):
+        x = fluid.layers.data(name='x', shape=[1000], dtype='float32')
+        hidden = fluid.layers.fc(input=x,
+                                 size=1000,
+                                 act=None,
+                                 param_attr=fluid.ParamAttr(name='fc_w'),
+                                 bias_attr=fluid.ParamAttr(name='fc_b'))
+        y_predict = fluid.layers.fc(input=hidden,
+                                    size=10,
+                                    act=None,
+                                    param_attr=fluid.ParamAttr(name='fc2_w'),
+                                    bias_attr=fluid.ParamAttr(name='fc2_b'))
+        y = fluid.layers.data(name='y', shape=[10], dtype='float32')
+        cost = fluid.layers.square_error_cost(input=y_predict, label=y)
+        avg_cost = fluid.layers.mean(cost)
+        optimizer = fluid.optimizer.Adam(learning_rate=0.1)
+        optimizer.minimize(avg_cost)
+
+    def transpiler_test_impl(self):
+        config = fluid.DistributeTranspilerConfig()
+        config.split_method = fluid.transpiler.SizeBalanced
+        pserver, startup = self.get_pserver(self.pserver1_ep, config)
+        pserver2, startup2 = self.get_pserver(self.pserver2_ep, config)
+
+        report = self.transpiler.get_placement_report()
+        self.assertEqual(
+            sorted(report.keys()), [self.pserver1_ep, self.pserver2_ep])
+        param_bytes = (1000 * 1000 + 1000 + 1000 * 10 + 10) * 4
+        self.assertEqual(
+            sum(stat["bytes"] for stat in report.values()), param_bytes)
+        # Adam keeps two moments of the shape of each param
+        state_bytes = [stat["state_bytes"] for stat in report.values()]
+        self.assertEqual(sum(state_bytes), 3 * param_bytes)
+        # the two halves of fc_w go to different pservers, and the small
+        # params can not unbalance them by more than their own bytes
+        self.assertLessEqual(
+            abs(state_bytes[0] - state_bytes[1]), 3 * (1000 + 1000 * 10) * 4)
+        for stat in report.values():
+            self.assertEqual(stat["traffic_bytes"],
+                             2 * stat["bytes"] * self.trainers)
+
+
+class TestHashNameStable(unittest.TestCase):
+    def test_grad_and_param_blocks(self):
+        Var = collections.namedtuple("Var", ["name"])
+        eps = ["127.0.0.1:%d" % port for port in range(6174, 6180)]
+        dispatcher = fluid.transpiler.HashName(eps)
+        params = [Var("fc_%d.w_0.block%d" % (i, i % 2)) for i in range(10)]
+        grads = [
+            Var("fc_%d.w_0@GRAD.block%d.trainer_%d" % (i, i % 2, i % 3))
+            for i in range(10)
+        ]
+        self.assertEqual(
+            dispatcher.dispatch(params), dispatcher.dispatch(grads))
+        self.assertEqual(
+            dispatcher.dispatch([Var("fc_0.w_0")]),
+            dispatcher.dispatch([Var("fc_0.w_0@GRAD.trainer_1")]))
+
+
 class TestLoadSliceVar(TranspilerTest):
     def net_conf(self):
         x = fluid.layers.data(name='x', shape=[1000], dtype='float32')
@@ -17,6 +17,7 @@ from __future__ import print_function
 import unittest
 
 import numpy
+import paddle.fluid as fluid
 import paddle.fluid.core as core
 from paddle.fluid.executor import Executor
 from paddle.fluid.layers import mul, data
@@ -95,6 +96,65 @@ class TestExecutor(unittest.TestCase):
             self.assertTrue(numpy.allclose(out, numpy.dot(a_np, b_np)))
         print("run time %f" % run_time)
 
+    def _build_mul_program(self):
+        program = fluid.Program()
+        with fluid.program_guard(program, fluid.Program()):
+            with fluid.unique_name.guard():
+                a = data(name='a', shape=[784], dtype='float32')
+                b = data(
+                    name='b',
+                    shape=[784, 100],
+                    dtype='float32',
+                    append_batch_size=False)
+                output = mul(x=a, y=b)
+        return program, output
+
+    def test_structural_cache_key(self):
+        a_np = numpy.random.random((100, 784)).astype('float32')
+        b_np = numpy.random.random((784, 100)).astype('float32')
+        exe = Executor(core.CPUPlace())
+        for i in range(3):
+            # structurally identical programs share one cache entry
+            program, output = self._build_mul_program()
+            outs = exe.run(program,
+                           feed={'a': a_np,
+                                 'b': b_np},
+                           fetch_list=[output.name],
+                           use_program_cache=True)
+            self.assertTrue(numpy.allclose(outs[0], numpy.dot(a_np, b_np)))
+        info = exe.program_cache_info()
+        self.assertEqual(info['misses'], 1)
+        self.assertEqual(info['hits'], 2)
+        self.assertEqual(info['size'], 1)
+
+    def test_cache_capacity(self):
+        a_np = numpy.random.random((100, 784)).astype('float32')
+        b_np = numpy.random.random((784, 100)).astype('float32')
+        exe = Executor(core.CPUPlace(), program_cache_capacity=1)
+        program, output = self._build_mul_program()
+        fetch_lists = [[output.name], [output.name, 'a']]
+        for fetch_list in fetch_lists + fetch_lists:
+            exe.run(program,
+                    feed={'a': a_np,
+                          'b': b_np},
+                    fetch_list=fetch_list,
+                    use_program_cache=True)
+        info = exe.program_cache_info()
+        self.assertEqual(info['size'], 1)
+        self.assertEqual(info['misses'], 4)
+        self.assertEqual(info['evictions'], 3)
+
+        exe.set_program_cache_capacity(None)
+        for fetch_list in fetch_lists + fetch_lists:
+            exe.run(program,
+                    feed={'a': a_np,
+                          'b': b_np},
+                    fetch_list=fetch_list,
+                    use_program_cache=True)
+        info = exe.program_cache_info()
+        self.assertEqual(info['size'], 2)
+        self.assertEqual(info['evictions'], 3)
+
 
 if __name__ == '__main__':
     unittest.main()
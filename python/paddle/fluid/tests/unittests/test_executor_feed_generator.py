@@ -0,0 +1,74 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import unittest
+
+import numpy
+import paddle.fluid as fluid
+import paddle.fluid.core as core
+
+
+class TestExecutorFeedGenerator(unittest.TestCase):
+    def setUp(self):
+        self.main_program = fluid.Program()
+        with fluid.program_guard(self.main_program, fluid.Program()):
+            self.a = fluid.data(name='a', shape=[None, 784], dtype='float32')
+            self.b = fluid.data(name='b', shape=[784, 100], dtype='float32')
+            self.output = fluid.layers.mul(x=self.a, y=self.b)
+        self.b_np = numpy.random.random((784, 100)).astype('float32')
+        self.a_nps = [
+            numpy.random.random((10, 784)).astype('float32') for _ in range(5)
+        ]
+
+    def feed_generator(self):
+        for a_np in self.a_nps:
+            yield {'a': a_np, 'b': self.b_np}
+
+    def test_run_feed_generator(self):
+        exe = fluid.Executor(core.CPUPlace())
+        runner = exe.run_feed_generator(
+            self.main_program,
+            feed_generator=self.feed_generator(),
+            fetch_list=[self.output])
+        results = [outs[0] for outs in runner]
+        self.assertEqual(len(results), len(self.a_nps))
+        for out, a_np in zip(results, self.a_nps):
+            self.assertTrue(numpy.allclose(out, numpy.dot(a_np, self.b_np)))
+        self.assertEqual(len(runner.timings), len(self.a_nps))
+        for timing in runner.timings:
+            self.assertEqual(sorted(timing.keys()), ['compute', 'feed', 'wait'])
+        # every step runs the cached prepared context
+        info = exe.program_cache_info()
+        self.assertEqual(info['misses'], 1)
+        self.assertEqual(info['hits'], len(self.a_nps) - 1)
+
+    def test_generator_exception(self):
+        def feed_generator():
+            yield {'a': self.a_nps[0], 'b': self.b_np}
+            raise RuntimeError("bad batch")
+
+        exe = fluid.Executor(core.CPUPlace())
+        runner = exe.run_feed_generator(
+            self.main_program,
+            feed_generator=feed_generator(),
+            fetch_list=[self.output])
+        with self.assertRaises(RuntimeError):
+            for outs in runner:
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
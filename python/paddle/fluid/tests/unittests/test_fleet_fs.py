@@ -0,0 +1,315 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import unittest
+
+from paddle.fluid.incubate.fleet.utils.hdfs import HDFSClient, LocalFS
+
+# A hadoop client running the fs commands on the local file system. It logs
+# every command, and fails while the failure counter file is positive.
+FAKE_HADOOP = '''#!%s
+import os, shutil, sys, time
+args = [a for a in sys.argv[2:] if not a.startswith("-D")]
+home = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+with open(os.path.join(home, "commands.log"), "a") as f:
+    f.write("%%f %%s\\n" %% (time.time(), " ".join(args)))
+counter = os.path.join(home, "failures")
+if os.path.exists(counter):
+    failures = int(open(counter).read())
+    if failures > 0:
+        open(counter, "w").write(str(failures - 1))
+        sys.exit(255)
+cmd, paths = args[0], args[1:]
+
+def line(path):
+    kind = "d" if os.path.isdir(path) else "-"
+    print("%%srwxr-xr-x   3 user group %%d 2019-10-10 10:10 %%s" %% (
+        kind, os.path.getsize(path), path))
+
+code = 0
+if cmd in ("-ls", "-lsr"):
+    for path in paths:
+        if not os.path.exists(path):
+            sys.stderr.write("ls: `%%s': No such file or directory\\n" %% path)
+            code = 1
+        elif os.path.isdir(path):
+            for dirname, folders, names in os.walk(path):
+                for name in sorted(folders + names):
+                    line(os.path.join(dirname, name))
+                if cmd == "-ls":
+                    break
+        else:
+            line(path)
+elif cmd == "-test":
+    flag, path = paths
+    test = {"-e": os.path.exists, "-d": os.path.isdir, "-f": os.path.isfile}
+    code = 0 if test[flag](path) else 1
+elif cmd == "-cat":
+    sys.stdout.write(open(paths[0]).read())
+elif cmd in ("-put", "-get"):
+    src, dst = paths
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src.rstrip("/")))
+    if os.path.isdir(src):
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy(src, dst)
+elif cmd == "-mkdir":
+    os.makedirs(paths[0])
+elif cmd == "-rmr":
+    shutil.rmtree(paths[0])
+elif cmd == "-rm":
+    os.remove(paths[0])
+elif cmd == "-mv":
+    os.rename(paths[0], paths[1])
+sys.exit(code)
+''' % sys.executable
+
+
+class TestLocalFS(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.local = os.path.join(self.root, "local")
+        os.makedirs(self.local)
+        for i in range(8):
+            with open(os.path.join(self.local, "part-%d" % i), "w") as f:
+                f.write("data %d\n" % i)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def get_client(self):
+        return LocalFS()
+
+    def remote(self, path):
+        return os.path.join(self.root, "remote", path)
+
+    def test_upload_download(self):
+        client = self.get_client()
+        output = self.remote("output")
+        self.assertTrue(client.makedirs(output))
+        self.assertTrue(
+            client.upload(
+                output, self.local, multi_processes=3, overwrite=True))
+        files = client.ls(output)
+        self.assertEqual(
+            sorted(os.path.basename(f) for f in files),
+            ["part-%d" % i for i in range(8)])
+
+        types = client.stat([output, files[0], self.remote("missing")])
+        self.assertEqual(types, {
+            output: "dir",
+            files[0]: "file",
+            self.remote("missing"): None
+        })
+        self.assertTrue(client.is_file(files[0]))
+        self.assertFalse(client.is_dir(files[0]))
+        self.assertEqual(client.cat(files[0]), "data 0")
+
+        downloaded = client.download(
+            output, os.path.join(self.root, "download"), multi_processes=4)
+        self.assertEqual(len(downloaded), 8)
+
+        self.assertTrue(client.upload_dir(self.remote("dirs"), self.local))
+        self.assertEqual(
+            len(client.lsr(self.remote(os.path.join("dirs", "local")))), 8)
+        self.assertTrue(client.rename(output, self.remote("renamed")))
+        self.assertFalse(client.is_exist(output))
+        self.assertTrue(client.delete(self.remote("renamed")))
+        self.assertEqual(client.ls(self.remote("renamed")), [])
+
+    def test_split_files(self):
+        files = ["part-%d" % i for i in range(5)]
+        self.assertEqual(LocalFS.split_files(files, 0, 2), files[:3])
+        self.assertEqual(LocalFS.split_files(files, 1, 2), files[3:])
+
+
+class TestHDFSClient(TestLocalFS):
+    def setUp(self):
+        super(TestHDFSClient, self).setUp()
+        self.hadoop_home = os.path.join(self.root, "hadoop")
+        hadoop_bin = os.path.join(self.hadoop_home, "bin", "hadoop")
+        os.makedirs(os.path.dirname(hadoop_bin))
+        with open(hadoop_bin, "w") as f:
+            f.write(FAKE_HADOOP)
+        os.chmod(hadoop_bin, os.stat(hadoop_bin).st_mode | stat.S_IEXEC)
+
+    def get_client(self, **kwargs):
+        return HDFSClient(self.hadoop_home, {
+            "fs.default.name": "hdfs://localhost:54310",
+            "hadoop.job.ugi": "hello,hello123"
+        }, **kwargs)
+
+    def commands(self):
+        with open(os.path.join(self.hadoop_home, "commands.log")) as f:
+            return [line.split(" ", 1) for line in f.read().splitlines()]
+
+    def test_batched_stat_and_cache(self):
+        client = self.get_client(ls_cache_ttl=60)
+        self.assertTrue(client.makedirs(self.remote("a")))
+        client.upload(self.remote("a"), self.local)
+        num_commands = len(self.commands())
+
+        paths = [self.remote("a"), self.remote(os.path.join("a", "part-0"))] + \
+            [self.remote(os.path.join("a", "missing-%d" % i)) for i in range(5)]
+        types = client.stat(paths)
+        self.assertEqual([types[p] for p in paths],
+                         ["dir", "file"] + [None] * 5)
+        # the parents of the paths are listed by one command
+        self.assertEqual(len(self.commands()), num_commands + 1)
+        self.assertEqual(self.commands()[-1][1].split()[0], "-ls")
+
+        # the listings are cached
+        self.assertTrue(client.is_exist(paths[0]))
+        self.assertTrue(client.is_file(paths[1]))
+        self.assertFalse(client.is_dir(paths[2]))
+        self.assertEqual(len(client.ls(self.remote("a"))), 8)
+        self.assertEqual(len(self.commands()), num_commands + 1)
+
+        # and dropped when the client modifies the files
+        client.delete(paths[1])
+        self.assertFalse(client.is_exist(paths[1]))
+
+        client = self.get_client(ls_cache_ttl=0)
+        client.is_exist(paths[0])
+        num_commands = len(self.commands())
+        client.is_exist(paths[0])
+        self.assertEqual(len(self.commands()), num_commands + 1)
+
+    def test_single_path_test(self):
+        # a single path is tested rather than listing its parent
+        client = self.get_client()
+        self.assertTrue(client.makedirs(self.remote("a")))
+        client.upload(self.remote("a"), self.local)
+        part = self.remote(os.path.join("a", "part-0"))
+        num_commands = len(self.commands())
+        self.assertTrue(client.is_exist(part))
+        self.assertFalse(client.is_dir(part))
+        self.assertTrue(client.is_dir(self.remote("a")))
+        self.assertEqual(client.stat([part]), {part: "file"})
+        self.assertFalse(client.is_file(self.remote("missing")))
+        commands = [c.split()[:2] for _, c in self.commands()[num_commands:]]
+        self.assertEqual(commands, [["-test", "-e"], ["-test", "-d"],
+                                    ["-test", "-d"], ["-test", "-e"],
+                                    ["-test", "-d"], ["-test", "-e"]])
+
+    def test_authority_path(self):
+        client = self.get_client()
+        self.assertEqual(
+            client._split_path("hdfs://localhost:54310"),
+            ("hdfs://localhost:54310", "/"))
+        self.assertEqual(
+            client._split_path("hdfs://localhost:54310/a/../b/"),
+            ("hdfs://localhost:54310", "/b"))
+        self.assertEqual(client._split_path(""), ("", "."))
+        paths = ["hdfs://localhost:54310", "hdfs://localhost:54310/"]
+        self.assertEqual(client.stat(paths), dict((p, "dir") for p in paths))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.hadoop_home, "commands.log")))
+
+    def test_fleet_util_shared_client(self):
+        from paddle.fluid.incubate.fleet.utils.fleet_util import FleetUtil
+        fleet_util = FleetUtil()
+        output = self.remote("output")
+        os.makedirs(output)
+        args = (output, "hdfs://localhost:54310", "hello,hello123",
+                self.hadoop_home)
+        self.assertEqual(fleet_util.get_last_save_model(*args)[:3],
+                         [-1, -1, ""])
+        with open(os.path.join(output, "donefile.txt"), "w") as f:
+            f.write("20190722\t123\t%s/20190722/0/\t0\t0\n" % output)
+        self.assertEqual(
+            fleet_util.get_last_save_model(*args),
+            [20190722, 0, "%s/20190722/0/" % output, 123])
+        # one client, and a single cat for every donefile read
+        self.assertEqual(len(fleet_util._hdfs_clients), 1)
+        self.assertEqual([c.split()[0] for _, c in self.commands()],
+                         ["-cat", "-cat"])
+
+    def test_relative_paths(self):
+        os.makedirs(self.remote("d"))
+        with open(self.remote("foo"), "w") as f:
+            f.write("foo")
+        with open(self.remote(os.path.join("d", "x")), "w") as f:
+            f.write("x")
+        cwd = os.getcwd()
+        os.chdir(self.remote(""))
+        try:
+            client = self.get_client()
+            self.assertEqual(
+                client.stat(["foo", "d", "./d/x", "missing"]), {
+                    "foo": "file",
+                    "d": "dir",
+                    "./d/x": "file",
+                    "missing": None
+                })
+            self.assertTrue(client.is_exist("foo"))
+            self.assertTrue(client.is_dir("d"))
+            self.assertEqual(client.cat("foo"), "foo")
+        finally:
+            os.chdir(cwd)
+
+    def test_cat_written_by_others(self):
+        os.makedirs(self.remote(""))
+        path = self.remote("donefile.txt")
+        client = self.get_client(ls_cache_ttl=60)
+        self.assertEqual(
+            client.stat([path, self.remote("")]), {
+                path: None,
+                self.remote(""): "dir"
+            })
+        self.assertEqual(client.cat(path), "")
+        # the file written by another client is read though the listing of
+        # its directory is cached
+        with open(path, "w") as f:
+            f.write("done")
+        self.assertFalse(client.is_file(path))
+        self.assertEqual(client.cat(path), "done")
+        # the listings are not cached by default
+        self.assertTrue(self.get_client().is_file(path))
+
+    def test_retry_backoff(self):
+        client = self.get_client(retry_interval=0.1, max_retry_interval=0.2)
+        os.makedirs(self.remote(""))
+        with open(os.path.join(self.hadoop_home, "failures"), "w") as f:
+            f.write("3")
+        self.assertTrue(
+            client._put(
+                os.path.join(self.local, "part-0"),
+                self.remote("part-0"),
+                retry_times=5))
+        times = [float(t) for t, _ in self.commands()]
+        self.assertEqual(len(times), 4)
+        intervals = [b - a for a, b in zip(times, times[1:])]
+        self.assertGreaterEqual(intervals[0], 0.1)
+        self.assertGreaterEqual(intervals[1], 0.2)
+        # capped by the max retry interval
+        self.assertGreaterEqual(intervals[2], 0.2)
+        self.assertLess(intervals[2], 0.4 + 1.0)
+
+        # a missing path is not retried
+        num_commands = len(self.commands())
+        self.assertEqual(client.lsr(self.remote("missing")), [])
+        self.assertEqual(len(self.commands()), num_commands + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import math
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from paddle.fluid.incubate.fleet.utils.metric_state import MetricState
+
+NUM_BUCKET = 4096
+WORKER_NUM = 3
+
+
+class LocalRoleMaker(object):
+    """
+    A stand-in of the MPI role maker for the workers in local processes. The
+    first worker receives the buffers of the others through pipes, sums them
+    and sends the sum back.
+    """
+
+    def __init__(self, worker_index, conns):
+        self._worker_index = worker_index
+        self._conns = conns
+        self.all_reduce_calls = 0
+
+    def _reduce(self, input):
+        if self._worker_index == 0:
+            total = np.copy(input)
+            for conn in self._conns:
+                total += conn.recv()
+            for conn in self._conns:
+                conn.send(total)
+            return total
+        self._conns[0].send(input)
+        return self._conns[0].recv()
+
+    def _barrier_worker(self):
+        self._reduce(np.zeros(1))
+
+    def _all_reduce(self, input, output, mode="sum"):
+        assert mode == "sum"
+        self.all_reduce_calls += 1
+        output[:] = self._reduce(input)
+
+
+def local_metrics(worker_index):
+    """
+    The auc buckets and the ctr metric counters of a worker.
+    """
+    rng = np.random.RandomState(worker_index)
+    prob = rng.random_sample(20000)**2
+    label = rng.random_sample(prob.size) < prob
+    bucket = (prob * (NUM_BUCKET - 1)).astype('int64')
+    stat_pos = np.bincount(bucket[label], minlength=NUM_BUCKET)
+    stat_neg = np.bincount(bucket[~label], minlength=NUM_BUCKET)
+    counters = dict(
+        sqrerr=np.sum((prob - label)**2),
+        abserr=np.sum(np.abs(prob - label)),
+        prob=np.sum(prob),
+        q=np.sum(np.log(prob / (1 - prob))),
+        pos_ins_num=np.sum(label),
+        total_ins_num=prob.size)
+    return stat_pos, stat_neg, counters
+
+
+def run_worker(worker_index, conns, queue):
+    role_maker = LocalRoleMaker(worker_index, conns)
+    stat_pos, stat_neg, counters = local_metrics(worker_index)
+    role_maker._barrier_worker()
+    global_state = MetricState(stat_pos, stat_neg,
+                               **counters).all_reduce(role_maker)
+    queue.put((worker_index, role_maker.all_reduce_calls,
+               global_state.metrics()))
+
+
+def python_metrics(global_pos, global_neg, sqrerr, abserr, prob, q,
+                   pos_ins_num, total_ins_num):
+    """
+    The metrics computed bucket by bucket, as FleetUtil did.
+    """
+    num_bucket = len(global_pos)
+    area, pos, neg = 0.0, 0.0, 0.0
+    for index in reversed(range(num_bucket)):
+        new_pos = pos + global_pos[index]
+        new_neg = neg + global_neg[index]
+        area += (new_neg - neg) * (pos + new_pos) / 2
+        pos, neg = new_pos, new_neg
+    auc = 0.5 if pos * neg == 0 else area / (pos * neg)
+
+    last_ctr = -1.0
+    impression_sum, ctr_sum, click_sum = 0.0, 0.0, 0.0
+    error_sum, error_count = 0.0, 0.0
+    for i in range(num_bucket):
+        click = global_pos[i]
+        show = global_pos[i] + global_neg[i]
+        ctr = float(i) / num_bucket
+        if abs(ctr - last_ctr) > 0.01:
+            last_ctr = ctr
+            impression_sum, ctr_sum, click_sum = 0.0, 0.0, 0.0
+        impression_sum += show
+        ctr_sum += ctr * show
+        click_sum += click
+        if impression_sum == 0:
+            continue
+        adjust_ctr = ctr_sum / impression_sum
+        if adjust_ctr == 0:
+            continue
+        relative_error = math.sqrt((1 - adjust_ctr) /
+                                   (adjust_ctr * impression_sum))
+        if relative_error < 0.05:
+            actual_ctr = click_sum / impression_sum
+            error_sum += abs(actual_ctr / adjust_ctr - 1) * impression_sum
+            error_count += impression_sum
+            last_ctr = -1
+    bucket_error = error_sum / error_count if error_count > 0 else 0.0
+
+    actual_ctr = pos_ins_num / total_ins_num
+    predicted_ctr = prob / total_ins_num
+    copc = actual_ctr / predicted_ctr if predicted_ctr > 1e-6 else 0.0
+    return [
+        auc, bucket_error, abserr / total_ins_num,
+        math.sqrt(sqrerr / total_ins_num), actual_ctr, predicted_ctr, copc,
+        q / total_ins_num, int(total_ins_num)
+    ]
+
+
+class TestMetricState(unittest.TestCase):
+    def global_metrics(self):
+        parts = [local_metrics(i) for i in range(WORKER_NUM)]
+        global_pos = sum(part[0] for part in parts)
+        global_neg = sum(part[1] for part in parts)
+        counters = {
+            name: sum(part[2][name] for part in parts)
+            for name in MetricState.COUNTERS
+        }
+        return global_pos, global_neg, counters
+
+    def test_metrics(self):
+        global_pos, global_neg, counters = self.global_metrics()
+        expected = python_metrics(global_pos, global_neg, **counters)
+        metrics = MetricState(global_pos, global_neg, **counters).metrics()
+        self.assertEqual(metrics[-1], expected[-1])
+        self.assertTrue(np.allclose(metrics[:-1], expected[:-1], rtol=1e-10))
+        self.assertGreater(metrics[1], 0)
+
+        # the windows of the bucket error computed in several chunks
+        state = MetricState(global_pos, global_neg, **counters)
+        state._WINDOW_CHUNK_SIZE = 1000
+        self.assertEqual(state.bucket_error(), metrics[1])
+
+        empty = MetricState(np.zeros(NUM_BUCKET), np.zeros(NUM_BUCKET))
+        self.assertEqual(empty.auc(), 0.5)
+        self.assertEqual(empty.bucket_error(), 0.0)
+
+    def test_pack_merge(self):
+        parts = [
+            MetricState(stat_pos, stat_neg, **counters)
+            for stat_pos, stat_neg, counters in [
+                local_metrics(i) for i in range(WORKER_NUM)
+            ]
+        ]
+        packed = parts[0].pack()
+        self.assertEqual(packed.shape,
+                         (2 * NUM_BUCKET + len(MetricState.COUNTERS), ))
+        unpacked = MetricState.unpack(packed, NUM_BUCKET)
+        self.assertTrue(np.array_equal(unpacked.pack(), packed))
+
+        merged = parts[0]
+        for part in parts[1:]:
+            merged.merge(part)
+        global_pos, global_neg, counters = self.global_metrics()
+        self.assertTrue(
+            np.allclose(merged.pack(),
+                        MetricState(global_pos, global_neg, **counters).pack(
+                        )))
+        self.assertRaises(ValueError, merged.merge,
+                          MetricState(np.zeros(10), np.zeros(10)))
+        self.assertRaises(ValueError, MetricState.unpack, packed, 10)
+
+    def test_all_reduce_in_processes(self):
+        # the first worker holds one end of a pipe to every other worker
+        pipes = [multiprocessing.Pipe() for _ in range(WORKER_NUM - 1)]
+        worker_conns = [[root for root, _ in pipes]] + [[conn]
+                                                        for _, conn in pipes]
+        queue = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=run_worker, args=(i, worker_conns[i], queue))
+            for i in range(WORKER_NUM)
+        ]
+        for worker in workers:
+            worker.start()
+        results = sorted(queue.get(timeout=60) for _ in workers)
+        for worker in workers:
+            worker.join()
+
+        global_pos, global_neg, counters = self.global_metrics()
+        expected = python_metrics(global_pos, global_neg, **counters)
+        for worker_index, all_reduce_calls, metrics in results:
+            self.assertEqual(all_reduce_calls, 1)
+            self.assertEqual(metrics[-1], expected[-1])
+            self.assertTrue(
+                np.allclose(
+                    metrics[:-1], expected[:-1], rtol=1e-10),
+                "worker %d: %s vs %s" % (worker_index, metrics, expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -153,6 +153,33 @@ class TestGradientClip(unittest.TestCase):
     def test_operators(self):
         self.check_operators(core.CPUPlace())
 
+    def test_global_norm_clip_in_place(self):
+        prog = fluid.framework.Program()
+        startup_program = fluid.framework.Program()
+        with fluid.program_guard(
+                main_program=prog, startup_program=startup_program):
+            data = fluid.layers.data(
+                name="words", shape=[1], dtype="int64", lod_level=1)
+            label = fluid.layers.data(name="label", shape=[1], dtype="int64")
+            cost = bow_net(data, label, self.word_dict_len)
+            p_g = fluid.backward.append_backward(loss=cost)
+            fluid.clip.set_gradient_clip(
+                fluid.clip.GradientClipByGlobalNorm(clip_norm=5.0))
+            num_ops = len(prog.global_block().ops)
+            p_g_clip = fluid.clip.append_gradient_clip_ops(p_g)
+
+        # the gradients are rescaled in place
+        self.assertEqual([g.name for _, g in p_g_clip],
+                         [g.name for _, g in p_g])
+        op_types = [op.type for op in prog.global_block().ops[num_ops:]]
+        self.assertEqual(op_types.count('squared_l2_norm'), len(p_g))
+        self.assertEqual(op_types.count('elementwise_mul'), len(p_g))
+        self.assertEqual(op_types.count('sums'), 1)
+        self.assertNotIn('square', op_types)
+        self.assertNotIn('reduce_sum', op_types)
+        # the sparse gradient of the embedding is merged but not densified
+        self.assertEqual(op_types.count('merge_selected_rows'), 1)
+
     def test_sparse_gradient_clip(self):
         for place in self.get_places():
             self.check_sparse_gradient_clip(place)
@@ -14,6 +14,7 @@
 
 from __future__ import print_function
 
+import os
 import unittest
 
 import six
@@ -113,6 +114,29 @@ class TestSaveInferenceModel(unittest.TestCase):
 
         save_inference_model(MODEL_DIR, ["x", "y"], [avg_cost], exe, program)
 
+        # saving again reuses the scale op on the target and the pruned
+        # inference program
+        op_num = len(program.global_block().ops)
+        fingerprint = program._fingerprint()
+        model_path = os.path.join(MODEL_DIR, "__model__")
+        with open(model_path, "rb") as f:
+            model = f.read()
+        save_inference_model(MODEL_DIR, ["x", "y"], [avg_cost], exe, program)
+        self.assertEqual(len(program.global_block().ops), op_num)
+        self.assertEqual(program._fingerprint(), fingerprint)
+        with open(model_path, "rb") as f:
+            self.assertEqual(f.read(), model)
+
+        # the model saved is loaded, and the version of its desc is checked
+        [infer_prog, feed_var_names, fetch_vars] = load_inference_model(
+            MODEL_DIR, exe)
+        self.assertEqual(feed_var_names, ["x", "y"])
+        self.assertEqual(len(fetch_vars), 1)
+        self.assertTrue(isinstance(infer_prog._version(), int))
+        fingerprint = infer_prog._fingerprint(cached=True)
+        infer_prog.global_block().create_var(name="new_var")
+        self.assertNotEqual(infer_prog._fingerprint(cached=True), fingerprint)
+
     def test_save_inference_model_with_auc(self):
         MODEL_DIR = "./tmp/inference_model4"
         init_program = Program()
@@ -3083,6 +3083,49 @@ class TestBook(LayerTest):
                         bidirectional=bidirectional,
                         batch_first=batch_first)
 
+    def test_lazy_generated_layers(self):
+        from paddle.fluid.layers import layer_function_generator as generator
+        # the docstrings are the same as the ones generated eagerly
+        self.assertEqual(layers.sigmoid.__doc__,
+                         generator.generate_activation_fn('sigmoid').__doc__)
+        self.assertEqual(layers.ops._scale.__doc__,
+                         generator.generate_layer_fn('scale').__doc__)
+        self.assertTrue(
+            layers.hard_shrink.__doc__.startswith(layers.ops._hard_shrink_.
+                                                  __doc__))
+        self.assertEqual(layers.sigmoid.__name__, 'sigmoid')
+        self.assertIs(layers.sigmoid._materialize(),
+                      layers.sigmoid._materialize())
+        with self.static_graph():
+            x = layers.data(name='x', shape=[16], dtype='float32')
+            out = layers.hard_shrink(layers.sigmoid(x), threshold=0.3)
+            self.assertEqual(
+                [op.type for op in default_main_program().global_block().ops],
+                ['sigmoid', 'hard_shrink'])
+            self.assertEqual(out.shape, x.shape)
+
+    def test_generated_layer_fn_desc(self):
+        from paddle.fluid.layers import layer_function_generator as generator
+        desc = generator._get_layer_fn_desc('layer_norm')
+        self.assertIs(desc, generator._get_layer_fn_desc('layer_norm'))
+        self.assertEqual(desc.inputs,
+                         (('X', 'x'), ('Scale', 'scale'), ('Bias', 'bias')))
+        self.assertEqual((desc.out_name, desc.out_arg), ('Y', 'y'))
+        self.assertEqual(desc.intermediate_output_names, ('Mean', 'Variance'))
+
+        layer_norm = generator.generate_layer_fn('layer_norm')
+        with self.static_graph():
+            x = layers.data(name='x', shape=[16], dtype='float32')
+            scale = layers.create_parameter(shape=[16], dtype='float32')
+            bias = layers.create_parameter(shape=[16], dtype='float32')
+            y = layer_norm(x, scale=scale, bias=bias, begin_norm_axis=1)
+            op = default_main_program().global_block().ops[-1]
+            self.assertEqual(op.type, 'layer_norm')
+            self.assertEqual(op.input('Scale'), [scale.name])
+            self.assertEqual(op.output('Y'), [y.name])
+            self.assertEqual(len(op.output('Mean')), 1)
+            self.assertEqual(op.attr('begin_norm_axis'), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
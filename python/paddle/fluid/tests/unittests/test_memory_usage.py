@@ -16,6 +16,7 @@ from __future__ import print_function
 import paddle
 import paddle.fluid as fluid
 import contextlib
+import numpy as np
 import unittest
 
 
@@ -65,5 +66,120 @@ class TestMemoryUsage(unittest.TestCase):
                 yield
 
 
+class TestMemoryPlan(unittest.TestCase):
+    def build_program(self, optimize=False):
+        main = fluid.Program()
+        startup = fluid.Program()
+        main.random_seed = startup.random_seed = 1
+        with fluid.program_guard(main, startup):
+            x = fluid.layers.data(name='x', shape=[16], dtype='float32')
+            hidden = x
+            for _ in range(6):
+                hidden = fluid.layers.fc(input=hidden, size=16, act='relu')
+            out = fluid.layers.mean(hidden)
+            params_grads = None
+            if optimize:
+                _, params_grads = fluid.optimizer.SGD(
+                    learning_rate=0.01).minimize(out)
+        return main, startup, out, params_grads
+
+    def test_peak_memory(self):
+        main, _, out, _ = self.build_program()
+        plan = fluid.contrib.MemoryPlan(main, skip_opt_set=[out.name])
+        # 6 fc with weights of 16 x 16 and biases of 16 floats
+        self.assertEqual(plan.persistable_memory(), 6 * (16 * 16 + 16) * 4)
+        peak, position = plan.peak_memory(batch_size=10)
+        self.assertTrue(0 <= position < len(main.global_block().ops))
+        self.assertGreater(peak, plan.persistable_memory())
+        # the peak is less than keeping all the variables alive
+        lower_usage, _, unit = fluid.contrib.memory_usage(main, 10)
+        self.assertEqual(unit, "KB")
+        self.assertLess(peak - plan.persistable_memory(), lower_usage * 1024)
+
+        batch_size = plan.max_batch_size(peak)
+        self.assertEqual(batch_size, 10)
+        self.assertGreater(plan.peak_memory(batch_size + 1)[0], peak)
+        self.assertEqual(plan.max_batch_size(0), 0)
+
+    def test_sequence_dims(self):
+        main = fluid.Program()
+        startup = fluid.Program()
+        with fluid.program_guard(main, startup):
+            x = fluid.data(name='x', shape=[None, None, 8], dtype='float32')
+            hidden = fluid.layers.fc(input=x, size=8, num_flatten_dims=2)
+            out = fluid.layers.mean(hidden)
+
+        plan = fluid.contrib.MemoryPlan(main, skip_opt_set=[out.name])
+        self.assertIn(x.name, plan.unsized_vars)
+        self.assertIn(hidden.name, plan.unsized_vars)
+        self.assertNotIn(out.name, plan.unsized_vars)
+        self.assertEqual(plan.var_size(x.name, 10), 0)
+        peak, _ = plan.peak_memory(batch_size=10)
+        self.assertGreaterEqual(peak, plan.persistable_memory())
+
+        plan = fluid.contrib.MemoryPlan(
+            main, skip_opt_set=[out.name], seq_len=5)
+        self.assertEqual(plan.unsized_vars, set())
+        self.assertEqual(plan.var_size(x.name, 10), 10 * 5 * 8 * 4)
+        self.assertEqual(plan.var_size(hidden.name, 10), 10 * 5 * 8 * 4)
+        self.assertEqual(plan.max_batch_size(plan.peak_memory(10)[0]), 10)
+
+    def run_steps(self, main, startup, out, steps=3):
+        exe = fluid.Executor(fluid.CPUPlace())
+        scope = fluid.core.Scope()
+        rng = np.random.RandomState(0)
+        results = []
+        with fluid.scope_guard(scope):
+            exe.run(startup)
+            for _ in range(steps):
+                feed = {'x': rng.random_sample([10, 16]).astype('float32')}
+                result, = exe.run(main, feed=feed, fetch_list=[out])
+                results.append(result)
+        return results
+
+    def test_apply(self):
+        main, startup, out, _ = self.build_program()
+        plan = fluid.contrib.MemoryPlan(main, skip_opt_set=[out.name])
+        total, shared = plan.reused_memory(batch_size=10)
+        self.assertLess(shared, total)
+
+        expected = self.run_steps(main, startup, out)
+        var_num = len(main.global_block().vars)
+        reuse = plan.apply()
+        self.assertTrue(reuse)
+        self.assertEqual(len(main.global_block().vars), var_num - len(reuse))
+        self.assertEqual(plan.reuse_plan(), {})
+        # the variables sharing a buffer have the same shape
+        for name, buffer in reuse.items():
+            self.assertEqual(plan.var_dims[buffer], plan.var_dims[name])
+        result = self.run_steps(main, startup, out)
+        self.assertTrue(np.allclose(result, expected))
+
+    def test_apply_minimized(self):
+        main, startup, out, params_grads = self.build_program(optimize=True)
+        expected = self.run_steps(main, startup, out)
+
+        plan = fluid.contrib.MemoryPlan(main, skip_opt_set=[out.name])
+        reuse = plan.apply()
+        block = main.global_block()
+        # the gradients and the op_role_var are kept for the optimizers and
+        # the transpilers
+        role_var_name = fluid.core.op_proto_and_checker_maker.kOpRoleVarAttrName(
+        )
+        for op in block.ops:
+            if op.has_attr(role_var_name):
+                for name in op.attr(role_var_name):
+                    self.assertNotIn(name, reuse)
+                    self.assertTrue(block.has_var(name))
+        for param, grad in params_grads:
+            self.assertNotIn(grad.name, reuse)
+            self.assertTrue(block.has_var(grad.name))
+            self.assertIn(grad.name, [
+                name for op in block.ops if op.type == 'sgd'
+                for name in op.input('Grad')
+            ])
+        result = self.run_steps(main, startup, out)
+        self.assertTrue(np.allclose(result, expected))
+
 if __name__ == '__main__':
     unittest.main()
@@ -12,8 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pickle
 import unittest
 
+import numpy as np
+
 import paddle.fluid as fluid
 from paddle.fluid.framework import Program, program_guard
 
@@ -45,5 +48,101 @@ class TestMetricsDetectionMap(unittest.TestCase):
         print(str(program))
 
 
+class TestStreamingMetrics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.batches = []
+        for _ in range(4):
+            class1_preds = rng.random_sample((1000, 1))
+            self.batches.append((np.concatenate(
+                (1 - class1_preds, class1_preds), axis=1),
+                                 rng.randint(0, 2, (1000, 1))))
+
+    def reference_auc(self, num_thresholds):
+        stat_pos = [0.0] * (num_thresholds + 1)
+        stat_neg = [0.0] * (num_thresholds + 1)
+        for preds, labels in self.batches:
+            for i, lbl in enumerate(labels):
+                bin_idx = int(preds[i, 1] * num_thresholds)
+                if lbl:
+                    stat_pos[bin_idx] += 1.0
+                else:
+                    stat_neg[bin_idx] += 1.0
+        tot_pos, tot_neg, auc = 0.0, 0.0, 0.0
+        for idx in reversed(range(num_thresholds + 1)):
+            tot_pos_prev, tot_neg_prev = tot_pos, tot_neg
+            tot_pos += stat_pos[idx]
+            tot_neg += stat_neg[idx]
+            auc += (tot_neg - tot_neg_prev) * (tot_pos + tot_pos_prev) / 2.0
+        return stat_pos, stat_neg, auc / tot_pos / tot_neg
+
+    def test_auc(self):
+        for num_thresholds in [200, 4095]:
+            auc = fluid.metrics.Auc(name="auc", num_thresholds=num_thresholds)
+            for preds, labels in self.batches:
+                auc.update(preds, labels)
+            stat_pos, stat_neg, expected = self.reference_auc(num_thresholds)
+            self.assertTrue(np.array_equal(auc._stat_pos, stat_pos))
+            self.assertTrue(np.array_equal(auc._stat_neg, stat_neg))
+            self.assertAlmostEqual(auc.eval(), expected, places=12)
+
+    def test_precision_recall(self):
+        precision = fluid.metrics.Precision()
+        recall = fluid.metrics.Recall()
+        tp, fp, fn = 0, 0, 0
+        for preds, labels in self.batches:
+            precision.update(preds[:, 1:], labels)
+            recall.update(preds[:, 1:], labels)
+            pred_pos = np.rint(preds[:, 1:]) == 1
+            tp += np.sum(pred_pos & (labels == 1))
+            fp += np.sum(pred_pos & (labels != 1))
+            fn += np.sum(~pred_pos & (labels == 1))
+        self.assertEqual((precision.tp, precision.fp), (tp, fp))
+        self.assertEqual((recall.tp, recall.fn), (tp, fn))
+        self.assertIsInstance(precision.tp, int)
+        self.assertAlmostEqual(precision.eval(), float(tp) / (tp + fp))
+        self.assertAlmostEqual(recall.eval(), float(tp) / (tp + fn))
+
+    def test_merge(self):
+        def new_metrics():
+            composite = fluid.metrics.CompositeMetric()
+            composite.add_metric(fluid.metrics.Precision())
+            composite.add_metric(fluid.metrics.Recall())
+            return fluid.metrics.Auc(name="auc"), composite
+
+        auc, composite = new_metrics()
+        for preds, labels in self.batches:
+            auc.update(preds, labels)
+            composite.update(preds[:, 1:], labels)
+
+        # every worker evaluates a part of the batches, the partial metrics
+        # are pickled and merged into the first one
+        partials = []
+        for preds, labels in self.batches:
+            part_auc, part_composite = new_metrics()
+            part_auc.update(preds, labels)
+            part_composite.update(preds[:, 1:], labels)
+            partials.append(
+                pickle.loads(pickle.dumps((part_auc, part_composite))))
+        merged_auc, merged_composite = partials[0]
+        for part_auc, part_composite in partials[1:]:
+            merged_auc.merge(part_auc)
+            merged_composite.merge(part_composite)
+        self.assertEqual(merged_auc.eval(), auc.eval())
+        self.assertEqual(merged_composite.eval(), composite.eval())
+
+        distance = fluid.metrics.EditDistance("edit_distance")
+        distance.update(np.array([[0], [2], [1]]), 3)
+        other = fluid.metrics.EditDistance("edit_distance")
+        other.update(np.array([[0], [3]]), 2)
+        distance.merge(other)
+        self.assertEqual(distance.eval(), (6.0 / 5, 3.0 / 5))
+
+        self.assertRaises(ValueError, auc.merge, fluid.metrics.Precision())
+        self.assertRaises(ValueError, auc.merge,
+                          fluid.metrics.Auc(
+                              name="auc", num_thresholds=200))
+
+
 if __name__ == '__main__':
     unittest.main()
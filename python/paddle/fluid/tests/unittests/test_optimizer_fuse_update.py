@@ -0,0 +1,180 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import paddle.fluid as fluid
+from paddle.fluid.framework import FUSED_VAR_PREFIX
+
+
+def simple_net(optimizer, sparse=False):
+    main = fluid.Program()
+    startup = fluid.Program()
+    main.random_seed = 1
+    startup.random_seed = 1
+    with fluid.unique_name.guard():
+        with fluid.program_guard(main, startup):
+            x = fluid.layers.data(name='x', shape=[16], dtype='float32')
+            ids = fluid.layers.data(name='ids', shape=[1], dtype='int64')
+            emb = fluid.layers.embedding(
+                input=ids, size=[10, 16], is_sparse=sparse)
+            hidden = fluid.layers.elementwise_add(x, emb)
+            for _ in range(3):
+                hidden = fluid.layers.fc(input=hidden, size=16, act='tanh')
+            # a parameter with its own learning rate is grouped separately
+            hidden = fluid.layers.fc(
+                input=hidden,
+                size=16,
+                param_attr=fluid.ParamAttr(learning_rate=0.5))
+            loss = fluid.layers.mean(hidden)
+            optimizer().minimize(loss)
+    return main, startup, loss
+
+
+def feeds(steps=5):
+    rng = np.random.RandomState(0)
+    return [{
+        'x': rng.uniform(-1, 1, [8, 16]).astype('float32'),
+        'ids': rng.randint(0, 10, [8, 1]).astype('int64')
+    } for _ in range(steps)]
+
+
+OPTIMIZERS = {
+    'sgd': lambda fuse: fluid.optimizer.SGD(0.1, fuse_update=fuse),
+    'momentum': lambda fuse: fluid.optimizer.Momentum(
+        0.1, momentum=0.9, use_nesterov=True, fuse_update=fuse),
+    'adam': lambda fuse: fluid.optimizer.Adam(0.01, fuse_update=fuse),
+    'lamb': lambda fuse: fluid.optimizer.Lamb(
+        0.01,
+        exclude_from_weight_decay_fn=lambda p: p.name.endswith('.b_0'),
+        fuse_update=fuse),
+}
+
+
+class TestOptimizerFuseUpdate(unittest.TestCase):
+    def train(self, main, startup, loss, scope):
+        exe = fluid.Executor(fluid.CPUPlace())
+        with fluid.scope_guard(scope):
+            exe.run(startup)
+            return [
+                exe.run(main, feed=feed, fetch_list=[loss])[0]
+                for feed in feeds()
+            ]
+
+    def op_types(self, program):
+        return [op.type for op in program.global_block().ops]
+
+    def check_optimizer(self, name, sparse=False):
+        main, startup, loss = simple_net(
+            lambda: OPTIMIZERS[name](False), sparse)
+        fused_main, fused_startup, fused_loss = simple_net(
+            lambda: OPTIMIZERS[name](True), sparse)
+
+        num_ops = self.op_types(main).count(name)
+        fused_num_ops = self.op_types(fused_main).count(name)
+        if name == 'lamb':
+            self.assertEqual(fused_num_ops, num_ops)
+        elif sparse:
+            # the fc parameters except the weight with its own learning rate
+            # are in a group, the embedding with sparse gradient is alone
+            self.assertEqual(fused_num_ops, 3)
+        else:
+            # the weight with its own learning rate is alone
+            self.assertEqual(fused_num_ops, 2)
+        if name in ['adam', 'lamb']:
+            self.assertLess(
+                self.op_types(fused_main).count('scale'),
+                self.op_types(main).count('scale'))
+
+        scope = fluid.core.Scope()
+        fused_scope = fluid.core.Scope()
+        losses = self.train(main, startup, loss, scope)
+        fused_losses = self.train(fused_main, fused_startup, fused_loss,
+                                  fused_scope)
+        for step_loss, fused_step_loss in zip(losses, fused_losses):
+            self.assertTrue(
+                np.allclose(
+                    step_loss, fused_step_loss, atol=1e-6),
+                "%s: %s vs %s" % (name, step_loss, fused_step_loss))
+        for var in main.list_vars():
+            if fluid.io.is_persistable(var):
+                self.assertTrue(
+                    np.allclose(
+                        np.array(scope.find_var(var.name).get_tensor()),
+                        np.array(fused_scope.find_var(var.name).get_tensor(
+                        )),
+                        atol=1e-6), var.name)
+        return main, startup, fused_main, fused_startup
+
+    def test_sgd(self):
+        self.check_optimizer('sgd')
+
+    def test_sparse_sgd(self):
+        self.check_optimizer('sgd', sparse=True)
+
+    def test_momentum(self):
+        self.check_optimizer('momentum')
+
+    def test_adam(self):
+        self.check_optimizer('adam')
+
+    def test_lamb(self):
+        self.check_optimizer('lamb')
+
+    def test_save_load(self):
+        main, startup, fused_main, fused_startup = self.check_optimizer('adam')
+        fused_vars = [
+            var for var in fused_main.list_vars()
+            if var.name.startswith(FUSED_VAR_PREFIX)
+        ]
+        self.assertGreater(len(fused_vars), 0)
+        self.assertFalse(any(fluid.io.is_persistable(v) for v in fused_vars))
+
+        # the checkpoint of the per-parameter updates is loaded into the views
+        # of the fused buffers
+        exe = fluid.Executor(fluid.CPUPlace())
+        dirname = tempfile.mkdtemp()
+        try:
+            scope = fluid.core.Scope()
+            with fluid.scope_guard(scope):
+                exe.run(startup)
+                for feed in feeds():
+                    exe.run(main, feed=feed)
+                fluid.io.save_persistables(exe, dirname, main)
+                exe.run(main, feed=feeds()[0])
+
+            fused_scope = fluid.core.Scope()
+            with fluid.scope_guard(fused_scope):
+                exe.run(fused_startup)
+                fluid.io.load_persistables(exe, dirname, fused_main)
+                exe.run(fused_main, feed=feeds()[0])
+        finally:
+            shutil.rmtree(dirname)
+
+        for param in main.all_parameters():
+            self.assertTrue(
+                np.allclose(
+                    np.array(scope.find_var(param.name).get_tensor()),
+                    np.array(fused_scope.find_var(param.name).get_tensor()),
+                    atol=1e-6), param.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
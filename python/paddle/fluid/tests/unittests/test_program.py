@@ -132,6 +132,91 @@ class TestProgram(unittest.TestCase):
         for i in range(len(no_read_ops)):
             self.assertEqual(no_read_ops[i].type, keep_read_ops[i + 2].type)
 
+    def test_op_index(self):
+        main_program = fluid.Program()
+        with fluid.program_guard(main_program, fluid.Program()):
+            x = layers.data(name='x', shape=[10], dtype='float32')
+            hidden = layers.fc(input=x, size=10)
+            out = layers.fc(input=hidden, size=10)
+        block = main_program.global_block()
+        for i, op in enumerate(block.ops):
+            self.assertEqual(op.idx, i)
+
+        scale_op = block._insert_op(
+            1,
+            type='scale',
+            inputs={'X': [hidden]},
+            outputs={'Out': [hidden]},
+            attrs={'scale': 2.0})
+        self.assertEqual(scale_op.idx, 1)
+        self.assertEqual(
+            [op.idx for op in block.ops], list(range(len(block.ops))))
+        self.assertIn(scale_op, block._var_producers(hidden.name))
+        self.assertIn(scale_op, block._var_consumers(hidden.name))
+
+        block._remove_op(1)
+        self.assertNotIn(scale_op, block._var_producers(hidden.name))
+        self.assertEqual(
+            [op.idx for op in block.ops], list(range(len(block.ops))))
+        with self.assertRaises(ValueError):
+            scale_op.idx
+
+        # ops appended on the c++ end are synced to python
+        op_desc = block.desc.append_op()
+        op_desc.set_type('scale')
+        op_desc.set_input('X', [out.name])
+        op_desc.set_output('Out', [out.name])
+        block._sync_with_cpp()
+        self.assertEqual(block.ops[-1].desc, op_desc)
+        self.assertEqual(block.ops[-1].idx, len(block.ops) - 1)
+        self.assertEqual(block._var_producers(out.name)[-1], block.ops[-1])
+
+        # ops removed on the c++ end are synced to python
+        block.desc._remove_op(0, 1)
+        block._sync_with_cpp()
+        self.assertEqual(block.desc.op_size(), len(block.ops))
+        for i, op in enumerate(block.ops):
+            self.assertEqual(op.desc, block.desc.op(i))
+            self.assertEqual(op.idx, i)
+
+        pruned = main_program._prune(out)
+        self.assertEqual(pruned.global_block().ops[-1].type, 'elementwise_add')
+
+    def test_fingerprint_and_cached_clone(self):
+        def build():
+            main_program = fluid.Program()
+            with fluid.unique_name.guard():
+                with fluid.program_guard(main_program, fluid.Program()):
+                    x = layers.data(name='x', shape=[10], dtype='float32')
+                    hidden = layers.fc(input=x, size=10)
+                    layers.dropout(hidden, dropout_prob=0.5)
+            return main_program
+
+        main_program, same_program = [build() for _ in range(2)]
+        fingerprint = main_program._fingerprint()
+        self.assertEqual(fingerprint, same_program._fingerprint())
+        self.assertEqual(main_program._fingerprint(cached=True), fingerprint)
+
+        test_program = main_program._cached_clone(for_test=True)
+        self.assertIs(main_program._cached_clone(for_test=True), test_program)
+        self.assertEqual(test_program._fingerprint(),
+                         main_program.clone(for_test=True)._fingerprint())
+
+        # the cached clone is rebuilt once it has been modified
+        test_program.global_block().ops[-1]._set_attr('dropout_prob', 0.1)
+        rebuilt_program = main_program._cached_clone(for_test=True)
+        self.assertIsNot(rebuilt_program, test_program)
+        self.assertEqual(rebuilt_program.global_block().ops[-1].attr(
+            'dropout_prob'), 0.5)
+
+        # modifying the program changes the fingerprint and the clone
+        block = main_program.global_block()
+        with fluid.program_guard(main_program):
+            layers.mean(block.var(block.ops[-1].output('Out')[0]))
+        self.assertNotEqual(main_program._fingerprint(cached=True), fingerprint)
+        self.assertIsNot(
+            main_program._cached_clone(for_test=True), rebuilt_program)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -43,3 +43,56 @@ class TestUniqueName(unittest.TestCase):
             name3 = fluid.unique_name.generate('tmp')
             self.assertNotEqual(name1, name2)
             self.assertEqual(name1[-2:], name3[-2:])
+
+    def test_scoped_generate(self):
+        with fluid.unique_name.guard(
+                fluid.unique_name.ScopedUniqueNameGenerator()):
+            self.assertEqual(fluid.unique_name.generate('fc'), 'fc_0')
+            with fluid.name_scope('s1'):
+                self.assertEqual(fluid.unique_name.generate('fc'), 's1/fc_0')
+                self.assertEqual(fluid.unique_name.generate('fc'), 's1/fc_1')
+                with fluid.name_scope('s2'):
+                    self.assertEqual(
+                        fluid.unique_name.generate('fc'), 's1/s2/fc_0')
+                self.assertEqual(
+                    fluid.unique_name.generate('s2/fc'), 's1/s2/fc_1')
+            with fluid.name_scope('s1'):
+                self.assertEqual(
+                    fluid.unique_name.generate('fc'), 's1_1/fc_0')
+            self.assertEqual(fluid.unique_name.generate('fc'), 'fc_1')
+
+        # the generator numbers its own name scopes
+        with fluid.name_scope('outer'):
+            with fluid.unique_name.guard(
+                    fluid.unique_name.ScopedUniqueNameGenerator()):
+                with fluid.name_scope('s1'):
+                    self.assertEqual(
+                        fluid.unique_name.generate('fc'), 's1/fc_0')
+            self.assertEqual(fluid.framework._full_name_scope(), '/outer/')
+
+    def test_scoped_program_desc(self):
+        def build_network():
+            x = fluid.layers.data(name='x', shape=[32], dtype='float32')
+            with fluid.name_scope('encoder'):
+                hidden = fluid.layers.fc(input=x, size=16, act='relu')
+            with fluid.name_scope('decoder'):
+                fluid.layers.fc(input=hidden, size=32)
+
+        descs = []
+        for warmup in [0, 3]:
+            main = fluid.Program()
+            with fluid.unique_name.guard(
+                    fluid.unique_name.ScopedUniqueNameGenerator()):
+                # the layers built in the other name scopes before do not
+                # change the names of the network
+                with fluid.program_guard(fluid.Program(), fluid.Program()):
+                    with fluid.name_scope('warmup'):
+                        for _ in range(warmup):
+                            fluid.layers.fc(input=fluid.layers.data(
+                                name='w', shape=[8]), size=8)
+                with fluid.program_guard(main, fluid.Program()):
+                    build_network()
+            descs.append(main.desc.serialize_to_string())
+            self.assertIn('encoder/fc_0.w_0',
+                          [p.name for p in main.all_parameters()])
+        self.assertEqual(descs[0], descs[1])
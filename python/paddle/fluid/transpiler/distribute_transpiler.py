@@ -40,7 +40,8 @@ import logging
 
 import numpy as np
 
-from .ps_dispatcher import RoundRobin, PSDispatcher
+from .ps_dispatcher import (RoundRobin, PSDispatcher, SizeBalanced,
+                            placement_report)
 from .. import core, framework, unique_name
 from ..framework import Program, default_main_program, \
     default_startup_program, Block, Parameter, grad_var_name
@@ -141,9 +142,12 @@ class DistributeTranspilerConfig(object):
     .. py:attribute:: split_method (PSDispatcher)
 
           Methods of dispatching parameters for server,
-          :ref:`api_fluid_transpiler_RoundRobin` or
-          :ref:`api_fluid_transpiler_HashName` can be used and default is RoundRobin.
-          Try to choose the best method to balance loads for parameter servers.
+          :ref:`api_fluid_transpiler_RoundRobin`,
+          :ref:`api_fluid_transpiler_HashName` or
+          :ref:`api_fluid_transpiler_SizeBalanced` can be used and default is RoundRobin.
+          Try to choose the best method to balance loads for parameter servers,
+          SizeBalanced balances the bytes of the parameters and their optimizer
+          state, see :code:`DistributeTranspiler.get_placement_report`.
 
     .. py:attribute:: min_block_size (int)
 
@@ -614,6 +618,9 @@ class DistributeTranspiler(object):
         # split and create vars, then put splited vars in dicts for later use.
         # step 1: split and create vars, then put splited vars in dicts for later use.
         self._init_splited_vars()
+        self.state_multiplier = self._get_state_multiplier()
+        if isinstance(ps_dispatcher, SizeBalanced):
+            ps_dispatcher.set_state_multiplier(self.state_multiplier)
 
         # step 2: insert send op to send gradient vars to parameter servers
         ps_dispatcher.reset()
@@ -734,6 +741,10 @@ class DistributeTranspiler(object):
                 recv_vars[i].name)
             distributed_var.endpoint = ep
 
+        self.param_placement_report = placement_report(
+            eplist, recv_vars, self.trainer_num, self.state_multiplier)
+        log("placement report: ", self.param_placement_report)
+
         need_sparse_update_params = {}
 
         # step4: Concat the parameters splits together after recv.
@@ -2413,6 +2424,68 @@ class DistributeTranspiler(object):
             return True
         return False
 
+    def _get_state_multiplier(self):
+        """
+        Get the multiplier of the bytes each param block and grad block
+        brings to the pserver, which is 1 plus the number of the optimizer
+        accumulators with the same shape as the param, e.g. 3 for Adam.
+        Returns:
+            state_multiplier (dict): splited var name -> multiplier.
+        """
+        origin_var_dict = self.origin_program.global_block().vars
+        param_multiplier = dict()
+        for op in self.optimize_ops:
+            if "Param" not in op.input_names or not op.input("Param"):
+                continue
+            param = origin_var_dict[op.input("Param")[0]]
+            multiplier = 1
+            for key in op.input_names:
+                if key in ("Param", "Grad", "LearningRate"):
+                    continue
+                for name in op.input(key):
+                    var = origin_var_dict.get(name)
+                    if var is not None and var.persistable and \
+                            var.shape == param.shape:
+                        multiplier += 1
+            param_multiplier[param.name] = multiplier
+
+        state_multiplier = dict()
+        for param_name, splited_vars in six.iteritems(self.param_var_mapping):
+            for var in splited_vars:
+                state_multiplier[var.name] = param_multiplier.get(param_name,
+                                                                  1)
+        for grad_var, param_var in six.iteritems(self.grad_param_mapping):
+            state_multiplier[grad_var.name] = state_multiplier[param_var.name]
+        return state_multiplier
+
+    def get_placement_report(self):
+        """
+        Get the placement of the parameters on the pservers after
+        :code:`transpile`, to check the balance of the pservers before
+        launching a job.
+
+        Returns:
+            dict: endpoint -> a dict of "blocks", the number of the param
+                blocks, "bytes", the bytes of the params, "state_bytes", the
+                bytes of the params and the optimizer state, and
+                "traffic_bytes", the estimated bytes each step sends.
+
+        Examples:
+            .. code-block:: python
+
+                import paddle.fluid as fluid
+                config = fluid.DistributeTranspilerConfig()
+                config.split_method = fluid.transpiler.SizeBalanced
+                t = fluid.DistributeTranspiler(config=config)
+                t.transpile(
+                    trainer_id=0,
+                    pservers="127.0.0.1:6174,127.0.0.1:6175",
+                    trainers=2)
+                for ep, stat in t.get_placement_report().items():
+                    print(ep, stat["state_bytes"], stat["traffic_bytes"])
+        """
+        return self.param_placement_report
+
     def _get_optimize_pass(self):
         """
         Get optimizer operators, parameters and gradients from origin_program
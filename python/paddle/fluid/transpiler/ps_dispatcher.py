@@ -14,6 +14,36 @@
 
 from __future__ import print_function
 
+import hashlib
+import re
+from functools import reduce
+
+from .. import core
+
+_TRAINER_SUFFIX = re.compile(r"\.trainer_\d+")
+
+
+def _dispatch_key(name):
+    """
+    The name of the param block of a var block. A gradient block is named
+    after its param with "@GRAD" and a trainer suffix, strip them so that
+    the gradient and the param blocks, on every trainer, share the key.
+    """
+    return _TRAINER_SUFFIX.sub("", name).replace("@GRAD", "")
+
+
+def _stable_hash(name):
+    """
+    A hash of the name which is the same across processes, unlike the
+    salted python "hash()" on python 3.
+    """
+    return int(hashlib.md5(name.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def _var_bytes(var):
+    numel = reduce(lambda x, y: x * y, var.shape, 1)
+    return abs(numel) * core.size_of_dtype(var.dtype)
+
 
 class PSDispatcher(object):
     """
@@ -48,8 +78,8 @@ class PSDispatcher(object):
 
 class HashName(PSDispatcher):
     """
-    Hash variable names to several endpoints using python
-    "hash()" function.
+    Hash variable names to several endpoints using a stable md5
+    hash, so that every trainer gets the same placement.
 
     Args:
         pserver_endpoints (list): list of endpoint(ip:port).
@@ -69,7 +99,7 @@ class HashName(PSDispatcher):
         super(self.__class__, self).__init__(pserver_endpoints)
 
     def _hash_block(self, block_str, total):
-        return hash(block_str) % total
+        return _stable_hash(_dispatch_key(block_str)) % total
 
     def dispatch(self, varlist):
         """
@@ -80,7 +110,7 @@ class HashName(PSDispatcher):
         """
         eplist = []
         for var in varlist:
-            server_id = self._hash_block(var.name(), len(self._eps))
+            server_id = self._hash_block(var.name, len(self._eps))
             server_for_param = self._eps[server_id]
             eplist.append(server_for_param)
         return eplist
@@ -123,3 +153,99 @@ class RoundRobin(PSDispatcher):
             if self._step >= len(self._eps):
                 self._step = 0
         return eplist
+
+
+class SizeBalanced(PSDispatcher):
+    """
+    Distribute variables to several endpoints balancing the bytes held by
+    each endpoint. Each variable goes to the endpoint with the least bytes
+    so far, the first one on ties, so the placement only depends on the
+    order and the sizes of the variables and is the same on every trainer.
+
+    The bytes of a variable can be weighted by the optimizer state it
+    brings to the pserver with `set_state_multiplier`, e.g. a param
+    optimized by Adam holds 3 times its bytes with the two moments.
+
+    Args:
+        pserver_endpoints (list): list of endpoint(ip:port).
+
+    Examples:
+        .. code-block:: python
+
+        pserver_endpoints = ["127.0.0.1:6007", "127.0.0.1:6008"]
+        vars = [block.var("fc_0.w_0"), block.var("fc_0.b_0")]
+
+        sb = SizeBalanced(pserver_endpoints)
+        sb.dispatch(vars)
+
+    """
+
+    def __init__(self, pserver_endpoints):
+        super(self.__class__, self).__init__(pserver_endpoints)
+        self._state_multiplier = {}
+        self._loads = [0] * len(self._eps)
+
+    def set_state_multiplier(self, state_multiplier):
+        """
+        Args:
+            state_multiplier (dict): the name of a variable -> the multiplier
+                of its bytes, the variables not in it are weighted by 1.
+        """
+        self._state_multiplier = dict(state_multiplier)
+
+    def reset(self):
+        """
+        reset the step counter and the bytes of each endpoint.
+        """
+        super(self.__class__, self).reset()
+        self._loads = [0] * len(self._eps)
+
+    def dispatch(self, varlist):
+        """
+        use `SizeBalanced` method to dispatch variables with each parameter server.
+        Args:
+            varlist (list): a list of Variables
+
+        """
+        eplist = []
+        for var in varlist:
+            server_id = self._loads.index(min(self._loads))
+            self._loads[server_id] += _var_bytes(var) * \
+                self._state_multiplier.get(var.name, 1)
+            eplist.append(self._eps[server_id])
+        return eplist
+
+
+def placement_report(eplist, varlist, trainer_num=1, state_multiplier=None):
+    """
+    Summarize the placement of the param blocks on the pservers.
+
+    Args:
+        eplist (list): the endpoint of each param block.
+        varlist (list): the param blocks, a list of Variables.
+        trainer_num (int): the number of trainers sending the gradients.
+        state_multiplier (dict|None): the name of a param block -> the
+            multiplier of its bytes for the optimizer state.
+
+    Returns:
+        dict: endpoint -> a dict of "blocks", the number of the blocks,
+            "bytes", the bytes of the params, "state_bytes", the bytes of
+            the params and the optimizer state, and "traffic_bytes", the
+            estimated bytes each step sends, the gradients from and the
+            params to every trainer.
+    """
+    state_multiplier = state_multiplier or {}
+    report = {}
+    for ep, var in zip(eplist, varlist):
+        stat = report.setdefault(ep, {
+            "blocks": 0,
+            "bytes": 0,
+            "state_bytes": 0,
+            "traffic_bytes": 0
+        })
+        nbytes = _var_bytes(var)
+        stat["blocks"] += 1
+        stat["bytes"] += nbytes
+        stat["state_bytes"] += nbytes * state_multiplier.get(var.name, 1)
+        stat["traffic_bytes"] += 2 * nbytes * trainer_num
+    return report
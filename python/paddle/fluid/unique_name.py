@@ -51,6 +51,73 @@ class UniqueNameGenerator(object):
         return self.prefix + "_".join([key, str(tmp)])
 
 
+class ScopedUniqueNameGenerator(UniqueNameGenerator):
+    """
+    Generate unique name with prefix under the hierarchical path of
+    :code:`fluid.name_scope`. For example, the key fc gets s1/s2/fc_0 in the
+    name scope s2 inside s1, and fc_0 out of any name scope.
+
+    The names are numbered from zero for each key in each name scope, so a
+    name only depends on what are built before it in the same name scope,
+    and the same network built in the same name scopes gets the same names
+    in any process, no matter what are built in the other name scopes.
+    The generator also has its own name scopes, which are numbered from the
+    first time it is switched to, so the program built under a new generator
+    is the same in every build.
+
+    Args:
+        prefix(str): The generated name prefix. All generated name will be
+                     started with this prefix.
+    """
+
+    def __init__(self, prefix=None):
+        super(ScopedUniqueNameGenerator, self).__init__(prefix)
+        # The counters of the keys, indexed by the path of the name scope and
+        # then the key, which are the only record of the generated names.
+        # The path strings are built once by the name scopes, so looking up
+        # a counter does not build the string of the path and the key.
+        self.scope_ids = dict()
+        self._name_scope = None
+        self._outer_name_scope = None
+
+    def _enter(self):
+        from . import framework
+        if self._name_scope is None:
+            self._name_scope = framework.NameScope()
+        self._outer_name_scope = framework._name_scope
+        framework._name_scope = self._name_scope
+
+    def _exit(self):
+        from . import framework
+        self._name_scope = framework._name_scope
+        framework._name_scope = self._outer_name_scope
+        self._outer_name_scope = None
+
+    def __call__(self, key):
+        """
+        Generate unique names with prefix and the path of current name scope
+
+        Args:
+            key(str): The key of return string.
+
+        Returns(str): A unique string with the prefix and the name scope path
+        """
+        from .framework import _full_name_scope
+        path = _full_name_scope()
+        if "/" in key:
+            # s1/fc in the name scope s2 is counted as fc in s2/s1, so the
+            # names of different paths and keys never collide.
+            sub_path, key = key.rsplit("/", 1)
+            if sub_path.strip("/"):
+                path = path + sub_path.strip("/") + "/"
+        ids = self.scope_ids.get(path)
+        if ids is None:
+            ids = self.scope_ids[path] = collections.defaultdict(int)
+        tmp = ids[key]
+        ids[key] += 1
+        return self.prefix + path[1:] + "_".join([key, str(tmp)])
+
+
 generator = UniqueNameGenerator()
 
 
@@ -136,10 +203,14 @@ def switch(new_generator=None):
     """
     global generator
     old = generator
+    if isinstance(old, ScopedUniqueNameGenerator):
+        old._exit()
     if new_generator is None:
         generator = UniqueNameGenerator()
     else:
         generator = new_generator
+    if isinstance(generator, ScopedUniqueNameGenerator):
+        generator._enter()
     return old
 
 
@@ -151,10 +222,11 @@ def guard(new_generator=None):
     names from zero again when calling :code:`generate()` with same key.
 
     Args: 
-        new_generator(str|bytes, optional): New name of global namespace. Note that str
-            in Python2 was spilted into str and bytes in Python3, so here are two 
-            types. Default is None. If not None, new_generator will be added into 
-            the prefix of unique name generated by :code:`generate()`.
+        new_generator(str|bytes|UniqueNameGenerator, optional): New name of global
+            namespace. Note that str in Python2 was spilted into str and bytes in 
+            Python3, so here are two types. Default is None. If not None, new_generator 
+            will be added into the prefix of unique name generated by :code:`generate()`.
+            A UniqueNameGenerator, e.g. a ScopedUniqueNameGenerator, is used as is.
     
     Returns:
         None.
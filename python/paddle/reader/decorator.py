@@ -13,24 +13,40 @@
 # limitations under the License.
 
 __all__ = [
-    'cache', 'map_readers', 'buffered', 'compose', 'chain', 'shuffle',
-    'ComposeNotAligned', 'firstn', 'xmap_readers', 'multiprocess_reader'
+    'cache', 'disk_cache', 'map_readers', 'buffered', 'compose', 'chain',
+    'shuffle', 'window_shuffle', 'shard_shuffle', 'ComposeNotAligned', 'firstn',
+    'xmap_readers', 'pooled_xmap_readers', 'multiprocess_reader'
 ]
 
 from threading import Thread
 import subprocess
 import multiprocessing
+import multiprocessing.pool
+import collections
+import ctypes
+import mmap
+import os
+import select
+import struct
+import tempfile
+import threading
+import time
+import traceback
 import six
 import sys
+import numpy as np
 
 from six.moves.queue import Queue
 from six.moves import zip_longest
 from six.moves import map
 from six.moves import zip
+import functools
+import hashlib
 import itertools
 import random
 import zlib
 import paddle.compat as cpt
+from six.moves import cPickle as pickle
 
 
 def cache(reader):
@@ -57,6 +73,194 @@ def cache(reader):
     return __impl__
 
 
+def _code_fingerprint(code):
+    # the nested code objects of lambdas and comprehensions are hashed by
+    # their contents, their reprs hold the addresses that differ across runs.
+    parts = [code.co_code, cpt.to_bytes(repr(code.co_names))]
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            parts.append(cpt.to_bytes(_code_fingerprint(const)))
+        elif isinstance(const, frozenset):
+            parts.append(cpt.to_bytes(repr(sorted(const, key=repr))))
+        else:
+            parts.append(cpt.to_bytes(repr(const)))
+    return hashlib.md5(b'\n'.join(parts)).hexdigest()
+
+
+def _value_fingerprint(value, depth):
+    if callable(value) and not isinstance(value, type):
+        if depth >= 4:
+            return ''
+        return _reader_fingerprint(value, depth + 1)
+    try:
+        return hashlib.md5(pickle.dumps(value, 2)).hexdigest()
+    except Exception:
+        raise ValueError(
+            "Can not fingerprint the reader state %r, please pass the key "
+            "identifying the reader data to disk_cache" % type(value))
+
+
+def _reader_fingerprint(reader, depth=0):
+    # the fingerprint covers the code of the reader, the arguments bound by
+    # functools.partial and the values or functions it closes over.
+    parts = []
+    func = reader
+    while isinstance(func, functools.partial):
+        parts.extend(_value_fingerprint(arg, depth) for arg in func.args)
+        for name, value in sorted((func.keywords or {}).items()):
+            parts.append(name)
+            parts.append(_value_fingerprint(value, depth))
+        func = func.func
+    parts.append(str(getattr(func, '__module__', '')))
+    name = getattr(func, '__name__', type(func).__name__)
+    parts.append(str(getattr(func, '__qualname__', name)))
+    code = getattr(func, '__code__', None)
+    if code is not None:
+        parts.append(_code_fingerprint(code))
+    for cell in getattr(func, '__closure__', None) or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            continue
+        parts.append(_value_fingerprint(value, depth))
+    return hashlib.md5(cpt.to_bytes('\n'.join(parts))).hexdigest()
+
+
+def disk_cache(reader, cache_dir=None, memory_budget=0, key=None):
+    """
+    Cache the reader data into a file on disk, which is replayed by memory
+    mapping in the later epochs.
+
+    Unlike :code:`cache`, the reader data is not read at decoration time.
+    The first epoch yields the samples as they are read, and writes them into
+    the cache file at the same time. The later epochs read the cache file,
+    whose numpy arrays are returned as read-only, zero-copy views of the
+    memory mapped file. The samples of the first :code:`memory_budget` bytes
+    are also kept in memory and replayed from there.
+
+    The cache file is named by the fingerprint of :code:`reader`, i.e. its
+    code, the arguments bound by :code:`functools.partial` and the pickled
+    values it closes over, together with :code:`key`. A complete cache file
+    in :code:`cache_dir` with the same name is reused, even from a previous
+    run. Pass a different :code:`key` (e.g. the version of the data) to
+    invalidate it. A reader closing over values that can not be pickled,
+    e.g. open files, can not be fingerprinted, and :code:`key` is required
+    to identify its data.
+
+    Args:
+        reader (generator): a reader object which yields data each time.
+        cache_dir (str, optional): the directory of the cache files.
+            Default ~/.cache/paddle/reader_cache.
+        memory_budget (int, optional): the max bytes of the samples kept in
+            memory, the rest are only read from the cache file. Default 0.
+        key (object, optional): extra information to identify the reader
+            data, whose repr is part of the fingerprint. Required if the
+            reader can not be fingerprinted. Default None.
+
+    Returns:
+        generator: a decorated reader object which yields data from the
+        cache file after the first epoch.
+
+    Examples:
+        .. code-block:: python
+
+            import numpy as np
+            import paddle
+
+            def reader():
+                for i in range(10):
+                    yield np.ones([3, 32, 32], dtype='float32') * i, i
+
+            cached_reader = paddle.reader.disk_cache(
+                reader, memory_budget=64 * 1024 * 1024, key='v1')
+            for epoch in range(2):
+                for image, label in cached_reader():
+                    pass
+    """
+    if cache_dir is None:
+        cache_dir = os.path.expanduser('~/.cache/paddle/reader_cache')
+    try:
+        fingerprint = _reader_fingerprint(reader)
+    except ValueError:
+        if key is None:
+            raise
+        # the key identifies the reader data by itself
+        fingerprint = str(getattr(reader, '__module__', '')) + str(
+            getattr(reader, '__name__', type(reader).__name__))
+    fingerprint = hashlib.md5(
+        cpt.to_bytes(fingerprint + repr(key))).hexdigest()
+    data_path = os.path.join(cache_dir, fingerprint + '.data')
+    index_path = os.path.join(cache_dir, fingerprint + '.index')
+    state = {'memory': [], 'buf': None, 'offsets': None}
+
+    def _load():
+        if state['offsets'] is None and os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                offsets = np.load(f)
+            if len(offsets) > 0:
+                with open(data_path, 'rb') as f:
+                    state['buf'] = mmap.mmap(
+                        f.fileno(), 0, access=mmap.ACCESS_READ)
+            state['offsets'] = offsets
+        return state['offsets'] is not None
+
+    def _replay():
+        memory = state['memory']
+        for sample in memory:
+            yield sample
+        buf = state['buf']
+        for offset in state['offsets'][len(memory):]:
+            yield _Record.read_from(buf, int(offset), copy=False)
+
+    def _fill():
+        if not os.path.exists(cache_dir):
+            try:
+                os.makedirs(cache_dir)
+            except OSError:
+                if not os.path.isdir(cache_dir):
+                    raise
+        suffix = '.%d.tmp' % os.getpid()
+        memory = []
+        memory_bytes = 0
+        offsets = []
+        complete = False
+        try:
+            with open(data_path + suffix, 'wb') as f:
+                pos = 0
+                for sample in reader():
+                    record = _Record(sample)
+                    record.dump(f)
+                    offsets.append(pos)
+                    pos += record.nbytes
+                    # the samples in memory are always a prefix of the data
+                    if len(memory) == len(offsets) - 1 and \
+                            memory_bytes + record.nbytes <= memory_budget:
+                        memory.append(sample)
+                        memory_bytes += record.nbytes
+                    yield sample
+            with open(index_path + suffix, 'wb') as f:
+                np.save(f, np.array(offsets, dtype='int64'))
+            # the index file is renamed last, so its existence means the
+            # data file is complete
+            os.rename(data_path + suffix, data_path)
+            os.rename(index_path + suffix, index_path)
+            complete = True
+        finally:
+            if not complete:
+                for path in (data_path + suffix, index_path + suffix):
+                    if os.path.exists(path):
+                        os.remove(path)
+        state['memory'] = memory
+        _load()
+
+    def __impl__():
+        if _load():
+            return _replay()
+        return _fill()
+
+    return __impl__
+
+
 def map_readers(func, *readers):
     """
     Creates a data reader that outputs return value of function using
@@ -148,6 +352,108 @@ def shuffle(reader, buf_size):
     return data_reader
 
 
+def window_shuffle(reader, buf_size, seed=None):
+    """
+    Create a decorated reader that outputs the data shuffled within a
+    sliding window.
+
+    Unlike :code:`shuffle`, which shuffles disjoint blocks of
+    :code:`buf_size` samples, the window is filled once and then every
+    incoming sample replaces a randomly chosen sample of the window, which is
+    output. So every sample can be mixed with any other sample nearby, and
+    the reader never stalls to refill the buffer, at the same memory cost.
+
+    Args:
+        reader(callable): the original reader whose data will be shuffled.
+        buf_size(int): the size of the shuffle window.
+        seed(int, optional): the seed of the random generator. If set, the
+            decorated reader outputs the same sequence of epochs in every
+            run. Default None.
+
+    Returns:
+        callable: a decorated reader.
+
+    Examples:
+        .. code-block:: python
+
+            import paddle
+
+            def reader():
+                for i in range(5):
+                    yield i
+            shuffled_reader = paddle.reader.window_shuffle(reader, 3, seed=1)
+            for e in shuffled_reader():
+                print(e)
+            # outputs are 0~4 unordered arrangement
+    """
+    rng = random.Random(seed)
+    buf_size = max(buf_size, 1)
+
+    def data_reader():
+        buf = []
+        for e in reader():
+            if len(buf) < buf_size:
+                buf.append(e)
+                continue
+            idx = rng.randrange(buf_size)
+            yield buf[idx]
+            buf[idx] = e
+
+        rng.shuffle(buf)
+        for b in buf:
+            yield b
+
+    return data_reader
+
+
+def shard_shuffle(readers, buf_size, seed=None):
+    """
+    Create a reader that shuffles at two levels: the order of the shard
+    readers (e.g. one reader per data file) is shuffled every epoch, and
+    the chained data is then shuffled within a sliding window by
+    :code:`window_shuffle`.
+
+    Args:
+        readers(list): the readers of the shards.
+        buf_size(int): the size of the shuffle window.
+        seed(int, optional): the seed of the random generator. If set, the
+            reader outputs the same sequence of epochs in every run.
+            Default None.
+
+    Returns:
+        callable: the shuffled reader.
+
+    Examples:
+        .. code-block:: python
+
+            import paddle
+
+            def shard_reader(start):
+                def reader():
+                    for i in range(start, start + 3):
+                        yield i
+                return reader
+
+            shuffled_reader = paddle.reader.shard_shuffle(
+                [shard_reader(0), shard_reader(10), shard_reader(20)],
+                buf_size=4,
+                seed=1)
+            for e in shuffled_reader():
+                print(e)
+    """
+    rng = random.Random(seed)
+    readers = list(readers)
+
+    def chained_reader():
+        order = list(range(len(readers)))
+        rng.shuffle(order)
+        for idx in order:
+            for e in readers[idx]():
+                yield e
+
+    return window_shuffle(chained_reader, buf_size, seed=rng.random())
+
+
 def chain(*readers):
     """
     Use the input data readers to create a chained data reader. The new created reader
@@ -453,7 +759,202 @@ def xmap_readers(mapper, reader, process_num, buffer_size, order=False):
     return xreader
 
 
-def multiprocess_reader(readers, use_pipe=True, queue_size=1000):
+class _TimedMapper(object):
+    """
+    Wrap a mapper to measure its latency in the worker. The exceptions of
+    the mapper are returned rather than raised, so the result callback is
+    always called.
+    """
+
+    def __init__(self, mapper):
+        self.mapper = mapper
+
+    def __call__(self, sample):
+        start = time.time()
+        try:
+            return True, self.mapper(sample), time.time() - start
+        except Exception as e:
+            error = "%s\n%s" % (repr(e), traceback.format_exc())
+            return False, error, time.time() - start
+
+
+class _PooledXmapReader(object):
+    """
+    The reader returned by :code:`pooled_xmap_readers`.
+    """
+
+    def __init__(self, mapper, reader, process_num, buffer_size, order,
+                 use_process, latency_window):
+        assert process_num > 0, "process_num should be larger than 0"
+        assert buffer_size > 0, "buffer_size should be larger than 0"
+        self._mapper = _TimedMapper(mapper)
+        self._reader = reader
+        self._process_num = process_num
+        self._buffer_size = buffer_size
+        self._order = order
+        self._use_process = use_process
+        self._pool = None
+        self._latencies = collections.deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self._use_process:
+                self._pool = multiprocessing.Pool(self._process_num)
+            else:
+                self._pool = multiprocessing.pool.ThreadPool(self._process_num)
+        return self._pool
+
+    def _unpack(self, result):
+        succeed, value, latency = result
+        if latency is not None:
+            with self._lock:
+                self._latencies.append(latency)
+        if not succeed:
+            raise ValueError("The mapper of pooled_xmap_readers raises an "
+                             "exception: %s" % value)
+        return value
+
+    def _ordered(self, pool):
+        # the in-flight results form a reorder buffer, whose size is bounded
+        # by buffer_size. The head is waited for rather than polled.
+        pending = collections.deque()
+        for sample in self._reader():
+            if len(pending) >= self._buffer_size:
+                yield self._unpack(pending.popleft().get())
+            pending.append(pool.apply_async(self._mapper, (sample, )))
+        while pending:
+            yield self._unpack(pending.popleft().get())
+
+    def _unordered(self, pool):
+        done = Queue()
+
+        def failed(e):
+            # the task failed out of the mapper, e.g. the mapper or the sample
+            # can not be pickled, or the worker died
+            done.put((False, repr(e), None))
+
+        in_flight = 0
+        for sample in self._reader():
+            if in_flight >= self._buffer_size:
+                yield self._unpack(done.get())
+                in_flight -= 1
+            pool.apply_async(
+                self._mapper, (sample, ),
+                callback=done.put,
+                error_callback=failed)
+            in_flight += 1
+        while in_flight > 0:
+            yield self._unpack(done.get())
+            in_flight -= 1
+
+    def __call__(self):
+        pool = self._get_pool()
+        if self._order:
+            return self._ordered(pool)
+        else:
+            return self._unordered(pool)
+
+    def stats(self):
+        """
+        Get the latency percentiles of the mapper over the recent samples.
+
+        Returns:
+            dict: the number of the recent samples measured :code:`count`, and
+            the latency in seconds :code:`mean`, :code:`p50`, :code:`p90`,
+            :code:`p99` and :code:`max`.
+        """
+        with self._lock:
+            latencies = np.array(self._latencies, dtype='float64')
+        if latencies.size == 0:
+            return {'count': 0}
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        return {
+            'count': latencies.size,
+            'mean': float(latencies.mean()),
+            'p50': float(p50),
+            'p90': float(p90),
+            'p99': float(p99),
+            'max': float(latencies.max())
+        }
+
+    def close(self):
+        """
+        Shut down the worker pool. The reader starts a new pool if it is
+        called again.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+
+def pooled_xmap_readers(mapper,
+                        reader,
+                        process_num,
+                        buffer_size,
+                        order=False,
+                        use_process=False,
+                        latency_window=10000):
+    """
+    Use a pool of threads or processes to map samples from reader by a mapper
+    defined by user, like :code:`xmap_readers`. The pool is created at the
+    first iteration and kept alive across epochs until :code:`close()` of the
+    returned reader is called.
+
+    At most :code:`buffer_size` samples are mapped at the same time. If
+    :code:`order` is True, the samples mapped out of order are kept in a
+    reorder buffer of this size.
+
+    Args:
+        mapper (callable): a function to map the data from reader. It must
+            be picklable (e.g. a module level function or a
+            :code:`functools.partial` of it) if :code:`use_process` is True.
+        reader (callable): a data reader which yields the data.
+        process_num (int): the number of threads or processes to map samples.
+        buffer_size (int): the max number of samples being mapped.
+        order (bool): whether to keep the data order from original reader.
+            Default False.
+        use_process (bool): whether to use a pool of processes, which suits
+            the CPU-bound mappers, rather than threads. Default False.
+        latency_window (int): the number of the recent samples whose mapper
+            latency is kept for :code:`stats()`. Default 10000.
+
+    Returns:
+        callable: a decorated reader with data mapping. It has a
+        :code:`stats()` method returning the latency percentiles of the
+        mapper, which helps to size :code:`process_num`, and a
+        :code:`close()` method to shut down the pool.
+
+    Examples:
+        .. code-block:: python
+
+            import paddle
+
+            def reader():
+                for i in range(10):
+                    yield i
+
+            def mapper(x):
+                return x * 2
+
+            mapped = paddle.reader.pooled_xmap_readers(
+                mapper, reader, process_num=4, buffer_size=16, order=True)
+            for epoch in range(2):
+                for e in mapped():
+                    print(e)
+            print(mapped.stats())
+            mapped.close()
+    """
+    return _PooledXmapReader(mapper, reader, process_num, buffer_size, order,
+                             use_process, latency_window)
+
+
+def multiprocess_reader(readers,
+                        use_pipe=True,
+                        queue_size=1000,
+                        use_shared_memory=False,
+                        shared_memory_size=64 * 1024 * 1024):
     """
     This API use python ``multiprocessing`` to read data from ``readers`` parallelly,
     and then ``multiprocess.Queue`` or ``multiprocess.Pipe`` is used to merge 
@@ -473,9 +974,19 @@ def multiprocess_reader(readers, use_pipe=True, queue_size=1000):
        queue_size (int, optional): only useful when ``use_pipe`` is False - ``multiprocess.Queue``
            is used, default 1000. Increase this value can speed up the data reading, and more memory
            will be consumed.
+       use_shared_memory (bool, optional): whether to pass samples through a shared memory ring
+           buffer (created in /dev/shm) of each reader process. Numpy arrays in the samples are
+           copied as raw buffers and keep their dtype, only the small rest of each sample is
+           pickled. The samples are taken from whichever reader process is ready. If True,
+           ``use_pipe`` and ``queue_size`` are ignored. Default False.
+       shared_memory_size (int, optional): only useful when ``use_shared_memory`` is True - the
+           size in bytes of the ring buffer of each reader process, which must be larger than
+           any single sample. Default 64MB.
 
     Returns:
-        ``generator``: a new reader which can be run parallelly
+        ``generator``: a new reader which can be run parallelly. If ``use_shared_memory`` is True,
+        the reader also has a ``stats()`` method, which returns the queue depth and throughput of
+        each reader process.
 
 
     Example:
@@ -614,7 +1125,283 @@ def multiprocess_reader(readers, use_pipe=True, queue_size=1000):
                 else:
                     yield sample
 
-    if use_pipe:
+    if use_shared_memory:
+        return _SharedMemoryReader(readers, shared_memory_size)
+    elif use_pipe:
         return pipe_reader
     else:
         return queue_reader
+
+
+class _ArrayRef(object):
+    """
+    The placeholder of a numpy array in a sample record, which refers to the
+    raw data of the array stored after the record header.
+    """
+
+    def __init__(self, offset, dtype, shape):
+        self.offset = offset
+        self.dtype = dtype
+        self.shape = shape
+
+
+_RECORD_ALIGN = 64
+_RECORD_HEADER = struct.Struct('<Q')
+
+
+def _record_align(n):
+    return (n + _RECORD_ALIGN - 1) // _RECORD_ALIGN * _RECORD_ALIGN
+
+
+def _strip_arrays(obj, arrays, offset):
+    # replace the numpy arrays in obj by _ArrayRef, returns the new object
+    # and the end offset of the arrays
+    if isinstance(obj, np.ndarray) and not obj.dtype.hasobject:
+        arr = np.ascontiguousarray(obj)
+        arrays.append((offset, arr))
+        ref = _ArrayRef(offset, arr.dtype.str, arr.shape)
+        return ref, _record_align(offset + arr.nbytes)
+    elif isinstance(obj, (list, tuple)):
+        items = []
+        for item in obj:
+            item, offset = _strip_arrays(item, arrays, offset)
+            items.append(item)
+        return type(obj)(items), offset
+    elif isinstance(obj, dict):
+        items = {}
+        for key, value in six.iteritems(obj):
+            items[key], offset = _strip_arrays(value, arrays, offset)
+        return items, offset
+    return obj, offset
+
+
+def _restore_arrays(obj, buf, base, copy):
+    if isinstance(obj, _ArrayRef):
+        dtype = np.dtype(obj.dtype)
+        count = int(np.prod(obj.shape, dtype=np.int64))
+        arr = np.frombuffer(
+            buf, dtype=dtype, count=count, offset=base + obj.offset)
+        arr = arr.reshape(obj.shape)
+        return arr.copy() if copy else arr
+    elif isinstance(obj, (list, tuple)):
+        return type(obj)(_restore_arrays(item, buf, base, copy) for item in obj)
+    elif isinstance(obj, dict):
+        return dict((key, _restore_arrays(value, buf, base, copy))
+                    for key, value in six.iteritems(obj))
+    return obj
+
+
+class _Record(object):
+    """
+    A sample encoded as a record: the length of the header, the pickled
+    header with the numpy arrays replaced by :code:`_ArrayRef`, and then the
+    raw data of the arrays, each aligned to 64 bytes.
+    """
+
+    def __init__(self, sample):
+        self.arrays = []
+        stripped, arrays_size = _strip_arrays(sample, self.arrays, 0)
+        self.header = pickle.dumps(stripped, pickle.HIGHEST_PROTOCOL)
+        self.base = _record_align(_RECORD_HEADER.size + len(self.header))
+        self.nbytes = self.base + arrays_size
+
+    def write_into(self, buf, offset):
+        _RECORD_HEADER.pack_into(buf, offset, len(self.header))
+        start = offset + _RECORD_HEADER.size
+        buf[start:start + len(self.header)] = self.header
+        for array_offset, arr in self.arrays:
+            if arr.nbytes == 0:
+                continue
+            dst = np.frombuffer(
+                buf,
+                dtype=np.uint8,
+                count=arr.nbytes,
+                offset=offset + self.base + array_offset)
+            dst[:] = arr.reshape(-1).view(np.uint8)
+
+    def dump(self, f):
+        f.write(_RECORD_HEADER.pack(len(self.header)))
+        f.write(self.header)
+        written = _RECORD_HEADER.size + len(self.header)
+        for array_offset, arr in self.arrays:
+            f.write(b'\0' * (self.base + array_offset - written))
+            f.write(arr.tobytes())
+            written = self.base + array_offset + arr.nbytes
+        f.write(b'\0' * (self.nbytes - written))
+
+    @staticmethod
+    def read_from(buf, offset, copy=True):
+        header_len, = _RECORD_HEADER.unpack_from(buf, offset)
+        start = offset + _RECORD_HEADER.size
+        stripped = pickle.loads(buf[start:start + header_len])
+        base = offset + _record_align(_RECORD_HEADER.size + header_len)
+        return _restore_arrays(stripped, buf, base, copy)
+
+
+class _SharedMemoryRing(object):
+    """
+    A single-producer single-consumer ring buffer in shared memory. Records
+    are written by the reader process, their positions are sent to the
+    parent through a pipe, and the parent frees the space once a record is
+    decoded.
+    """
+
+    def __init__(self, size):
+        self.size = _record_align(size)
+        shm_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        fd, path = tempfile.mkstemp(prefix='paddle_reader_', dir=shm_dir)
+        try:
+            os.ftruncate(fd, self.size)
+            self.buf = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+            # the mapping is inherited by the forked reader process, so the
+            # file can be removed right away and never leaks.
+            os.unlink(path)
+        self.read_pos = multiprocessing.Value(ctypes.c_uint64, 0, lock=False)
+        self.write_pos = multiprocessing.Value(ctypes.c_uint64, 0, lock=False)
+        self.produced = multiprocessing.Value(ctypes.c_uint64, 0, lock=False)
+        self.space_freed = multiprocessing.Condition()
+
+    def write(self, sample):
+        record = _Record(sample)
+        nbytes = record.nbytes
+        if nbytes > self.size:
+            raise ValueError(
+                "The sample takes %d bytes, which is larger than the shared "
+                "memory size %d, please increase shared_memory_size." %
+                (nbytes, self.size))
+
+        write_pos = self.write_pos.value
+        offset = write_pos % self.size
+        if offset + nbytes > self.size:
+            # skip the tail so that a record is always contiguous
+            write_pos += self.size - offset
+            offset = 0
+        end_pos = write_pos + nbytes
+        if end_pos - self.read_pos.value > self.size:
+            with self.space_freed:
+                while end_pos - self.read_pos.value > self.size:
+                    self.space_freed.wait(1)
+
+        record.write_into(self.buf, offset)
+        self.write_pos.value = end_pos
+        self.produced.value += 1
+        return offset, end_pos
+
+    def read(self, offset, end_pos):
+        sample = _Record.read_from(self.buf, offset)
+        with self.space_freed:
+            self.read_pos.value = end_pos
+            self.space_freed.notify()
+        return sample
+
+    def close(self):
+        self.buf.close()
+
+
+class _SharedMemoryReader(object):
+    """
+    The reader returned by :code:`multiprocess_reader` with
+    :code:`use_shared_memory=True`.
+    """
+
+    def __init__(self, readers, shared_memory_size):
+        self._readers = readers
+        self._shared_memory_size = shared_memory_size
+        self._rings = []
+        self._consumed = []
+        self._consumed_bytes = []
+        self._start_time = None
+
+    @staticmethod
+    def _read_into_ring(reader, ring, conn):
+        try:
+            for sample in reader():
+                if sample is None:
+                    raise ValueError("sample has None!")
+                conn.send(ring.write(sample))
+            conn.send(None)
+            conn.close()
+        except:
+            conn.send("")
+            conn.close()
+            six.reraise(*sys.exc_info())
+
+    def stats(self):
+        """
+        Get the queue depth and throughput of each reader process.
+
+        Returns:
+            list(dict): one dict per reader process, with the number of
+            samples and bytes consumed, the number of samples and bytes
+            waiting in the ring buffer, and the consumed samples per second.
+        """
+        elapsed = time.time() - self._start_time if self._start_time else 0
+        stats = []
+        for ring, consumed, consumed_bytes in zip(self._rings, self._consumed,
+                                                  self._consumed_bytes):
+            pending_bytes = ring.write_pos.value - ring.read_pos.value
+            throughput = consumed / elapsed if elapsed > 0 else 0.0
+            stats.append({
+                'samples': consumed,
+                'bytes': consumed_bytes,
+                'pending_samples': ring.produced.value - consumed,
+                'pending_bytes': pending_bytes,
+                'samples_per_sec': throughput
+            })
+        return stats
+
+    def __call__(self):
+        reader_num = len(self._readers)
+        self._rings = [
+            _SharedMemoryRing(self._shared_memory_size)
+            for _ in range(reader_num)
+        ]
+        self._consumed = [0] * reader_num
+        self._consumed_bytes = [0] * reader_num
+        self._start_time = time.time()
+
+        conns = {}
+        processes = []
+        for idx, (reader, ring) in enumerate(zip(self._readers, self._rings)):
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+            conns[parent_conn] = idx
+            p = multiprocessing.Process(
+                target=self._read_into_ring, args=(reader, ring, child_conn))
+            p.daemon = True
+            p.start()
+            child_conn.close()
+            processes.append(p)
+
+        try:
+            while conns:
+                ready, _, _ = select.select(list(conns), [], [])
+                for conn in ready:
+                    idx = conns[conn]
+                    try:
+                        msg = conn.recv()
+                    except EOFError:
+                        msg = ""
+                    if msg is None:
+                        conn.close()
+                        del conns[conn]
+                    elif msg == "":
+                        raise ValueError(
+                            "multiprocess reader raises an exception")
+                    else:
+                        ring = self._rings[idx]
+                        read_pos = ring.read_pos.value
+                        sample = ring.read(*msg)
+                        self._consumed[idx] += 1
+                        self._consumed_bytes[idx] += msg[1] - read_pos
+                        yield sample
+        finally:
+            for conn in conns:
+                conn.close()
+            for p in processes:
+                if p.is_alive():
+                    p.terminate()
+                p.join()
+            for ring in self._rings:
+                ring.close()
@@ -0,0 +1,71 @@
+#   Copyright (c) 2019 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import unittest
+
+import numpy as np
+import paddle.reader
+
+# Compare the samples/sec of multiprocess_reader with the json pipe and the
+# shared memory transport on image-like samples.
+
+SAMPLE_NUM = 2000
+READER_NUM = 4
+
+
+def image_reader(index, shape, to_list):
+    image = np.random.randint(0, 255, size=shape).astype('uint8')
+
+    def reader():
+        for i in range(SAMPLE_NUM // READER_NUM):
+            if to_list:
+                # the json pipe can not send numpy arrays
+                yield image.tolist(), i
+            else:
+                yield image, i
+
+    return reader
+
+
+class BenchmarkMultiProcessReader(unittest.TestCase):
+    def run_benchmark(self, shape):
+        results = {}
+        for name, kwargs, to_list in [('pipe', dict(use_pipe=True), True),
+                                      ('shared_memory',
+                                       dict(use_shared_memory=True), False)]:
+            readers = [
+                image_reader(i, shape, to_list) for i in range(READER_NUM)
+            ]
+            reader = paddle.reader.multiprocess_reader(readers, **kwargs)
+            start = time.time()
+            count = 0
+            for _ in reader():
+                count += 1
+            results[name] = count / (time.time() - start)
+            self.assertEqual(count, SAMPLE_NUM)
+        print("image %s: pipe %.1f samples/sec, shared memory %.1f "
+              "samples/sec, speedup %.2fx" %
+              (shape, results['pipe'], results['shared_memory'],
+               results['shared_memory'] / results['pipe']))
+
+    def test_small_image(self):
+        self.run_benchmark([3, 32, 32])
+
+    def test_large_image(self):
+        self.run_benchmark([3, 224, 224])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,10 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import time
 import unittest
 import functools
 
+import numpy as np
 import paddle.reader
 
 
@@ -29,6 +35,146 @@ def reader_creator_10(dur):
     return reader
 
 
+FINGERPRINT_SCRIPT = '''
+import paddle.reader.decorator as decorator
+
+def reader_creator(n):
+    scale = lambda x: x * 2
+    def reader():
+        return (scale(i) for i in range(n) if i in {1, 2, 3})
+    return reader
+
+print(decorator._reader_fingerprint(reader_creator(10)))
+'''
+
+
+class TestDiskCache(unittest.TestCase):
+    # the readers count their calls here, the state they close over is a
+    # part of their fingerprints
+    calls = 0
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        TestDiskCache.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def reader_creator(self, n):
+        def reader():
+            TestDiskCache.calls += 1
+            for i in range(n):
+                yield np.full([2, 3], i, dtype='float32'), i
+
+        return reader
+
+    def check_epoch(self, samples, n):
+        self.assertEqual(len(samples), n)
+        for i, (image, label) in enumerate(samples):
+            self.assertEqual(label, i)
+            self.assertEqual(image.dtype, np.float32)
+            self.assertTrue((image == i).all())
+
+    def test_replay(self):
+        for memory_budget in (0, 1024, 1 << 20):
+            reader = paddle.reader.disk_cache(
+                self.reader_creator(10),
+                cache_dir=self.cache_dir,
+                memory_budget=memory_budget,
+                key=memory_budget)
+            TestDiskCache.calls = 0
+            for epoch in range(3):
+                self.check_epoch(list(reader()), 10)
+            self.assertEqual(self.calls, 1)
+
+    def test_reuse_and_invalidate(self):
+        list(
+            paddle.reader.disk_cache(
+                self.reader_creator(10), cache_dir=self.cache_dir)())
+        # a complete cache file is reused by an identical reader
+        reader = paddle.reader.disk_cache(
+            self.reader_creator(10), cache_dir=self.cache_dir)
+        samples = list(reader())
+        self.check_epoch(samples, 10)
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(samples[0][0].flags.writeable)
+        # other arguments or keys invalidate it
+        self.check_epoch(
+            list(
+                paddle.reader.disk_cache(
+                    self.reader_creator(5), cache_dir=self.cache_dir)()), 5)
+        self.check_epoch(
+            list(
+                paddle.reader.disk_cache(
+                    self.reader_creator(10), cache_dir=self.cache_dir,
+                    key='v2')()), 10)
+        self.assertEqual(self.calls, 3)
+
+    def test_incomplete_epoch(self):
+        reader = paddle.reader.disk_cache(
+            self.reader_creator(10), cache_dir=self.cache_dir)
+        samples = reader()
+        next(samples)
+        samples.close()
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        self.check_epoch(list(reader()), 10)
+        self.assertEqual(self.calls, 2)
+
+    def test_closure_state(self):
+        def reader_creator(files):
+            def reader():
+                for f in files:
+                    yield f
+
+            return reader
+
+        fingerprint = paddle.reader.decorator._reader_fingerprint
+        self.assertEqual(
+            fingerprint(reader_creator(['a', 'b'])),
+            fingerprint(reader_creator(['a', 'b'])))
+        self.assertNotEqual(
+            fingerprint(reader_creator(['a', 'b'])),
+            fingerprint(reader_creator(['zzz'])))
+        self.assertNotEqual(
+            fingerprint(functools.partial(reader_creator(['a']), np.ones(3))),
+            fingerprint(functools.partial(reader_creator(['a']), np.zeros(3))))
+
+        reader = paddle.reader.disk_cache(
+            reader_creator(['a', 'b']), cache_dir=self.cache_dir)
+        self.assertEqual(list(reader()), ['a', 'b'])
+        reader = paddle.reader.disk_cache(
+            reader_creator(['zzz']), cache_dir=self.cache_dir)
+        self.assertEqual(list(reader()), ['zzz'])
+
+    def test_unpicklable_state(self):
+        with open(os.path.join(self.cache_dir, 'data.txt'), 'w') as f:
+            f.write('a\nb\n')
+        with open(os.path.join(self.cache_dir, 'data.txt')) as data:
+
+            def reader():
+                for line in data:
+                    yield line.strip()
+
+            self.assertRaises(ValueError, paddle.reader.disk_cache, reader,
+                              self.cache_dir)
+            cached = paddle.reader.disk_cache(
+                reader,
+                cache_dir=os.path.join(self.cache_dir, 'cache'),
+                key='data.txt')
+            self.assertEqual(list(cached()), ['a', 'b'])
+            self.assertEqual(list(cached()), ['a', 'b'])
+
+    def test_fingerprint_across_runs(self):
+        # the nested code objects hold addresses in their reprs
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        fingerprints = [
+            subprocess.check_output(
+                [sys.executable, '-c', FINGERPRINT_SCRIPT], env=env)
+            for _ in range(2)
+        ]
+        self.assertEqual(fingerprints[0], fingerprints[1])
+
+
 class TestMap(unittest.TestCase):
     def test_map(self):
         d = {"h": 0, "i": 1}
@@ -123,6 +269,50 @@ class TestShuffle(unittest.TestCase):
             self.assertEqual(total, 10)
 
 
+def reader_creator_range(start, end):
+    def reader():
+        for i in range(start, end):
+            yield i
+
+    return reader
+
+
+class TestWindowShuffle(unittest.TestCase):
+    def test_window_shuffle(self):
+        for size in (0, 1, 10, 100, 1000):
+            s = paddle.reader.window_shuffle(reader_creator_range(0, 500), size)
+            result = list(s())
+            self.assertEqual(sorted(result), list(range(500)))
+            if size <= 1:
+                self.assertEqual(result, list(range(500)))
+
+    def test_window_bound(self):
+        # a sample is output at most buf_size positions before it is read
+        s = paddle.reader.window_shuffle(reader_creator_range(0, 500), 10)
+        for idx, e in enumerate(s()):
+            self.assertLess(e, idx + 10)
+
+    def test_seed(self):
+        s1 = paddle.reader.window_shuffle(
+            reader_creator_range(0, 100), 20, seed=1)
+        s2 = paddle.reader.window_shuffle(
+            reader_creator_range(0, 100), 20, seed=1)
+        epochs1 = [list(s1()) for _ in range(2)]
+        epochs2 = [list(s2()) for _ in range(2)]
+        self.assertEqual(epochs1, epochs2)
+        self.assertNotEqual(epochs1[0], epochs1[1])
+
+    def test_shard_shuffle(self):
+        readers = [reader_creator_range(i * 10, i * 10 + 10) for i in range(5)]
+        s1 = paddle.reader.shard_shuffle(readers, 4, seed=2)
+        s2 = paddle.reader.shard_shuffle(readers, 4, seed=2)
+        epochs1 = [list(s1()) for _ in range(3)]
+        epochs2 = [list(s2()) for _ in range(3)]
+        self.assertEqual(epochs1, epochs2)
+        for epoch in epochs1:
+            self.assertEqual(sorted(epoch), list(range(50)))
+
+
 class TestXmap(unittest.TestCase):
     def test_xmap(self):
         def mapper(x):
@@ -147,6 +337,62 @@ class TestXmap(unittest.TestCase):
                             self.assertEqual(e, mapper(idx))
 
 
+def pooled_mapper(x):
+    return x + 1
+
+
+class TestPooledXmap(unittest.TestCase):
+    def test_pooled_xmap(self):
+        for use_process in (False, True):
+            for order in (True, False):
+                for size in (1, 2, 16):
+                    reader = paddle.reader.pooled_xmap_readers(
+                        pooled_mapper,
+                        reader_creator_10(0),
+                        4,
+                        size,
+                        order=order,
+                        use_process=use_process)
+                    pool = None
+                    for n in range(3):
+                        result = list(reader())
+                        if not order:
+                            result.sort()
+                        self.assertEqual(result, [i + 1 for i in range(10)])
+                        # the pool is kept alive across epochs
+                        if pool is not None:
+                            self.assertIs(pool, reader._pool)
+                        pool = reader._pool
+                    stats = reader.stats()
+                    self.assertEqual(stats['count'], 30)
+                    self.assertTrue(stats['p50'] <= stats['p99'])
+                    reader.close()
+
+    def test_mapper_exception(self):
+        def mapper(x):
+            if x == 5:
+                raise RuntimeError("bad sample")
+            return x
+
+        reader = paddle.reader.pooled_xmap_readers(mapper, reader_creator_10(0),
+                                                   2, 4)
+        with self.assertRaises(ValueError):
+            for e in reader():
+                pass
+        reader.close()
+
+    def test_unpicklable_mapper(self):
+        # a lambda can not be sent to the worker processes
+        for order in (True, False):
+            reader = paddle.reader.pooled_xmap_readers(
+                lambda x: x, reader_creator_10(0), 2, 4, order=order,
+                use_process=True)
+            with self.assertRaises(Exception):
+                for e in reader():
+                    pass
+            reader.close()
+
+
 class TestMultiProcessReader(unittest.TestCase):
     def setup(self):
         self.samples = []
@@ -174,6 +420,39 @@ class TestMultiProcessReader(unittest.TestCase):
         self.reader_test(use_pipe=False)
         self.reader_test(use_pipe=True)
 
+    def test_shared_memory_reader(self):
+        self.setup()
+        reader = paddle.reader.multiprocess_reader(
+            [self.reader0, self.reader1, self.reader2], use_shared_memory=True)
+        results = list(reader())
+        self.assertEqual(sorted(self.samples), sorted(results))
+        stats = reader.stats()
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(sum(s['samples'] for s in stats), len(self.samples))
+        self.assertTrue(all(s['pending_samples'] == 0 for s in stats))
+
+    def test_shared_memory_reader_numpy(self):
+        def reader(index):
+            for i in range(100):
+                image = np.full([3, 8, 8], i, dtype='uint8')
+                yield image, np.array([index, i], dtype='int64')
+
+        # a small ring buffer makes the readers wrap around and wait
+        reader = paddle.reader.multiprocess_reader(
+            [functools.partial(reader, i) for i in range(2)],
+            use_shared_memory=True,
+            shared_memory_size=4096)
+        results = list(reader())
+        self.assertEqual(len(results), 200)
+        for image, label in results:
+            self.assertEqual(image.dtype, np.uint8)
+            self.assertEqual(image.shape, (3, 8, 8))
+            self.assertEqual(label.dtype, np.int64)
+            self.assertTrue((image == label[1]).all())
+        self.assertEqual(
+            sorted(tuple(label) for _, label in results),
+            sorted((i, j) for i in range(2) for j in range(100)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -46,6 +46,10 @@ def queue_dict(member, cur_name):
     if cur_name in omitted_list:
         return
 
+    if hasattr(member, '_materialize'):
+        # the layer functions generated lazily in paddle.fluid.layers.ops
+        member = member._materialize()
+
     try:
         doc = ('document', md5(member.__doc__))
         if inspect.isclass(member):